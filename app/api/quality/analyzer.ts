@@ -0,0 +1,115 @@
+import { spawn, ChildProcessWithoutNullStreams } from "node:child_process";
+import readline from "node:readline";
+
+// Long-running analyzer_v1.py process in --serve mode. Keeps cv2/numpy and config.ini
+// warm so a capture only pays for scoring, not for interpreter startup and imports.
+
+type Pending = {
+  proc: ChildProcessWithoutNullStreams;
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+};
+
+const PYTHON = "/opt/venv/bin/python3";
+const WORKERS = process.env.ANALYZER_WORKERS ?? "1";
+const MAX_IN_FLIGHT = process.env.ANALYZER_MAX_IN_FLIGHT;
+const CACHE_PATH = process.env.ANALYZER_CACHE_PATH;
+const TIMEOUT_MS = Number(process.env.ANALYZER_TIMEOUT_MS ?? 30000);
+
+class AnalyzerClient {
+  private proc: ChildProcessWithoutNullStreams | null = null;
+  private pending = new Map<number, Pending>();
+  private nextId = 1;
+  private stderr = "";
+
+  private start(): ChildProcessWithoutNullStreams {
+    // Retried captures re-send identical bytes, so keep results cached in the server
+    const args = ["image-quality/analyzer_v1.py", "--serve", "--workers", WORKERS, "--cache"];
+    if (MAX_IN_FLIGHT) args.push("--max_in_flight", MAX_IN_FLIGHT);
+    if (CACHE_PATH) args.push("--cache_path", CACHE_PATH);
+
+    const proc = spawn(PYTHON, args, {
+      cwd: process.cwd(),
+      env: { ...process.env, PATH: `/opt/venv/bin:${process.env.PATH}` },
+    });
+
+    readline.createInterface({ input: proc.stdout }).on("line", (line) => {
+      let response: any;
+      try {
+        response = JSON.parse(line);
+      } catch {
+        return; // Not a protocol line
+      }
+      const entry = this.pending.get(response.id);
+      if (!entry) return;
+      this.pending.delete(response.id);
+      clearTimeout(entry.timer);
+      if (response.ok) entry.resolve(response.result);
+      else entry.reject(new Error(response.error ?? "Analyzer request failed"));
+    });
+
+    // Keep only the tail of stderr for error reporting
+    proc.stderr.on("data", (d) => (this.stderr = (this.stderr + d.toString()).slice(-4000)));
+
+    const fail = (reason: string) => {
+      if (this.proc === proc) this.proc = null;
+      const error = new Error(`${reason}${this.stderr ? `: ${this.stderr}` : ""}`);
+      // Only this process's requests: a replacement may already be serving newer ones
+      for (const [id, entry] of this.pending) {
+        if (entry.proc !== proc) continue;
+        this.pending.delete(id);
+        clearTimeout(entry.timer);
+        entry.reject(error);
+      }
+    };
+    proc.on("exit", (code) => fail(`Analyzer exited with code ${code}`));
+    proc.on("error", (e) => fail(`Analyzer failed to start (${e.message})`));
+    // Writes to a dead process fail with EPIPE; unhandled, that would crash the server
+    proc.stdin.on("error", (e) => fail(`Analyzer stdin closed (${e.message})`));
+
+    this.proc = proc;
+    return proc;
+  }
+
+  private send(payload: Record<string, unknown>, raw?: Uint8Array): Promise<any> {
+    const proc = this.proc ?? this.start();
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      // A stuck process would stall every later request, so give up on it and restart
+      const timer = setTimeout(() => {
+        if (!this.pending.delete(id)) return;
+        reject(new Error(`Analyzer request timed out after ${TIMEOUT_MS} ms`));
+        if (this.proc === proc) this.proc = null;
+        proc.kill();
+      }, TIMEOUT_MS);
+      this.pending.set(id, { proc, resolve, reject, timer });
+      proc.stdin.write(JSON.stringify({ id, ...payload }) + "\n");
+      // Raw pixel bytes follow their request line directly
+      if (raw) proc.stdin.write(raw);
+    });
+  }
+
+  // Score an image file already on disk
+  evaluatePath(imagePath: string): Promise<any> {
+    return this.send({ path: imagePath });
+  }
+
+  // Score encoded image bytes (PNG/JPEG) without writing them to disk
+  evaluateBytes(bytes: Buffer): Promise<any> {
+    return this.send({ image_b64: bytes.toString("base64") });
+  }
+
+  // Score raw pixels (e.g. canvas ImageData, RGBA) with no PNG encode or decode
+  evaluatePixels(pixels: Uint8Array, width: number, height: number, pixelFormat = "rgba"): Promise<any> {
+    return this.send({ width, height, pixel_format: pixelFormat, pixels_length: pixels.byteLength }, pixels);
+  }
+}
+
+declare global {
+  var _analyzer: AnalyzerClient | undefined;
+}
+
+export const analyzer = global._analyzer ?? new AnalyzerClient();
+
+if (process.env.NODE_ENV != "production") global._analyzer = analyzer;
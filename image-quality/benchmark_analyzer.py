@@ -0,0 +1,357 @@
+# --- Dependency Check ---
+try:
+    import cv2
+    import numpy as np
+
+except ImportError as e:
+    print(f"ImportError: {e}")
+    print("One or more required Python packages are not installed.")
+    print("Please install the necessary dependencies by running:")
+    print("pip install -r requirements.txt")
+    exit(1)
+
+# --- Standard Library Imports ---
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import quality_analyzer  # noqa: E402
+from quality_analyzer import timing  # noqa: E402
+from quality_analyzer.config import SUPPORTED_PREVIEW_SCALES  # noqa: E402
+
+# ---------------------------------------------------------------------------
+# Benchmark for the quality_analyzer package.
+#   Generates a deterministic synthetic corpus (VGA to 12 MP; clean, blurred, noisy,
+#   under/over-exposed and color-cast variants), then reports per-stage and end-to-end
+#   latency percentiles, throughput and peak memory. `--record` stores the scores of
+#   every image and `--check` fails if a later change moves any score beyond the
+#   tolerance or flips a judgement, so speedups can't silently change results.
+#
+#   python image-quality/benchmark_analyzer.py --check image-quality/benchmark_baseline.json
+#
+#   Two baselines are kept. benchmark_baseline.json holds the scores of the current code
+#   and is the one to --check (at the default tolerance) before merging performance work.
+#   benchmark_baseline_original.json holds the scores of the analyzer before the
+#   performance series (recorded with --analyzer_dir from a checkout of that commit); the
+#   region-variance change moved Focus Area by up to 0.027 against it, so check it with
+#   --tolerance 0.03 to see that drift, not to gate changes.
+# ---------------------------------------------------------------------------
+
+logger = logging.getLogger("benchmark_analyzer")
+
+SIZES = {
+    "vga": (640, 480),
+    "hd": (1280, 720),
+    "fhd": (1920, 1080),
+    "8mp": (3264, 2448),
+    "12mp": (4000, 3000),
+}
+
+VARIANTS = ("clean", "blur", "noise", "dark", "bright", "cast")
+
+SCORE_KEYS = ("Sharpness", "Focus Area", "Exposure", "Noise", "Color Balance",
+              "Dynamic Range", "Saliency")
+
+
+# --- Synthetic Corpus ---
+
+def _scene(width: int, height: int, seed: int) -> np.ndarray:
+    """
+    Deterministic BGR test scene: a smooth background with soft shapes and a sharp,
+    textured off-center subject. Shape positions are fractions of the frame, so every
+    resolution shows the same picture.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    xx /= width
+    yy /= height
+    img = np.empty((height, width, 3), np.float32)
+    img[..., 0] = 70 + 90 * yy
+    img[..., 1] = 90 + 60 * xx
+    img[..., 2] = 110 + 50 * (1 - yy) * xx
+    scale = min(width, height)
+    for _ in range(12):
+        center = (int(rng.uniform(0, 1) * width), int(rng.uniform(0, 1) * height))
+        radius = int(rng.uniform(0.03, 0.15) * scale)
+        color = tuple(float(c) for c in rng.uniform(20, 235, 3))
+        cv2.circle(img, center, radius, color, -1, cv2.LINE_AA)
+    img = cv2.GaussianBlur(img, (0, 0), 0.01 * scale)  # Soft background
+
+    # Sharp subject: a checkerboard patch with text, away from the center crop
+    x1, y1 = int(0.58 * width), int(0.18 * height)
+    x2, y2 = int(0.86 * width), int(0.52 * height)
+    cell = max(2, scale // 60)
+    patch_y, patch_x = np.mgrid[y1:y2, x1:x2]
+    checker = ((patch_y // cell + patch_x // cell) % 2).astype(np.float32)
+    img[y1:y2, x1:x2] = (25 + 205 * checker)[..., None]
+    cv2.putText(img, "SELFIE", (int(0.1 * width), int(0.85 * height)), cv2.FONT_HERSHEY_SIMPLEX,
+                scale / 240, (245, 245, 245), max(1, scale // 160), cv2.LINE_AA)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def _apply_variant(img: np.ndarray, variant: str, seed: int) -> np.ndarray:
+    """Applies a controlled degradation whose strength scales with the frame size."""
+    if variant == "clean":
+        return img
+    if variant == "blur":
+        return cv2.GaussianBlur(img, (0, 0), 0.004 * min(img.shape[:2]))
+    if variant == "noise":
+        noise = np.random.default_rng(seed).normal(0, 18, img.shape).astype(np.int16)
+        return np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    if variant == "dark":
+        return cv2.convertScaleAbs(img, alpha=0.3, beta=0)
+    if variant == "bright":
+        return cv2.convertScaleAbs(img, alpha=1.0, beta=90)
+    if variant == "cast":
+        return cv2.convertScaleAbs(img * np.array([0.6, 0.9, 1.3], np.float32))
+    raise ValueError(f"Unknown variant: {variant}")
+
+
+def generate_corpus(out_dir: str, sizes: list[str], seed: int = 7) -> list[str]:
+    """Writes one PNG per (size, variant) to `out_dir` and returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for size in sizes:
+        width, height = SIZES[size]
+        scene = _scene(width, height, seed)
+        for variant in VARIANTS:
+            path = os.path.join(out_dir, f"{size}_{variant}.png")
+            if not cv2.imwrite(path, _apply_variant(scene, variant, seed)):
+                raise OSError(f"Failed to write {path}")
+            paths.append(path)
+    return paths
+
+
+# --- Measurements ---
+
+def _percentiles(samples: list[float]) -> dict:
+    values = np.asarray(samples, dtype=np.float64)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"count": int(values.size), "mean_ms": float(values.mean()), "p50_ms": float(p50),
+            "p90_ms": float(p90), "p99_ms": float(p99), "max_ms": float(values.max())}
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_benchmark(paths: list[str], repeat: int = 3, warmup: int = 1, **options) -> dict:
+    """
+    Scores every image `warmup + repeat` times and returns latency, throughput, memory
+    and score figures. `options` are passed through to evaluate_photo_quality; with
+    "low_memory", the largest per-image peak RSS of each size is reported too.
+    """
+    for _ in range(warmup):
+        for path in paths:
+            quality_analyzer.evaluate_photo_quality(path, **options)
+
+    stages: dict[str, list[float]] = {}
+    end_to_end: dict[str, list[float]] = {}
+    peak_rss_mb: dict[str, float] = {}
+    results = {}
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            t0 = time.perf_counter()
+            result = quality_analyzer.evaluate_photo_quality(path, timings=True, **options)
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            size = os.path.basename(path).split("_", 1)[0]
+            end_to_end.setdefault(size, []).append(elapsed_ms)
+            for stage, ms in result.pop("timings").items():
+                stages.setdefault(stage, []).append(ms)
+            memory = result.pop("memory", None)
+            if memory is not None and memory["peak_rss_mb"] is not None:
+                peak_rss_mb[size] = max(peak_rss_mb.get(size, 0.0), memory["peak_rss_mb"])
+            results[os.path.basename(path)] = result
+    wall_s = time.perf_counter() - started
+
+    # Separate pass: tracemalloc slows numpy allocations down, so keep it out of the timings
+    peak_mb: dict[str, float] = {}
+    tracemalloc.start()
+    for path in paths:
+        tracemalloc.reset_peak()
+        quality_analyzer.evaluate_photo_quality(path, **options)
+        size = os.path.basename(path).split("_", 1)[0]
+        peak_mb[size] = max(peak_mb.get(size, 0.0), tracemalloc.get_traced_memory()[1] / 2**20)
+    tracemalloc.stop()
+
+    report = {
+        "images": len(paths) * repeat,
+        "images_per_sec": len(paths) * repeat / wall_s,
+        "end_to_end": {size: _percentiles(v) for size, v in end_to_end.items()},
+        "stages": {stage: _percentiles(v) for stage, v in stages.items()},
+        "peak_traced_mb": peak_mb,
+        "max_rss_mb": _max_rss_mb(),
+        "scores": {name: score_record(result) for name, result in sorted(results.items())},
+    }
+    if peak_rss_mb:
+        report["peak_rss_mb"] = peak_rss_mb
+    return report
+
+
+# --- Score Baseline ---
+
+def score_record(result: dict) -> dict:
+    """The parts of a result that must not change when the code is only made faster."""
+    record = {key: result[key]["confidence"] for key in SCORE_KEYS}
+    record["overall_confidence"] = result["overall_confidence"]
+    record["judgement"] = result["judgement"]
+    record["bbox"] = result["Focus Area"]["bbox"]
+    return record
+
+
+def reference_scores(paths: list[str], analyzer_dir: str) -> dict:
+    """
+    Scores of the analyzer_v1.py in `analyzer_dir` (e.g. a `git worktree` of an older
+    commit), run in a subprocess so its module doesn't clash with this checkout's.
+    """
+    script = ("import json, sys; sys.path.insert(0, sys.argv[1]); import analyzer_v1; "
+              "print(json.dumps([analyzer_v1.evaluate_photo_quality(p) for p in sys.argv[2:]]))")
+    completed = subprocess.run([sys.executable, "-c", script, analyzer_dir, *paths],
+                               capture_output=True, text=True, check=True)
+    results = json.loads(completed.stdout.splitlines()[-1])
+    return {os.path.basename(path): score_record(result) for path, result in sorted(zip(paths, results))}
+
+
+def _source_commit(analyzer_dir: str) -> str | None:
+    completed = subprocess.run(["git", "-C", analyzer_dir, "rev-parse", "--short", "HEAD"],
+                               capture_output=True, text=True)
+    return completed.stdout.strip() or None
+
+
+def compare_scores(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Human-readable differences beyond `tolerance`; an empty list means unchanged."""
+    problems = []
+    for name, expected in sorted(baseline.items()):
+        actual = current.get(name)
+        if actual is None:
+            continue  # Not part of this run (e.g. a smaller --sizes selection)
+        if actual["judgement"] != expected["judgement"]:
+            problems.append(f"{name}: judgement {expected['judgement']} -> {actual['judgement']}")
+        if actual["bbox"] != expected["bbox"]:
+            problems.append(f"{name}: Focus Area bbox {expected['bbox']} -> {actual['bbox']}")
+        for key in SCORE_KEYS + ("overall_confidence",):
+            if abs(actual[key] - expected[key]) > tolerance:
+                problems.append(f"{name}: {key} {expected[key]:.6f} -> {actual[key]:.6f}")
+    return problems
+
+
+def _format_report(report: dict) -> str:
+    lines = [f"{report['images']} evaluations, {report['images_per_sec']:.2f} images/s, "
+             f"max RSS {report['max_rss_mb']:.0f} MB", ""]
+    header = f"{'':<16}{'count':>7}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)"
+    peak_rss = report.get("peak_rss_mb")
+    lines.append(f"End-to-end evaluate_photo_quality{'':<8}peak traced MB" + ("  peak RSS MB" if peak_rss else ""))
+    lines.append(header)
+    for size, s in report["end_to_end"].items():
+        lines.append(f"{size:<16}{s['count']:>7}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}"
+                     f"{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}  {report['peak_traced_mb'][size]:>8.1f}"
+                     + (f"  {peak_rss[size]:>11.1f}" if peak_rss else ""))
+    lines += ["", "Per stage (all sizes)", header]
+    for stage, s in sorted(report["stages"].items(), key=lambda item: -item[1]["mean_ms"]):
+        lines.append(f"{stage:<16}{s['count']:>7}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}"
+                     f"{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+    return "\n".join(lines)
+
+
+# --- Main Execution ---
+
+def main():
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(
+        description="Benchmark the analyzer on a deterministic synthetic corpus and guard its scores.")
+    parser.add_argument(
+        "--sizes",
+        type=str,
+        default=",".join(SIZES),
+        help=f"Comma-separated resolutions to generate (default: all of {', '.join(SIZES)})."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus (default: 3).")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes before measuring (default: 1).")
+    parser.add_argument("--seed", type=int, default=7, help="Corpus seed (default: 7; baselines assume 7).")
+    parser.add_argument(
+        "--corpus_dir",
+        type=str,
+        default=None,
+        help="Keep the generated images in this folder (default: a temporary folder)."
+    )
+    parser.add_argument("--preview_scale", type=int, choices=SUPPORTED_PREVIEW_SCALES, default=1,
+                        help="Benchmark the reduced-resolution preview path.")
+    parser.add_argument("--focus_map", action="store_true", help="Include the dense focus map.")
+    parser.add_argument("--bands", type=int, default=1,
+                        help="Score each image over N parallel bands (scores must match the serial baseline).")
+    parser.add_argument("--low_memory", action="store_true",
+                        help="Use the streamed low-memory Laplacian (scores must match the baseline).")
+    parser.add_argument("--analyzer_dir", type=str, default=None,
+                        help="Only score the corpus with the analyzer_v1.py in this folder (e.g. a git worktree "
+                             "of an older commit), to record or check its baseline. No timings.")
+    parser.add_argument("--record", type=str, default=None, help="Write the scores to this JSON baseline.")
+    parser.add_argument("--check", type=str, default=None,
+                        help="Compare the scores against this JSON baseline; exit 1 on any change.")
+    parser.add_argument("--tolerance", type=float, default=1e-6,
+                        help="Largest accepted absolute change of a confidence (default: 1e-6).")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"Unknown size(s): {', '.join(unknown)}")
+
+    timing.RESET_PEAK_RSS = True  # Per-image peaks for --low_memory (see PeakRss)
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="analyzer_bench_")
+    try:
+        logger.info(f"Generating {len(sizes) * len(VARIANTS)} images in {corpus_dir}")
+        paths = generate_corpus(corpus_dir, sizes, args.seed)
+        if args.analyzer_dir:
+            report = {"scores": reference_scores(paths, args.analyzer_dir)}
+        else:
+            report = run_benchmark(paths, args.repeat, args.warmup, focus_map=args.focus_map,
+                                   preview_scale=args.preview_scale, bands=args.bands, low_memory=args.low_memory)
+    finally:
+        if args.corpus_dir is None:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if args.analyzer_dir:
+        logger.info(f"Scored {len(report['scores'])} images with {args.analyzer_dir}")
+    else:
+        print(json.dumps(report, indent=2) if args.json else _format_report(report))
+
+    # Scores are only comparable for the same corpus and decode scale
+    run_options = {"seed": args.seed, "preview_scale": args.preview_scale}
+    if args.record:
+        baseline = {"options": run_options, "scores": report["scores"]}
+        if args.analyzer_dir:
+            baseline["source"] = _source_commit(args.analyzer_dir) or args.analyzer_dir
+        with open(args.record, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        logger.info(f"Recorded scores of {len(report['scores'])} images to {args.record}")
+
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+        if baseline["options"] != run_options:
+            logger.error(f"Baseline was recorded with {baseline['options']}, this run used {run_options}.")
+            exit(1)
+        problems = compare_scores(baseline["scores"], report["scores"], args.tolerance)
+        if problems:
+            logger.error("Scores changed against the baseline:\n" + "\n".join(problems))
+            exit(1)
+        logger.info(f"Scores match {args.check} (tolerance {args.tolerance:g}).")
+
+
+if __name__ == "__main__":
+    main()
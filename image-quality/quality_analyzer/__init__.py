@@ -0,0 +1,51 @@
+"""
+Photo quality analyzer (fast heuristic, no object detector required).
+
+The package imports nothing heavy up front: public names are resolved on first access,
+so `import quality_analyzer` stays cheap and OpenCV/NumPy load only when evaluation code
+is first used. config.ini is read on the first get_config() call (see config.py for the
+lookup order) and cached for the process.
+"""
+import importlib
+
+_EXPORTS = {
+    "evaluate_photo_quality": "evaluate",
+    "evaluate_photo_bytes": "evaluate",
+    "evaluate_photo_pixels": "evaluate",
+    "evaluate_batch": "evaluate",
+    "select_best_frames": "evaluate",
+    "calibrate_preview": "evaluate",
+    "process_folder": "batch",
+    "process_burst": "batch",
+    "rejudge_store": "batch",
+    "FeatureStore": "features",
+    "load_feature_store": "features",
+    "rejudge": "features",
+    "PhashIndex": "phash",
+    "perceptual_hash": "phash",
+    "hamming_distance": "phash",
+    "serve": "server",
+    "ResultCache": "cache",
+    "StageTimer": "timing",
+    "TimingStats": "timing",
+    "AnalyzerConfig": "config",
+    "ConfigError": "config",
+    "configure": "config",
+    "get_config": "config",
+    "load_config": "config",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,221 @@
+"""Annotated copies of scored images (focus bbox and score drawn on the frame)."""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _draw_annotation(frame: np.ndarray, bbox: tuple[int, int, int, int] | None, focus_score: float):
+    """Draws the bbox (in `frame` coordinates) and the focus score onto `frame`, in place."""
+    if not bbox:
+        return
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = bbox
+    # clamp
+    x1, y1 = max(0, int(x1)), max(0, int(y1))
+    x2, y2 = min(w - 1, int(x2)), min(h - 1, int(y2))
+    color = (0, 255, 0)
+    thickness = max(1, int(round(min(w, h) / 200)))
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
+
+    # Text: focus score as percentage
+    text = f"Focus: {focus_score*100:.0f}%"
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 0.7
+    txt_thickness = 2
+    # Compute text size and draw background for readability
+    (text_w, text_h), _ = cv2.getTextSize(text, font, font_scale, txt_thickness)
+    txt_x = x1
+    txt_y = max(0, y1 - 6)
+    # box behind text
+    cv2.rectangle(frame, (txt_x - 2, txt_y - text_h - 2), (txt_x + text_w + 2, txt_y + 4), (0, 0, 0), -1)
+    cv2.putText(frame, text, (txt_x, txt_y), font, font_scale, (255, 255, 255), txt_thickness, cv2.LINE_AA)
+
+
+def annotate_frame(img: np.ndarray, bbox: tuple[int, int, int, int] | None, focus_score: float,
+                   preview_scale: int = 1, max_side: int | None = None) -> np.ndarray:
+    """
+    Returns the annotated frame for an image that has already been decoded and scored.
+
+    `bbox` is in full-resolution coordinates, as in results; `preview_scale` is the
+    reduction `img` was decoded at. With `max_side`, the annotation is drawn on a
+    thumbnail whose longer side is at most `max_side` pixels. Otherwise it is drawn onto
+    `img` itself, without a copy, so pass a frame that is no longer needed.
+    """
+    h, w = img.shape[:2]
+    scale = 1.0
+    frame = img
+    if max_side and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        frame = cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    if bbox:
+        factor = scale / preview_scale
+        bbox = tuple(int(round(v * factor)) for v in bbox)
+    _draw_annotation(frame, bbox, focus_score)
+    return frame
+
+
+def _save_annotated_image(src_path: str, bbox: tuple[int, int, int, int] | None, focus_score: float, out_path: str | None = None,
+                          max_side: int | None = None):
+    """
+    Draw a bounding box and focus score onto the image and save it.
+
+    - bbox: (x1, y1, x2, y2) in image coordinates, or None (in which case no box is drawn).
+    - out_path: if provided, save there; otherwise save next to source with '_annotated' suffix.
+    - max_side: if provided, save a thumbnail with this longer side instead (see annotate_frame).
+    Decodes `src_path`; when the decoded frame is still at hand, use annotate_frame.
+    """
+    try:
+        img = cv2.imread(src_path)
+        if img is None:
+            raise ValueError(f"Failed to load image for annotation: {src_path}")
+        annotated = annotate_frame(img, bbox, focus_score, max_side=max_side)
+
+        # Determine output path
+        if out_path is None:
+            base, ext = os.path.splitext(src_path)
+            out_path = f"{base}_annotated{ext if ext else '.jpg'}"
+
+        cv2.imwrite(out_path, annotated)
+        return out_path
+    except Exception:
+        logger.debug("Failed to save annotated image", exc_info=True)
+        return None
+
+
+@dataclass(frozen=True)
+class AnnotationTarget:
+    """
+    Where and how a batch run saves annotated images: `<out_dir>/<path relative to
+    root>` with an "_annotated" suffix, optionally as thumbnails of at most `max_side`
+    pixels. Picklable, so pool workers can annotate the frames they decoded.
+    """
+    out_dir: str
+    root: str
+    max_side: int | None = None
+
+    def out_path(self, image_path: str) -> str:
+        base, ext = os.path.splitext(os.path.relpath(image_path, self.root))
+        return os.path.join(self.out_dir, f"{base}_annotated{ext if ext else '.jpg'}")
+
+    @staticmethod
+    def wants(result: dict) -> bool:
+        """Whether a result gets an annotated image: only results with a focus bbox do."""
+        return bool(result.get("Focus Area", {}).get("bbox"))
+
+    def render(self, image_path: str, result: dict, img: np.ndarray | None,
+               preview_scale: int = 1) -> np.ndarray | None:
+        """
+        The annotated frame for a result, or None if it has no bbox (see wants) or the
+        file cannot be decoded. `img` is the frame the result was scored on; without one
+        (a cache hit) the file is decoded here, before any --move can take it away.
+        """
+        if not self.wants(result):
+            return None
+        bbox = result["Focus Area"]["bbox"]
+        if img is None:
+            img = cv2.imread(image_path)
+            if img is None:
+                logger.debug(f"Failed to load image for annotation: {image_path}")
+                return None
+            preview_scale = 1
+        return annotate_frame(img, tuple(bbox), result["Focus Area"]["confidence"], preview_scale, self.max_side)
+
+    def write(self, image_path: str, frame: np.ndarray) -> str | None:
+        """Encodes and saves an annotated frame; returns the written path, or None."""
+        out_path = self.out_path(image_path)
+        try:
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            if not cv2.imwrite(out_path, frame):
+                raise ValueError(f"Failed to write {out_path}")
+            return out_path
+        except Exception:
+            logger.debug("Failed to save annotated image", exc_info=True)
+            return None
+
+
+def _add_stage_time(result: dict, stage: str, start: float):
+    """Adds a stage measured from `start` (perf_counter) to a result's timings and total."""
+    if "timings" not in result:
+        return
+    ms = round((time.perf_counter() - start) * 1000.0, 3)
+    result["timings"][stage] = ms
+    result["timings"]["total"] = round(result["timings"]["total"] + ms, 3)
+
+
+def annotate_now(target: AnnotationTarget, image_path: str, result: dict, img: np.ndarray | None,
+                 preview_scale: int = 1) -> str | None:
+    """Renders and writes the annotation on the calling thread (used inside pool workers)."""
+    start = time.perf_counter()
+    frame = target.render(image_path, result, img, preview_scale)
+    written = target.write(image_path, frame) if frame is not None else None
+    _add_stage_time(result, "annotation", start)
+    return written
+
+
+class AnnotationWriter:
+    """
+    Background writer pool for annotated images. submit() draws on the caller's thread
+    (cheap) and hands PNG/JPEG encoding and the file write to `writers` threads, so
+    scoring does not wait for them (cv2.imwrite releases the GIL). At most `max_pending`
+    frames wait to be written; submit() blocks beyond that to bound memory. The
+    "annotation" stage time of a result covers drawing and queueing only.
+    Only results that get an annotation (see AnnotationTarget.wants) count as written
+    or failed, whether they are annotated here or by a pool worker.
+    """
+
+    def __init__(self, target: AnnotationTarget, writers: int = 2, max_pending: int | None = None):
+        self.target = target
+        self.written = self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=max(1, writers), thread_name_prefix="analyzer-annotate")
+        self._slots = threading.BoundedSemaphore(max_pending or 4 * max(1, writers))
+        self._lock = threading.Lock()
+
+    def submit(self, image_path: str, result: dict, img: np.ndarray | None, preview_scale: int = 1):
+        start = time.perf_counter()
+        if not self.target.wants(result):
+            _add_stage_time(result, "annotation", start)
+            return
+        frame = self.target.render(image_path, result, img, preview_scale)
+        if frame is None:
+            _add_stage_time(result, "annotation", start)
+            self.record(None)
+            return
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self.target.write, image_path, frame)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._on_done)
+        _add_stage_time(result, "annotation", start)
+
+    def _on_done(self, future):
+        self._slots.release()
+        try:
+            annotated_path = future.result()
+        except Exception:  # Raised in a done-callback it would only be logged by concurrent.futures
+            logger.debug("Failed to save annotated image", exc_info=True)
+            annotated_path = None
+        self.record(annotated_path)
+
+    def record(self, annotated_path: str | None):
+        """Counts (and logs) an annotation written here or by a pool worker."""
+        with self._lock:
+            if annotated_path:
+                self.written += 1
+            else:
+                self.failed += 1
+        if annotated_path:
+            logger.info(f"Annotated image written: {annotated_path}")
+
+    def close(self):
+        """Waits for every pending write."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,132 @@
+"""
+Intra-image band parallelism: the grayscale conversion, the statistics pass and the
+Laplacian tables of one large frame are computed over horizontal bands in a thread pool
+(OpenCV and NumPy release the GIL) and merged exactly, so a single request can use
+several cores and still get the serial path's scores bit for bit.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .metrics import ImageStats, LaplacianIntegral
+
+logger = logging.getLogger(__name__)
+
+# Bands thinner than this cost more in overhead than they save.
+BAND_MIN_ROWS = 64
+# calcHist counts in float32, which is exact below 2**24 per bin; keeping every band
+# under that size keeps per-band counts exact before they are merged.
+_BAND_MAX_PIXELS = 1 << 24
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _band_executor() -> ThreadPoolExecutor:
+    """Process-wide thread pool shared by every banded evaluation (one thread per core)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="analyzer-band")
+        return _executor
+
+
+def band_ranges(h: int, w: int, bands: int) -> list[tuple[int, int]]:
+    """[y0, y1) row ranges of up to `bands` bands of at least BAND_MIN_ROWS rows."""
+    bands = max(1, min(bands, h // BAND_MIN_ROWS))
+    bands = max(bands, -(-h * w // _BAND_MAX_PIXELS))
+    edges = [h * i // bands for i in range(bands + 1)]
+    return [(edges[i], edges[i + 1]) for i in range(bands) if edges[i + 1] > edges[i]]
+
+
+def _map_bands(fn, ranges: list[tuple[int, int]]) -> list:
+    if len(ranges) == 1:
+        return [fn(*ranges[0])]
+    return list(_band_executor().map(lambda r: fn(*r), ranges))
+
+
+def banded_grayscale(img: np.ndarray, bands: int, code: int = cv2.COLOR_BGR2GRAY) -> np.ndarray:
+    """cv2.cvtColor(img, code) to grayscale, converted band by band (a per-pixel operation)."""
+    h, w = img.shape[:2]
+    gray = np.empty((h, w), dtype=np.uint8)
+
+    def convert(y0, y1):
+        gray[y0:y1] = cv2.cvtColor(img[y0:y1], code)
+
+    _map_bands(convert, band_ranges(h, w, bands))
+    return gray
+
+
+def banded_image_stats(gray_img: np.ndarray, img: np.ndarray | None, noise_roi_size: int,
+                       bands: int) -> ImageStats:
+    """
+    _compute_image_stats from per-band partial results. Histogram counts and channel sums
+    are integers, so adding them up is exact; the histogram is rounded through float32
+    like a single calcHist. The noise sample is a small top-left block and is taken once.
+    Channel standard deviations (unused by the metrics) are not computed.
+    """
+    h, w = gray_img.shape[:2]
+
+    def partial_stats(y0, y1):
+        hist = cv2.calcHist([gray_img[y0:y1]], [0], None, [256], [0, 256]).ravel().astype(np.float64)
+        channel_sums = None
+        if img is not None:
+            n = (y1 - y0) * w
+            channel_sums = np.rint(cv2.meanStdDev(img[y0:y1])[0].ravel() * n)
+        return hist, channel_sums
+
+    parts = _map_bands(partial_stats, band_ranges(h, w, bands))
+    hist = np.sum([part[0] for part in parts], axis=0).astype(np.float32).astype(np.float64)
+    n = h * w
+    mean_intensity = float(hist @ np.arange(256, dtype=np.float64)) / n if n else 0.0
+    active_bins = np.flatnonzero(hist)
+    gray_min, gray_max = (int(active_bins[0]), int(active_bins[-1])) if active_bins.size else (None, None)
+    channel_means = np.sum([part[1] for part in parts], axis=0) / n if img is not None else None
+
+    noise_region = gray_img[:noise_roi_size, :noise_roi_size]
+    noise_std = float(np.std(noise_region)) if noise_region.size else None
+    return ImageStats(hist, mean_intensity, gray_min, gray_max, channel_means, None, noise_std)
+
+
+def banded_laplacian_integral(gray_img: np.ndarray, bands: int) -> LaplacianIntegral:
+    """
+    LaplacianIntegral built band by band. Each band's Laplacian is computed with one halo
+    row on each side, so its rows match the full-frame filter (image borders are only
+    reflected at the true top and bottom). Each band's summed-area tables are then
+    shifted by the totals of the bands above. The 3x3 Laplacian of 8-bit pixels and its
+    square are integers, and their sums stay far below 2**53, so every float64 addition
+    is exact and the tables equal the serial ones regardless of summation order.
+    """
+    h, w = gray_img.shape[:2]
+    ranges = band_ranges(h, w, bands)
+    if len(ranges) == 1:
+        return LaplacianIntegral(gray_img)
+
+    def band_tables(y0, y1):
+        top, bottom = max(0, y0 - 1), min(h, y1 + 1)
+        laplacian = cv2.Laplacian(gray_img[top:bottom], cv2.CV_64F)[y0 - top:y0 - top + (y1 - y0)]
+        return cv2.integral2(laplacian, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+    tables = _map_bands(band_tables, ranges)
+    total_sum = np.empty((h + 1, w + 1), dtype=np.float64)
+    total_sqsum = np.empty((h + 1, w + 1), dtype=np.float64)
+    total_sum[0] = total_sqsum[0] = 0.0
+    offsets = []
+    running_sum = np.zeros(w + 1)
+    running_sqsum = np.zeros(w + 1)
+    for band_sum, band_sqsum in tables:
+        offsets.append((running_sum, running_sqsum))
+        running_sum = running_sum + band_sum[-1]
+        running_sqsum = running_sqsum + band_sqsum[-1]
+
+    def shift(index):
+        (y0, y1), (band_sum, band_sqsum), (offset_sum, offset_sqsum) = ranges[index], tables[index], offsets[index]
+        np.add(band_sum[1:], offset_sum, out=total_sum[y0 + 1:y1 + 1])
+        np.add(band_sqsum[1:], offset_sqsum, out=total_sqsum[y0 + 1:y1 + 1])
+
+    list(_band_executor().map(shift, range(len(ranges))))
+    return LaplacianIntegral.from_tables(total_sum, total_sqsum)
@@ -0,0 +1,474 @@
+"""Folder and burst processing: scores every image of a folder and streams JSON lines."""
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from functools import partial
+
+import cv2
+
+from . import timing
+from .annotate import AnnotationTarget, AnnotationWriter, annotate_now
+from .cache import ResultCache
+from .config import configure, get_config
+from .evaluate import _evaluate_encoded, _evaluate_path, _read_image_bytes, select_best_frames
+from .export import CopyWriter
+from .features import FeatureStore, load_feature_store, rejudge, rejudged_result
+from .journal import ScanJournal
+from .phash import DUP_DISTANCE, PhashIndex, attach_near_duplicates
+from .pipeline import FileMover, QueueDepths, iter_pipelined_results
+from .timing import Deadline, StageTimer, TimingStats
+
+logger = logging.getLogger(__name__)
+
+
+# --- File Processing Function ---
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# Subfolders process_folder writes into; never scanned as input.
+OUTPUT_DIRS = ("good_photos", "fair_photos", "bad_photos", "focus_bbox")
+
+
+def _scan_image_files(folder_path: str, recursive: bool = False) -> Iterator[str]:
+    """
+    Yields the paths of the images in a folder as the directory is read (os.scandir),
+    without building the full list. With `recursive=True`, subdirectories are walked
+    depth-first, one open directory per level; the top-level OUTPUT_DIRS are skipped.
+    """
+    stack = [folder_path]
+    while stack:
+        directory = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        if entry.is_file():
+                            yield entry.path
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        if directory == folder_path and entry.name in OUTPUT_DIRS:
+                            continue
+                        subdirs.append(entry.path)
+        except OSError as e:
+            logger.warning(f"Skipping directory {directory}: {e}")
+            continue
+        stack.extend(sorted(subdirs, reverse=True))
+
+
+def _init_pool_worker(config_path: str | None = None, reset_peak_rss: bool = False):
+    """
+    Pool initializer: load the parent's config.ini, take over its timing.RESET_PEAK_RSS and
+    keep OpenCV single-threaded so pooled workers don't oversubscribe cores.
+    """
+    configure(config_path)
+    timing.RESET_PEAK_RSS = reset_peak_rss
+    cv2.setNumThreads(1)
+
+
+def _score_in_worker(source: str | bytes, image_path: str, annotation: AnnotationTarget | None = None,
+                     focus_map: bool = False, preview_scale: int = 1, timings: bool = False,
+                     cascade: bool = False, raw_features: bool = False,
+                     deadline_ms: float | None = None, bands: int = 1,
+                     low_memory: bool = False, phash: bool = False) -> tuple[dict, str | None]:
+    """
+    Pool task: scores a file path or its encoded bytes and, with an `annotation` target,
+    writes the annotated image from the frame decoded for scoring.
+    Returns (result, annotated image path or None); results that get no annotation (see
+    AnnotationTarget.wants) are not counted by the parent.
+    """
+    timer = StageTimer(timings)
+    deadline = Deadline(deadline_ms)
+    if isinstance(source, str):
+        result, img = _evaluate_path(source, focus_map, preview_scale, None, timer, cascade, raw_features, deadline,
+                                     bands, low_memory, phash)
+    else:
+        result, img = _evaluate_encoded(source, focus_map, preview_scale, None, timer, cascade, raw_features,
+                                        deadline, bands, low_memory, phash)
+    annotated_path = None
+    if annotation is not None:
+        annotated_path = annotate_now(annotation, image_path, result, img, preview_scale)
+    return result, annotated_path
+
+
+def _iter_batch_results(image_paths: Iterable[str], workers: int, cache: ResultCache | None = None,
+                        max_in_flight: int | None = None, annotator: AnnotationWriter | None = None,
+                        **options):
+    """
+    Yields (image_path, result, error) for every image as soon as it has been scored.
+
+    With more than one worker the images are scored by a process pool and yielded in
+    completion order; otherwise they are scored in-process, in order. `image_paths` is
+    consumed lazily: at most `max_in_flight` images (default: 2 x workers) are submitted
+    and not yet yielded at any time, so memory stays flat on very large folders.
+    Per-file failures are reported through `error` and never abort the batch. `options`
+    are passed through to evaluate_photo_quality.
+
+    With an `annotator`, annotated images are drawn from the frames decoded for scoring:
+    pool workers write their own, in-process results go to the annotator's writer pool.
+
+    With a `cache`, lookups happen in this process: cached images are yielded without
+    being submitted, and misses are sent to the pool as bytes (read once, here).
+    """
+    focus_map, preview_scale = options.get("focus_map", False), options.get("preview_scale", 1)
+    if workers <= 1:
+        for image_path in image_paths:
+            try:
+                result, img = _evaluate_path(image_path, focus_map, preview_scale, cache,
+                                             StageTimer(options.get("timings", False)), options.get("cascade", False),
+                                             options.get("raw_features", False), Deadline(options.get("deadline_ms")),
+                                             options.get("bands", 1), options.get("low_memory", False),
+                                             options.get("phash", False))
+                if annotator is not None:
+                    annotator.submit(image_path, result, img, preview_scale)
+            except Exception as e:
+                yield image_path, None, e
+                continue
+            yield image_path, result, None
+        return
+
+    annotation = annotator.target if annotator is not None else None
+
+    max_in_flight = max(1, max_in_flight or 2 * workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                             initargs=(get_config().path, timing.RESET_PEAK_RSS)) as executor:
+        futures = {}
+
+        def collect(future):
+            image_path, cache_key = futures.pop(future)
+            try:
+                result, annotated_path = future.result()
+            except Exception as e:
+                return image_path, None, e
+            if annotator is not None and annotator.target.wants(result):
+                annotator.record(annotated_path)
+            if cache_key is not None:
+                cache.put(cache_key, result)
+            return image_path, result, None
+
+        for image_path in image_paths:
+            if len(futures) >= max_in_flight:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield collect(future)
+            if cache is None:
+                futures[executor.submit(partial(_score_in_worker, **options), image_path, image_path,
+                                        annotation)] = (image_path, None)
+                continue
+            timer = StageTimer(options.get("timings", False))
+            try:
+                with timer.stage("read"):
+                    buf = _read_image_bytes(image_path)
+            except ValueError as e:
+                yield image_path, None, e
+                continue
+            with timer.stage("cache_lookup"):
+                cache_key = cache.key(buf, **options)
+                cached = cache.get(cache_key)
+            if cached is not None:
+                if timer.enabled:
+                    cached["timings"] = timer.report()
+                if annotator is not None:
+                    annotator.submit(image_path, cached, None)
+                yield image_path, cached, None
+                continue
+            futures[executor.submit(partial(_score_in_worker, **options), buf, image_path,
+                                    annotation)] = (image_path, cache_key)
+
+        for future in as_completed(list(futures)):
+            yield collect(future)
+
+
+def process_folder(folder_path: str, verbose: bool, move_files: bool, image_verbose: bool,
+                   workers: int | None = None, focus_map: bool = False, preview_scale: int = 1,
+                   cache: ResultCache | None = None, timings: bool = False, cascade: bool = False,
+                   recursive: bool = False, journal_path: str | None = None,
+                   max_in_flight: int | None = None, copy_out: str | None = None,
+                   copy_format: str = "csv", readers: int = 0, annotation_max_side: int | None = None,
+                   feature_store: str | None = None, deadline_ms: float | None = None, bands: int = 1,
+                   phash_index: str | None = None, dup_distance: int = DUP_DISTANCE,
+                   low_memory: bool = False) -> int:
+    """
+    Process all images in a folder and print quality evaluation results to the terminal.
+    Optionally moves files to 'good', 'fair', or 'bad' subdirectories based on judgement.
+
+    Images are scored in parallel by `workers` processes (default: number of CPU cores).
+    One JSON line is streamed to stdout per image as it completes:
+    {"file": ..., "ok": true, "result": {...}} or {"file": ..., "ok": false, "error": ...}.
+    "file" is the path relative to `folder_path`. With `timings=True` each result carries
+    per-stage "timings" (including "annotation"), and a percentile table over the whole
+    batch is logged at the end.
+
+    The folder is scanned lazily (see _scan_image_files; `recursive=True` includes
+    subfolders, whose layout is kept under the output folders) and at most
+    `max_in_flight` images are in the pool at once. With a `journal_path`, finished
+    files are checkpointed in a ScanJournal and skipped when the run is repeated.
+    With `copy_out`, every result is also written as one row of a COPY-ready file
+    (see CopyWriter); a resumed run appends to it after the rows the journal committed.
+
+    With `feature_store`, the raw measurements behind every result are saved to that
+    .npz file (see FeatureStore), with their perceptual hashes, instead of being printed,
+    so the run can later be re-judged under a different config.ini without rescoring
+    (see features.rejudge).
+    A resumed run extends the store and rescores journaled files that are missing from it.
+
+    With `phash_index`, each result gets its "phash" and "near_duplicates": the images
+    already in that PhashIndex whose perceptual hash is within `dup_distance` bits, listed
+    by their indexed path. The image is then added to the index, so the index grows across runs
+    and folders. A resumed run rescores journaled files that are missing from it.
+
+    With `deadline_ms`, each image is scored within that budget where possible, from the
+    moment it is read (see evaluate_photo_quality). `bands` > 1 splits each frame over
+    that many threads (see bands.py); it suits few workers and very large images.
+    `low_memory` streams the Laplacian instead of holding full-frame tables (same scores,
+    lower peak memory per worker) and adds each image's peak RSS to its result under
+    "memory"; the end of the run logs the largest one.
+
+    With `readers` > 0 the batch is scored in this process by a threaded pipeline
+    instead of a process pool: `readers` threads decode ahead into a queue of
+    `max_in_flight` frames while `workers` threads score, and --move runs on a separate
+    I/O thread (see pipeline.py). Queue depths are logged at the end.
+
+    With `image_verbose`, annotated images are drawn from the frames decoded for scoring
+    (as thumbnails of at most `annotation_max_side` pixels, if given) and written by a
+    background writer pool (see AnnotationWriter).
+    Returns the number of images processed successfully. Raises FileNotFoundError if
+    `folder_path` is not a directory and ValueError if it holds no images.
+    """
+    if not os.path.isdir(folder_path):
+        raise FileNotFoundError(f"The directory '{folder_path}' was not found.")
+
+    # No external model required; proceed directly.
+    logger.info(f"Processing images in folder: {folder_path}")
+
+    # Define paths for sorted images
+    good_dir = os.path.join(folder_path, "good_photos")
+    fair_dir = os.path.join(folder_path, "fair_photos")
+    bad_dir = os.path.join(folder_path, "bad_photos")
+
+    if move_files:
+        os.makedirs(good_dir, exist_ok=True)
+        os.makedirs(fair_dir, exist_ok=True)
+        os.makedirs(bad_dir, exist_ok=True)
+        logger.info(f"Good photos will be moved to: {good_dir}")
+        logger.info(f"Fair photos will be moved to: {fair_dir}")
+        logger.info(f"Bad photos (Poor/Very Poor) will be moved to: {bad_dir}")
+
+    # If image_verbose is requested, prepare a subfolder to store annotated bbox images
+    bbox_dir = None
+    if image_verbose:
+        bbox_dir = os.path.join(folder_path, "focus_bbox")
+        os.makedirs(bbox_dir, exist_ok=True)
+        logger.info(f"Annotated focus bbox images will be saved to: {bbox_dir}")
+
+    processed_count = 0
+    found_count = 0
+    peak_memory = None  # Largest per-image "memory" report of a low_memory run
+    timing_stats = TimingStats() if timings else None
+    options = {"focus_map": focus_map, "preview_scale": preview_scale, "timings": timings, "cascade": cascade}
+    if feature_store:
+        options["raw_features"] = True
+    if deadline_ms is not None:
+        options["deadline_ms"] = deadline_ms
+    if bands > 1:
+        options["bands"] = bands
+    if low_memory:
+        options["low_memory"] = True
+    if feature_store or phash_index:
+        options["phash"] = True  # Hashes are only computed for the outputs that keep them
+    journal = ScanJournal(journal_path, **options) if journal_path else None
+    resuming = journal is not None and journal.finished > 0
+    if resuming:
+        logger.info(f"Resuming from {journal_path}: {journal.finished} image(s) already scored")
+    copy_writer = None
+    if copy_out:
+        # Where the copy file stood at the journal's last commit, if it is the same file
+        copy_note = json.loads(journal.noted("copy_out") or "null") if resuming else None
+        append_at = copy_note["bytes"] if copy_note and copy_note["path"] == os.path.abspath(copy_out) else None
+        copy_writer = CopyWriter(copy_out, copy_format, append=resuming, append_at=append_at)
+    store = FeatureStore(feature_store, append=resuming) if feature_store else None
+    index = PhashIndex(phash_index) if phash_index else None
+    if journal is not None:
+        def before_commit():
+            if copy_writer is not None:
+                journal.note("copy_out", json.dumps({"path": os.path.abspath(copy_out),
+                                                     "bytes": copy_writer.size()}))
+            if store is not None:
+                store.checkpoint()
+            if index is not None:
+                index.commit()
+        journal.before_commit = before_commit
+
+    # Journaled files are only skipped if their outputs survived the interruption
+    outputs = [output.__contains__ for output in (store, index) if output is not None]
+
+    def kept(image_path):
+        return all(contains(image_path) for contains in outputs)
+
+    def image_paths():
+        nonlocal found_count
+        for image_path in _scan_image_files(folder_path, recursive):
+            found_count += 1
+            if journal is None or journal.begin(image_path, require=kept if outputs else None):
+                yield image_path
+
+    workers = workers or os.cpu_count() or 1
+    annotator = None
+    if image_verbose:
+        annotator = AnnotationWriter(AnnotationTarget(bbox_dir, folder_path, annotation_max_side))
+    depths = mover = None
+    if readers > 0:
+        logger.info(f"Scoring images with {readers} reader thread(s) and {workers} compute thread(s)")
+        depths = QueueDepths()
+        mover = FileMover(depths) if move_files else None
+        batch_results = iter_pipelined_results(image_paths(), readers, workers, cache, max_in_flight, depths,
+                                               annotator, **options)
+    else:
+        logger.info(f"Scoring images with {workers} worker(s)")
+        batch_results = _iter_batch_results(image_paths(), workers, cache, max_in_flight, annotator, **options)
+
+    for image_path, result, error in batch_results:
+        filename = os.path.relpath(image_path, folder_path)
+        if error is not None:
+            if journal is not None:
+                journal.forget(image_path)
+            if isinstance(error, ValueError):  # Catch specific error from imread
+                logger.warning(f"Skipping {filename}: {error}")
+            else:
+                logger.error(f"Error processing {filename}: {error}", exc_info=error)
+            print(json.dumps({"file": filename, "ok": False, "error": str(error)}), flush=True)
+            continue
+
+        if timing_stats is not None:
+            timing_stats.add(result["timings"])
+        memory = result.get("memory")
+        if memory is not None and memory["peak_rss_mb"] is not None and \
+                (peak_memory is None or memory["peak_rss_mb"] > peak_memory["peak_rss_mb"]):
+            peak_memory = memory
+        if store is not None:
+            store.add(image_path, result.pop("raw_features"))
+        if index is not None:
+            attach_near_duplicates(result, index, image_path, dup_distance)
+
+        print(json.dumps({"file": filename, "ok": True, "result": result}), flush=True)
+        processed_count += 1
+        if copy_writer is not None:
+            copy_writer.add(image_path, result)
+        if journal is not None:
+            journal.record(image_path, result)
+
+        # Conditional logging based on verbosity for individual results
+        if verbose:
+            logger.info(f"--- Results for {filename} ---\n{json.dumps(result, indent=2)}")
+        else:  # Not verbose, provide a summary regardless of move_files
+            logger.info(
+                f"Processed: {filename} - Judgement: {result['judgement']} (Confidence: {result['overall_confidence']:.2f}) - Summary: {result['judgement_description']}")
+
+        if move_files:
+            try:
+                if result['judgement'] in ["Excellent", "Good"]:
+                    destination_folder = good_dir
+                elif result['judgement'] == "Fair":
+                    destination_folder = fair_dir
+                else:  # Poor, Very Poor
+                    destination_folder = bad_dir
+
+                destination_path = os.path.join(
+                    destination_folder, filename)  # Ensure filename is used, not image_path
+                if mover is not None:
+                    mover.submit(image_path, destination_path)
+                    continue
+                os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+                shutil.move(image_path, destination_path)
+                logger.debug(f"Moved {filename} to {destination_folder}")
+            except OSError as e:
+                logger.error(f"Failed to move {filename}: {e}")
+
+    if annotator is not None:
+        annotator.close()
+        logger.info(f"Annotated images: {annotator.written} written, {annotator.failed} failed")
+    if mover is not None:
+        mover.close()
+    if depths is not None:
+        logger.info(f"Pipeline queue depths:\n{depths.format()}")
+    if journal is not None:
+        logger.info(f"Journal {journal_path}: {journal.recorded} image(s) recorded, {journal.skipped} skipped as already scored")
+        journal.close()
+    if copy_writer is not None:
+        copy_writer.close()
+        logger.info(f"Wrote {copy_writer.rows} row(s) to {copy_out} ({copy_format}, COPY-ready)")
+    if store is not None:
+        store.save()
+        logger.info(f"Saved raw measurements of {len(store)} image(s) to {feature_store}")
+    if index is not None:
+        logger.info(f"Near-duplicate index {phash_index}: {len(index)} image(s)")
+        index.close()
+    if found_count == 0:
+        raise ValueError(f"No image files found in {folder_path}.")
+    if processed_count == 0:
+        logger.info(
+            f"No image files were processed in {folder_path} (after filtering).")
+    if cache is not None:
+        logger.info(f"Result cache: {cache.stats()}")
+    if peak_memory is not None:
+        logger.info(f"Largest per-image peak RSS: {peak_memory['peak_rss_mb']:.1f} MB ({peak_memory['source']})")
+    if timing_stats is not None and processed_count:
+        logger.info(f"Stage timings over {processed_count} image(s):\n{timing_stats.format()}")
+    return processed_count
+
+
+def process_burst(folder_path: str, top_k: int | None = None, focus_map: bool = False,
+                  preview_scale: int = 1) -> dict:
+    """
+    Treats the images of a folder (in file name order) as one burst and prints the
+    select_best_frames ranking as JSON, with a "file" name on every entry. Raises
+    ValueError if the folder holds no images.
+    """
+    image_files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(IMAGE_EXTENSIONS))
+    if not image_files:
+        raise ValueError(f"No image files found directly in {folder_path}.")
+    logger.info(f"Selecting the best of {len(image_files)} burst frames in {folder_path}")
+    selection = select_best_frames([os.path.join(folder_path, f) for f in image_files], top_k=top_k,
+                                   focus_map=focus_map, preview_scale=preview_scale)
+    for entry in selection["ranking"] + selection["pruned"]:
+        entry["file"] = image_files[entry["index"]]
+    print(json.dumps(selection), flush=True)
+    best = selection["ranking"][0]
+    logger.info(f"Best frame: {best['file']} - Judgement: {best['judgement']} (Confidence: {best['overall_confidence']:.2f}); "
+                f"{len(selection['pruned'])} pruned, {selection['saliency_passes']} saliency pass(es)")
+    return selection
+
+
+def rejudge_store(store_path: str, copy_out: str | None = None, copy_format: str = "csv") -> int:
+    """
+    Re-judges every image of a feature store under the current config.ini and streams
+    JSON lines like process_folder ("file" is the stored path), optionally writing COPY
+    rows as well. Images that cascade mode rejected early or that were degraded to meet
+    a deadline lack full measurements and are reported with "ok": false so they can be
+    rescored. Returns the number re-judged.
+    """
+    start = time.perf_counter()
+    columns = load_feature_store(store_path)
+    judged = rejudge(columns)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    logger.info(f"Re-judged {len(columns['path'])} image(s) from {store_path} in {elapsed_ms:.1f} ms")
+
+    copy_writer = CopyWriter(copy_out, copy_format) if copy_out else None
+    rejudged = 0
+    for i, image_path in enumerate(columns["path"].tolist()):
+        if not columns["complete"][i]:
+            degraded = "degraded" in columns and columns["degraded"][i]
+            reason = "Deadline exceeded" if degraded else "Rejected early by cascade mode"
+            print(json.dumps({"file": image_path, "ok": False, "error": f"{reason}; rescore to re-judge."}))
+            continue
+        result = rejudged_result(columns, judged, i)
+        print(json.dumps({"file": image_path, "ok": True, "result": result}))
+        if copy_writer is not None:
+            copy_writer.add(image_path, result)
+        rejudged += 1
+    if copy_writer is not None:
+        copy_writer.close()
+        logger.info(f"Wrote {copy_writer.rows} row(s) to {copy_out} ({copy_format}, COPY-ready)")
+    return rejudged
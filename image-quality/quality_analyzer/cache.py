@@ -0,0 +1,139 @@
+"""Content-addressed cache of evaluation results (in-process LRU plus optional SQLite tier)."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .config import get_config
+
+# Bump when a change to the scoring code alters results, so stale cache entries are ignored.
+CACHE_SCHEMA_VERSION = 1
+
+
+class ResultCache:
+    """
+    Content-addressed cache of evaluation results.
+
+    Keys hash the encoded image bytes together with the config.ini fingerprint and the
+    evaluation options, so re-uploads of the same frame hit while any config change
+    misses. Lookups go through an in-process LRU tier first and then an optional on-disk
+    SQLite tier, which evicts least-recently-used rows beyond `disk_max_entries`.
+    Hit/miss counters are available from stats(). Safe to share between threads.
+    """
+
+    def __init__(self, memory_entries: int | None = None, disk_path: str | None = None,
+                 disk_max_entries: int | None = None):
+        config = get_config()
+        self.memory_entries = config.cache_memory_entries if memory_entries is None else memory_entries
+        self.disk_max_entries = config.cache_disk_max_entries if disk_max_entries is None else disk_max_entries
+        self.disk_path = disk_path
+        self.memory_hits = self.disk_hits = self.misses = 0
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._config_fingerprint = config.fingerprint
+        self._db = None
+        self._disk_count = 0
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL, last_access REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def key(self, buf: bytes | bytearray | memoryview, **options) -> str:
+        """
+        Cache key for an encoded image and the evaluation options used to score it.
+        "timings", "bands" and "low_memory" do not change the scores, so they are left out
+        of the key; "raw_features" and "phash" only count when set, so keys of plain
+        results are unchanged. "deadline_ms" is left out too: only results that were not degraded are
+        stored (see put), and those satisfy any deadline.
+        """
+        options.pop("timings", None)
+        options.pop("bands", None)
+        options.pop("low_memory", None)
+        options.pop("deadline_ms", None)
+        for name in ("raw_features", "phash"):
+            if not options.get(name):
+                options.pop(name, None)
+        digest = hashlib.sha256(buf)
+        digest.update(f"|{CACHE_SCHEMA_VERSION}|{self._config_fingerprint}|".encode())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        """Returns a fresh copy of the cached result, or None on a miss."""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(payload)
+            if self._db is not None:
+                row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: dict):
+        """
+        Stores a result in both tiers, evicting the least recently used entries if full.
+        Per-run "timings", "deadline" and "memory" reports are not stored, and results that skipped
+        or approximated metrics to meet a deadline are not stored at all.
+        """
+        deadline = result.get("deadline")
+        if deadline is not None and (deadline["skipped"] or deadline["approximated"]):
+            return
+        if "timings" in result or "memory" in result or deadline is not None:
+            result = {k: v for k, v in result.items() if k not in ("timings", "deadline", "memory")}
+        payload = json.dumps(result)
+        with self._lock:
+            self._remember(key, payload)
+            if self._db is None:
+                return
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO results (key, result, last_access) VALUES (?, ?, ?)",
+                (key, payload, time.time())).rowcount
+            self._disk_count += inserted
+            if self._disk_count > self.disk_max_entries:
+                # Evict in chunks so a full cache doesn't pay for a DELETE on every insert
+                excess = self._disk_count - self.disk_max_entries + max(1, self.disk_max_entries // 20)
+                self._db.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access LIMIT ?)",
+                    (excess,))
+                self._disk_count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            self._db.commit()
+
+    def _remember(self, key: str, payload: str):
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current tier sizes."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count,
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,358 @@
+"""Command-line interface (python -m quality_analyzer, or analyzer_v1.py)."""
+import argparse
+import json
+import logging
+import os
+import sys
+from contextlib import nullcontext
+
+from .config import CONFIG_ENV_VAR, SUPPORTED_PREVIEW_SCALES, ConfigError, configure, get_config
+
+logger = logging.getLogger(__name__)
+
+
+# --- Main Execution ---
+
+def main():
+    """
+    Parses command-line arguments, initializes the model, and starts image processing.
+    """
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(
+        description="Analyze photo quality in a folder (fast heuristic, no object detector required).")
+    parser.add_argument(
+        "--folder_path",
+        type=str,
+        # default = '/Users/kosek/Downloads/ISIC-images',
+        default = '',
+        help="Path to the folder containing images to analyze (required unless --serve or --stdin is used)."
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print the full JSON output for each image."
+    )
+    parser.add_argument(
+        "--image_verbose",
+        action="store_true",
+        help="Save annotated images with focus bounding boxes when processing."
+    )
+    parser.add_argument(
+        "--annotation_max_side",
+        type=int,
+        default=None,
+        metavar="PX",
+        help="With --image_verbose, save annotated thumbnails with this longer side instead of full-size copies."
+    )
+    parser.add_argument(
+        "--move",
+        action="store_true",
+        help="Move photos to 'good_photos', 'fair_photos', or 'bad_photos' subfolders based on judgement."
+    )
+    parser.add_argument(
+        "--focus_map",
+        action="store_true",
+        help="Add a dense focus map (tile heatmap and top-k sharpest regions) to each result."
+    )
+    parser.add_argument(
+        "--preview_scale",
+        type=int,
+        choices=SUPPORTED_PREVIEW_SCALES,
+        default=1,
+        help="Decode at 1/2, 1/4 or 1/8 size for a fast preview verdict (default: 1, full resolution)."
+    )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help="Stop scoring an image as soon as it can no longer reach a Fair judgement."
+    )
+    parser.add_argument(
+        "--burst",
+        action="store_true",
+        help="Treat the folder as one burst and print its frames ranked by quality (see --top_k)."
+    )
+    parser.add_argument(
+        "--top_k",
+        type=int,
+        default=None,
+        help="Number of burst frames returned with full results (default: top_k in [Burst] of config.ini)."
+    )
+    parser.add_argument(
+        "--calibrate_preview",
+        type=str,
+        default=None,
+        metavar="FOLDER",
+        help="Print [PreviewCalibration] factors derived from the full-size images in FOLDER."
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse results for identical image bytes and config via an in-process LRU cache."
+    )
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        default=None,
+        help="SQLite file for a persistent on-disk result cache (implies --cache)."
+    )
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Read one encoded image (PNG/JPEG bytes) from stdin and print its JSON result."
+    )
+    parser.add_argument(
+        "--pixels_file",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Memory-map FILE holding one raw frame (see --pixel_format) and print its JSON result."
+    )
+    parser.add_argument(
+        "--pixel_format",
+        choices=("rgba", "bgra", "rgb", "bgr"),
+        default=None,
+        help="Raw frame layout for --pixels_file, or for --stdin to read raw pixels instead of PNG/JPEG bytes."
+    )
+    parser.add_argument("--width", type=int, default=None, help="Raw frame width in pixels.")
+    parser.add_argument("--height", type=int, default=None, help="Raw frame height in pixels.")
+    parser.add_argument("--stride", type=int, default=None,
+                        help="Bytes between raw frame rows (default: width x channels).")
+    parser.add_argument("--offset", type=int, default=0, help="Byte offset of the raw frame in --pixels_file.")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a persistent worker reading newline-delimited JSON requests from stdin."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: CPU cores for folders, 1 for --serve)."
+    )
+    parser.add_argument(
+        "--max_in_flight",
+        type=int,
+        default=None,
+        help="Maximum number of requests (--serve) or images (folders) queued or running at once (default: 2 x workers)."
+    )
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=0,
+        help="Pipelined folder mode: N threads decode ahead while --workers threads score in this process "
+             "(default: 0, process pool)."
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also score images in subfolders of --folder_path."
+    )
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default=None,
+        help="SQLite checkpoint of scored files; rerunning with the same journal skips finished images."
+    )
+    parser.add_argument(
+        "--copy_out",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Also write one row per image (path, metric confidences, overall, judgement) for PostgreSQL COPY."
+    )
+    parser.add_argument(
+        "--copy_format",
+        choices=("csv", "tsv"),
+        default="csv",
+        help="Format of --copy_out: csv (FORMAT csv) or tsv (FORMAT text); both with a header row (default: csv)."
+    )
+    parser.add_argument(
+        "--deadline_ms",
+        type=float,
+        default=None,
+        help="Per-image time budget (ms): slow stages are approximated or skipped to meet it, "
+             "and the result lists which. Best effort: stages are picked from predicted costs "
+             "and not interrupted, so results can arrive late (30-40 ms budgets have taken 38-96 ms)."
+    )
+    parser.add_argument(
+        "--bands",
+        type=int,
+        default=1,
+        help="Split each large frame into N horizontal bands scored in parallel threads; "
+             "same scores, lower single-image latency (default: 1)."
+    )
+    parser.add_argument(
+        "--low_memory",
+        action="store_true",
+        help="Stream the Laplacian over row bands instead of full-frame float64 tables (same scores, "
+             "lower peak memory) and report each image's peak RSS under 'memory'."
+    )
+    parser.add_argument(
+        "--feature_store",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Save the raw measurements of every scored image to this .npz, for --rejudge."
+    )
+    parser.add_argument(
+        "--rejudge",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Re-judge a --feature_store file under the current config without rescoring (honours --copy_out)."
+    )
+    parser.add_argument(
+        "--phash_index",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="SQLite index of perceptual hashes: add 'near_duplicates' to each result and index "
+             "the scored images (folder and --serve modes; --stdin only looks up)."
+    )
+    parser.add_argument(
+        "--dup_distance",
+        type=int,
+        default=8,
+        help="Maximum Hamming distance (bits out of 64) for --phash_index matches (default: 8)."
+    )
+    parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help=f"Path to config.ini (default: ${CONFIG_ENV_VAR}, else ./image-quality/config.ini)."
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Add per-stage timings (ms) to each result and log a percentile report at the end."
+    )
+    args = parser.parse_args()
+
+    # Heavy dependencies are imported only once there is work to do, so --help and
+    # argument errors return without loading OpenCV/NumPy.
+    try:
+        from . import timing
+        from .batch import process_burst, process_folder, rejudge_store
+        from .cache import ResultCache
+        from .evaluate import calibrate_preview, evaluate_photo_bytes, evaluate_photo_pixels
+        from .phash import PhashIndex, attach_near_duplicates
+        from .pixels import mapped_file
+        from .server import serve
+    except ImportError as e:
+        print(f"ImportError: {e}")
+        print("One or more required Python packages are not installed.")
+        print("Please install the necessary dependencies by running:")
+        print("pip install -r requirements.txt")
+        print("If you don't have 'requirements.txt', ensure you have opencv-python and numpy installed.")
+        exit(1)
+
+    configure(args.config)
+    try:
+        get_config()
+    except ConfigError as e:
+        logger.critical(str(e))
+        exit(1)
+    timing.RESET_PEAK_RSS = True  # This process is ours, so --low_memory peaks can be per image
+
+    cache = ResultCache(disk_path=args.cache_path) if args.cache or args.cache_path else None
+
+    if args.serve:
+        index = PhashIndex(args.phash_index) if args.phash_index else None
+        try:
+            serve(args.workers, args.max_in_flight, cache, timings=args.timings, phash_index=index)
+        finally:
+            if index is not None:
+                index.close()
+        return
+
+    if args.calibrate_preview:
+        factors = calibrate_preview(args.calibrate_preview)
+        print("[PreviewCalibration]")
+        for scale, (sharpness, focus_area, noise) in factors.items():
+            print(f"sharpness_{scale} = {sharpness:.2f}")
+            print(f"focus_area_{scale} = {focus_area:.2f}")
+            print(f"noise_{scale} = {noise:.2f}")
+        return
+
+    if args.rejudge:
+        try:
+            rejudge_store(args.rejudge, args.copy_out, args.copy_format)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not re-judge {args.rejudge}: {e}")
+            exit(1)
+        return
+
+    if args.pixels_file or (args.stdin and args.pixel_format):
+        if args.width is None or args.height is None:
+            parser.error("Raw pixel input needs --width and --height.")
+        if args.preview_scale != 1:
+            parser.error("--preview_scale is not supported for raw pixel input.")
+        try:
+            source = mapped_file(args.pixels_file) if args.pixels_file else nullcontext(sys.stdin.buffer.read())
+            with source as pixels:
+                result = evaluate_photo_pixels(pixels, args.width, args.height, args.pixel_format or "rgba",
+                                               args.stride, args.offset, focus_map=args.focus_map, cache=cache,
+                                               timings=args.timings, cascade=args.cascade,
+                                               deadline_ms=args.deadline_ms, bands=args.bands,
+                                               low_memory=args.low_memory, phash=bool(args.phash_index))
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not evaluate raw pixels: {e}")
+            exit(1)
+        if args.phash_index:
+            index = PhashIndex(args.phash_index)
+            try:
+                attach_near_duplicates(result, index, max_distance=args.dup_distance)
+            finally:
+                index.close()
+        print(json.dumps(result))
+        return
+
+    if args.stdin:
+        try:
+            result = evaluate_photo_bytes(sys.stdin.buffer.read(), focus_map=args.focus_map,
+                                          preview_scale=args.preview_scale, cache=cache,
+                                          timings=args.timings, cascade=args.cascade,
+                                          deadline_ms=args.deadline_ms, bands=args.bands,
+                                          low_memory=args.low_memory, phash=bool(args.phash_index))
+        except ValueError as ve:
+            logger.error(f"Could not evaluate image from stdin: {ve}")
+            exit(1)
+        if args.phash_index:
+            index = PhashIndex(args.phash_index)
+            try:
+                attach_near_duplicates(result, index, max_distance=args.dup_distance)
+            finally:
+                index.close()
+        print(json.dumps(result))
+        return
+
+    if not args.folder_path:
+        parser.error("--folder_path is required unless --serve, --stdin or --rejudge is used.")
+
+    # Validate folder path
+    if not os.path.exists(args.folder_path):
+        logger.error(f"The directory '{args.folder_path}' was not found.")
+        exit(1)
+    if not os.path.isdir(args.folder_path):
+        logger.error(f"The path '{args.folder_path}' is not a directory.")
+        exit(1)
+
+    try:
+        if args.burst:
+            process_burst(args.folder_path, args.top_k, focus_map=args.focus_map, preview_scale=args.preview_scale)
+            return
+
+        # Start processing
+        process_folder(args.folder_path, args.verbose, args.move, args.image_verbose, args.workers,
+                       focus_map=args.focus_map, preview_scale=args.preview_scale, cache=cache,
+                       timings=args.timings, cascade=args.cascade, recursive=args.recursive,
+                       journal_path=args.journal, max_in_flight=args.max_in_flight,
+                       copy_out=args.copy_out, copy_format=args.copy_format, readers=args.readers,
+                       annotation_max_side=args.annotation_max_side, feature_store=args.feature_store,
+                       deadline_ms=args.deadline_ms, bands=args.bands, phash_index=args.phash_index,
+                       dup_distance=args.dup_distance, low_memory=args.low_memory)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(str(e))
+        exit(1)
+
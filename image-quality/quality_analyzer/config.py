@@ -0,0 +1,155 @@
+"""Analyzer settings from config.ini, loaded lazily on first use (standard library only)."""
+import configparser
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+# Environment variable naming the config.ini to use when no explicit path is configured.
+CONFIG_ENV_VAR = "ANALYZER_CONFIG"
+# Historical location, relative to the working directory (the web app runs from the repo root).
+LEGACY_CONFIG_PATH = './image-quality/config.ini'
+# The config.ini shipped next to this package.
+PACKAGE_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.ini")
+
+# Decode reductions supported by the preview mode (1 = full resolution).
+PREVIEW_SCALES = (2, 4, 8)
+SUPPORTED_PREVIEW_SCALES = (1,) + PREVIEW_SCALES
+
+
+class ConfigError(Exception):
+    """Raised when config.ini is missing or holds invalid values."""
+
+
+@dataclass(frozen=True)
+class AnalyzerConfig:
+    """Every value the analyzer reads from config.ini, parsed once."""
+    path: str
+    fingerprint: str                    # short hash of every loaded value, for cache keys
+
+    sharpness_normalization: float
+    focus_area_normalization: float
+    noise_normalization: float
+
+    exposure_ideal_mean: float
+    dynamic_range_max: float
+    overall_tech_weight: float
+    overall_other_weight: float
+
+    judgement_excellent: float
+    judgement_good: float
+    judgement_fair: float
+    judgement_poor: float
+
+    # Preview mode: normalization factors calibrated for images decoded at 1/2, 1/4 and 1/8
+    # size, so reduced-resolution scores line up with full-resolution ones.
+    # {scale: (sharpness, focus_area, noise)}, scale 1 being the full-resolution factors.
+    preview_normalization: dict[int, tuple[float, float, float]]
+
+    cache_memory_entries: int
+    cache_disk_max_entries: int
+
+    focus_map_grid: int
+    focus_map_window: int
+    focus_map_top_k: int
+    focus_map_warn_ms: float
+
+    burst_top_k: int
+    burst_prune_ratio: float
+    burst_similarity: float
+
+
+def load_config(path: str) -> AnalyzerConfig:
+    """Parses a config.ini file. Raises ConfigError if it is missing or invalid."""
+    if not os.path.exists(path):
+        raise ConfigError(f"Configuration file '{path}' not found. Please create it "
+                          f"(you can use the example provided in the README or documentation).")
+    config = configparser.ConfigParser()
+    try:
+        config.read(path)
+
+        sharpness = config.getfloat('NormalizationFactors', 'sharpness', fallback=1000.0)
+        focus_area = config.getfloat('NormalizationFactors', 'focus_area', fallback=1000.0)
+        noise = config.getfloat('NormalizationFactors', 'noise', fallback=50.0)
+        preview_normalization = {1: (sharpness, focus_area, noise)}
+        for scale in PREVIEW_SCALES:
+            preview_normalization[scale] = (
+                config.getfloat('PreviewCalibration', f'sharpness_{scale}', fallback=sharpness),
+                config.getfloat('PreviewCalibration', f'focus_area_{scale}', fallback=focus_area),
+                config.getfloat('PreviewCalibration', f'noise_{scale}', fallback=noise),
+            )
+
+        items = sorted((section, key, value) for section in config.sections()
+                       for key, value in config.items(section))
+        return AnalyzerConfig(
+            path=path,
+            fingerprint=hashlib.sha256(json.dumps(items).encode()).hexdigest()[:16],
+            sharpness_normalization=sharpness,
+            focus_area_normalization=focus_area,
+            noise_normalization=noise,
+            exposure_ideal_mean=config.getfloat('Thresholds', 'exposure_ideal_mean', fallback=128.0),
+            dynamic_range_max=config.getfloat('Thresholds', 'dynamic_range_max', fallback=255.0),
+            overall_tech_weight=config.getfloat('Weights', 'overall_tech', fallback=0.6),
+            overall_other_weight=config.getfloat('Weights', 'overall_other', fallback=0.4),
+            judgement_excellent=config.getfloat('JudgementLevels', 'excellent', fallback=0.9),
+            judgement_good=config.getfloat('JudgementLevels', 'good', fallback=0.7),
+            judgement_fair=config.getfloat('JudgementLevels', 'fair', fallback=0.5),
+            judgement_poor=config.getfloat('JudgementLevels', 'poor', fallback=0.3),
+            preview_normalization=preview_normalization,
+            cache_memory_entries=config.getint('Cache', 'memory_entries', fallback=256),
+            cache_disk_max_entries=config.getint('Cache', 'disk_max_entries', fallback=100000),
+            focus_map_grid=config.getint('FocusMap', 'grid', fallback=16),
+            focus_map_window=config.getint('FocusMap', 'window', fallback=2),
+            focus_map_top_k=config.getint('FocusMap', 'top_k', fallback=3),
+            # warn_ms was called budget_ms before it was clear nothing enforces it
+            focus_map_warn_ms=config.getfloat('FocusMap', 'warn_ms',
+                                              fallback=config.getfloat('FocusMap', 'budget_ms', fallback=50.0)),
+            burst_top_k=config.getint('Burst', 'top_k', fallback=1),
+            burst_prune_ratio=config.getfloat('Burst', 'prune_ratio', fallback=0.5),
+            burst_similarity=config.getfloat('Burst', 'similarity', fallback=2.0),
+        )
+    except (configparser.Error, ValueError) as e:
+        raise ConfigError(f"Error reading configuration file '{path}': {e}") from e
+
+
+_config: AnalyzerConfig | None = None
+_config_path: str | None = None
+_config_lock = threading.Lock()
+
+
+def configure(path: str | None = None):
+    """
+    Selects the config.ini used from now on (None restores the default lookup) and drops
+    the cached settings, so the next get_config() reads the file again.
+    """
+    global _config, _config_path
+    with _config_lock:
+        _config_path = path
+        _config = None
+
+
+def resolve_config_path() -> str:
+    """
+    The config.ini to load: the path given to configure(), else $ANALYZER_CONFIG, else
+    ./image-quality/config.ini relative to the working directory, else the file next to
+    this package.
+    """
+    explicit = _config_path or os.environ.get(CONFIG_ENV_VAR)
+    if explicit:
+        return explicit
+    if os.path.exists(LEGACY_CONFIG_PATH):
+        return LEGACY_CONFIG_PATH
+    return PACKAGE_CONFIG_PATH
+
+
+def get_config() -> AnalyzerConfig:
+    """Settings for the current process, loaded on first use and cached."""
+    global _config
+    config = _config
+    if config is None:
+        with _config_lock:
+            if _config is None:
+                _config = load_config(resolve_config_path())
+            config = _config
+    return config
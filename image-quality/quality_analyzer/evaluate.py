@@ -0,0 +1,742 @@
+"""
+Evaluation entry points: single images (path, bytes or decoded array), same-size
+batches, burst best-frame selection and preview calibration.
+"""
+import logging
+import os
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from .bands import banded_grayscale, banded_image_stats, banded_laplacian_integral
+from .cache import ResultCache
+from .config import PREVIEW_SCALES, get_config
+from .metrics import (ImageStats, LaplacianIntegral, SaliencyResult, StreamingLaplacian,
+                      _calculate_color_balance, _calculate_dynamic_range, _calculate_exposure, _calculate_focus_area,
+                      _calculate_focus_map, _calculate_noise, _calculate_saliency_batch,
+                      _calculate_saliency_result, _calculate_sharpness, _center_crop_box,
+                      _compute_batch_stats, _compute_image_stats, _focus_area_upper_bound,
+                      _generate_assessment_summary, _saliency_box, _spectral_residual)
+from .phash import perceptual_hash
+from .pixels import PIXEL_FORMATS, PixelLayout, frame_bytes, wrap_pixels
+from .timing import Deadline, PeakRss, StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+# --- Main Evaluation Function ---
+
+_IMREAD_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def _imread_flag(preview_scale: int) -> int:
+    """Maps a preview scale (1 = full resolution) to the matching cv2 decode flag."""
+    try:
+        return _IMREAD_FLAGS[preview_scale]
+    except KeyError:
+        raise ValueError(f"Unsupported preview scale {preview_scale}; use one of {sorted(_IMREAD_FLAGS)}.")
+
+
+def _decode(source: str | np.ndarray, preview_scale: int = 1) -> np.ndarray | None:
+    """
+    cv2.imread of a path, or cv2.imdecode of an encoded uint8 buffer, at `preview_scale`.
+
+    OpenCV's reduced decoders reject images smaller than the reduction for some formats
+    (PNG, where the size rounds down to 0; JPEG keeps 1 pixel). Those are decoded at full
+    size and reduced to at least one pixel here, so tiny images score at any scale.
+    """
+    read = cv2.imdecode if isinstance(source, np.ndarray) else cv2.imread
+    try:
+        return read(source, _imread_flag(preview_scale))
+    except cv2.error:
+        if preview_scale == 1:
+            raise
+    img = read(source, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    h, w = img.shape[:2]
+    return cv2.resize(img, (max(1, w // preview_scale), max(1, h // preview_scale)), interpolation=cv2.INTER_AREA)
+
+
+def evaluate_photo_quality(image_path: str, focus_map: bool = False, preview_scale: int = 1,
+                           cache: ResultCache | None = None, timings: bool = False,
+                           cascade: bool = False, raw_features: bool = False,
+                           deadline_ms: float | None = None, bands: int = 1, low_memory: bool = False,
+                           phash: bool = False) -> dict:
+    """
+    Orchestrates the evaluation of a photograph's quality by calling helper functions
+    for each metric and then summarizing the results.
+
+    With `focus_map=True` the result also carries a "Focus Map" entry (see _calculate_focus_map).
+    With `preview_scale` of 2, 4 or 8 the image is decoded at reduced size (JPEG decodes
+    natively at that size) and scored with the per-scale calibrated normalization factors;
+    bboxes are still reported in full-resolution coordinates.
+    With a `cache`, the file's bytes are hashed and a previously stored result is reused.
+    With `timings=True` the result carries a "timings" entry with the milliseconds spent
+    in each stage (decode, grayscale, every metric, summary) and in total.
+    With `cascade=True` the evaluation stops as soon as the image can no longer reach a
+    Fair judgement and a "rejected early" result is returned (see _evaluate_image).
+    With `raw_features=True` the result carries the unnormalized measurements behind the
+    scores in "raw_features" (see _raw_features), for the feature store and re-judging.
+    With `deadline_ms`, the evaluation (from reading the file on) aims to finish within
+    that many milliseconds: expensive stages are approximated or skipped when they are not
+    predicted to fit, and the result lists them under "deadline" (see _evaluate_image).
+    With `bands` > 1, the grayscale conversion, statistics and Laplacian of a large frame
+    are split over that many horizontal bands scored in parallel threads (see bands.py);
+    scores are identical to the serial path.
+    With `low_memory=True`, the Laplacian is streamed over row bands instead of kept as
+    full-frame float64 tables (see StreamingLaplacian), with identical scores, and the
+    result carries the process's peak RSS while scoring the image under "memory" (see PeakRss).
+    With `phash=True` the result carries "phash", the perceptual hash of the frame (see
+    perceptual_hash), e.g. for a near-duplicate index; it also goes into "raw_features".
+    """
+    deadline = Deadline(deadline_ms)
+    return _evaluate_path(image_path, focus_map, preview_scale, cache, StageTimer(timings), cascade,
+                          raw_features, deadline, bands, low_memory, phash)[0]
+
+
+def _evaluate_path(image_path: str, focus_map: bool, preview_scale: int, cache: ResultCache | None,
+                   timer: StageTimer, cascade: bool = False, raw_features: bool = False,
+                   deadline: Deadline | None = None, bands: int = 1,
+                   low_memory: bool = False, phash: bool = False) -> tuple[dict, np.ndarray | None]:
+    """
+    evaluate_photo_quality, also returning the decoded frame (None on a cache hit) so
+    callers such as annotation can reuse it instead of decoding the file again.
+    """
+    if cache is not None:
+        with timer.stage("read"):
+            buf = _read_image_bytes(image_path)
+        return _evaluate_encoded(buf, focus_map, preview_scale, cache, timer, cascade, raw_features, deadline,
+                                 bands, low_memory, phash)
+    memory = PeakRss() if low_memory else None
+    with timer.stage("decode"):
+        img = _decode(image_path, preview_scale)
+    if img is None:
+        raise ValueError(f"Failed to load image: {image_path}")
+    result = _evaluate_image(img, focus_map=focus_map, preview_scale=preview_scale, timer=timer,
+                             cascade=cascade, raw_features=raw_features, deadline=deadline, bands=bands,
+                             low_memory=low_memory, phash=phash)
+    if timer.enabled:
+        result["timings"] = timer.report()
+    if memory is not None:
+        result["memory"] = memory.report()
+    return result, img
+
+
+def _read_image_bytes(image_path: str) -> bytes:
+    """Reads an encoded image file, reporting failures the same way as a failed imread."""
+    try:
+        with open(image_path, "rb") as f:
+            return f.read()
+    except OSError:
+        raise ValueError(f"Failed to load image: {image_path}")
+
+
+def evaluate_photo_bytes(
+    buf: bytes | bytearray | memoryview, focus_map: bool = False, preview_scale: int = 1,
+    cache: ResultCache | None = None, timings: bool = False, cascade: bool = False,
+    raw_features: bool = False, deadline_ms: float | None = None, bands: int = 1, low_memory: bool = False,
+    phash: bool = False
+) -> dict:
+    """
+    Evaluates an encoded image (PNG/JPEG/...) held in memory, without touching disk.
+
+    The buffer is wrapped as a uint8 array without copying and decoded with cv2.imdecode.
+    With a `cache`, a stored result for the same bytes, config and options is returned
+    without decoding, and fresh results are stored.
+    `timings`, `cascade`, `raw_features`, `deadline_ms`, `bands`, `low_memory` and `phash`
+    work as in evaluate_photo_quality; cache hits report "cache_lookup".
+    """
+    deadline = Deadline(deadline_ms)
+    return _evaluate_encoded(buf, focus_map, preview_scale, cache, StageTimer(timings), cascade, raw_features,
+                             deadline, bands, low_memory, phash)[0]
+
+
+def _evaluate_encoded(buf: bytes | bytearray | memoryview, focus_map: bool, preview_scale: int,
+                      cache: ResultCache | None, timer: StageTimer, cascade: bool = False,
+                      raw_features: bool = False, deadline: Deadline | None = None,
+                      bands: int = 1, low_memory: bool = False,
+                      phash: bool = False) -> tuple[dict, np.ndarray | None]:
+    """Shared by the encoded-input entry points. Returns (result, decoded frame or None on a cache hit)."""
+    memory = PeakRss() if low_memory else None
+    data = np.frombuffer(memoryview(buf).cast("B"), dtype=np.uint8)
+    if data.size == 0:
+        raise ValueError("Empty image buffer.")
+    cache_key = None
+    if cache is not None:
+        with timer.stage("cache_lookup"):
+            cache_key = cache.key(data, focus_map=focus_map, preview_scale=preview_scale, cascade=cascade,
+                                  raw_features=raw_features, phash=phash)
+            result = cache.get(cache_key)
+        if result is not None:
+            if timer.enabled:
+                result["timings"] = timer.report()
+            if memory is not None:
+                result["memory"] = memory.report()
+            return result, None
+    with timer.stage("decode"):
+        img = _decode(data, preview_scale)
+    if img is None:
+        raise ValueError("Failed to decode image buffer.")
+    result = _evaluate_image(img, focus_map=focus_map, preview_scale=preview_scale, timer=timer,
+                             cascade=cascade, raw_features=raw_features, deadline=deadline, bands=bands,
+                             low_memory=low_memory, phash=phash)
+    if cache is not None:
+        cache.put(cache_key, result)
+    if timer.enabled:
+        result["timings"] = timer.report()
+    if memory is not None:
+        result["memory"] = memory.report()
+    return result, img
+
+
+def evaluate_photo_pixels(
+    pixels, width: int, height: int, pixel_format: str = "rgba", stride: int | None = None, offset: int = 0,
+    focus_map: bool = False, cache: ResultCache | None = None, timings: bool = False, cascade: bool = False,
+    raw_features: bool = False, deadline_ms: float | None = None, bands: int = 1, low_memory: bool = False,
+    phash: bool = False
+) -> dict:
+    """
+    Evaluates an uncompressed 8-bit frame, e.g. canvas ImageData, with no encode or decode.
+
+    `pixels` is any buffer (bytes, bytearray, memoryview, mmap, array) holding `height`
+    rows of `width` pixels in `pixel_format` ("rgba", "bgra", "rgb" or "bgr"), `stride`
+    bytes apart (default: packed) and starting at byte `offset`. The buffer is wrapped as a
+    NumPy view without copying and the metric stages read it directly; alpha is ignored,
+    as when a PNG with alpha is decoded. Scores equal those of the same pixels saved as PNG.
+    Frames are scored at full resolution. The other options work as in
+    evaluate_photo_quality; cache keys cover the frame's bytes and layout.
+    """
+    deadline = Deadline(deadline_ms)
+    layout = PixelLayout(width, height, pixel_format, stride, offset)
+    return _evaluate_pixels(pixels, layout, focus_map, cache, StageTimer(timings), cascade, raw_features,
+                            deadline, bands, low_memory, phash)
+
+
+def _pixels_cache_key(cache: ResultCache, pixels, layout: PixelLayout, **options) -> str:
+    """Cache key of a raw frame: its bytes, its layout and the evaluation options."""
+    options["preview_scale"] = 1
+    return cache.key(frame_bytes(pixels, layout), pixels=layout.to_dict(), **options)
+
+
+def _evaluate_pixels(pixels, layout: PixelLayout, focus_map: bool, cache: ResultCache | None, timer: StageTimer,
+                     cascade: bool = False, raw_features: bool = False, deadline: Deadline | None = None,
+                     bands: int = 1, low_memory: bool = False, phash: bool = False) -> dict:
+    """Shared by the raw-pixel entry points (API, --stdin / --pixels_file and --serve)."""
+    memory = PeakRss() if low_memory else None
+    frame = wrap_pixels(pixels, layout)
+    cache_key = None
+    if cache is not None:
+        with timer.stage("cache_lookup"):
+            cache_key = _pixels_cache_key(cache, pixels, layout, focus_map=focus_map, cascade=cascade,
+                                          raw_features=raw_features, phash=phash)
+            result = cache.get(cache_key)
+        if result is not None:
+            if timer.enabled:
+                result["timings"] = timer.report()
+            if memory is not None:
+                result["memory"] = memory.report()
+            return result
+
+    # Grayscale and statistics straight from the wrapped frame; channel means are put in
+    # B, G, R order (and alpha dropped) to match a decoded image.
+    _, gray_code, bgr_channels = PIXEL_FORMATS[layout.pixel_format]
+    noise_roi_size = 50
+    with timer.stage("grayscale"):
+        gray = banded_grayscale(frame, bands, gray_code) if bands > 1 else cv2.cvtColor(frame, gray_code)
+    with timer.stage("image_stats"):
+        if bands > 1:
+            stats = banded_image_stats(gray, frame, noise_roi_size, bands)
+        else:
+            stats = _compute_image_stats(gray, frame, noise_roi_size)
+        stats.channel_means = stats.channel_means[list(bgr_channels)]
+        if stats.channel_stds is not None:
+            stats.channel_stds = stats.channel_stds[list(bgr_channels)]
+
+    result = _evaluate_image(frame, focus_map=focus_map, timer=timer, gray=gray, stats=stats, cascade=cascade,
+                             raw_features=raw_features, deadline=deadline, bands=bands, low_memory=low_memory,
+                             phash=phash)
+    if cache is not None:
+        cache.put(cache_key, result)
+    if timer.enabled:
+        result["timings"] = timer.report()
+    if memory is not None:
+        result["memory"] = memory.report()
+    return result
+
+
+def _overall_confidence(sharpness_score: float, focus_area_score: float, exposure_score: float,
+                        noise_score: float, color_balance_score: float, dynamic_range_score: float) -> float:
+    """Weighted average of the technical and the other metric scores ([Weights] in config.ini)."""
+    tech_scores = [sharpness_score, focus_area_score,
+                   exposure_score, noise_score]
+    other_scores = [color_balance_score, dynamic_range_score]
+    avg_tech_score = sum(tech_scores) / \
+        len(tech_scores) if tech_scores else 0.0
+    avg_other_score = sum(other_scores) / \
+        len(other_scores) if other_scores else 0.0
+    config = get_config()
+    return (avg_tech_score * config.overall_tech_weight) + \
+           (avg_other_score * config.overall_other_weight)
+
+
+_RESULT_METRICS = ("Sharpness", "Focus Area", "Exposure", "Noise", "Color Balance", "Dynamic Range", "Saliency")
+
+
+def _rejected_result(stage: str, max_overall_confidence: float, scores: dict[str, tuple[float, str]],
+                     preview_scale: int = 1) -> dict:
+    """
+    Result for an image rejected early by cascade mode. It has the same keys as a full
+    result. Metrics that were never computed have a None confidence. "overall_confidence"
+    is the upper bound that triggered the rejection, and "judgement" is the best level
+    that upper bound still allows.
+    """
+    result = {}
+    for name in _RESULT_METRICS:
+        if name in scores:
+            score, explanation = scores[name]
+            result[name] = {"confidence": float(score), "explanation": explanation}
+        else:
+            result[name] = {"confidence": None, "explanation": "Not computed (rejected early)."}
+    result["Focus Area"]["bbox"] = None
+    result.update({
+        "description": "Image with no prominent objects detected.",
+        "overall_confidence": float(max_overall_confidence),
+        "judgement_description": f"Rejected early after the {stage} stage: overall quality can be at most "
+                                 f"{max_overall_confidence:.2f}, below the Fair threshold.",
+        "judgement": "Poor" if max_overall_confidence >= get_config().judgement_poor else "Very Poor",
+        "rejected_early": {"stage": stage, "max_overall_confidence": float(max_overall_confidence)},
+    })
+    if preview_scale > 1:
+        result["preview_scale"] = preview_scale
+    return result
+
+
+def _raw_features(stats: ImageStats, preview_scale: int) -> dict:
+    """
+    Unnormalized measurements behind the statistics-based scores. Every config-dependent
+    part of a result (normalization, weights, judgement levels) can be recomputed from
+    these plus the Laplacian and focus measurements (see features.rejudge).
+    """
+    return {
+        "preview_scale": preview_scale,
+        "mean_intensity": float(stats.mean_intensity),
+        "noise_std": stats.noise_std,
+        "channel_means": [float(v) for v in stats.channel_means],
+        "gray_min": stats.gray_min,
+        "gray_max": stats.gray_max,
+    }
+
+
+def _add_focus_measurements(raw: dict, shape: tuple[int, int], laplacian_integral: LaplacianIntegral,
+                            saliency: SaliencyResult, focus_failed: bool, preview_scale: int = 1):
+    """
+    Adds the center-crop and saliency-region Laplacian variances and their full-resolution
+    boxes (as compared by _calculate_focus_area) and the saliency peak to `raw`. `shape`
+    is that of the frame `laplacian_integral` and `saliency` were computed on, and
+    `preview_scale` its reduction from full resolution.
+    """
+    h, w = shape
+    raw.update(center_var=None, center_bbox=None, saliency_var=None, saliency_bbox=None,
+               saliency_peak=float(saliency.peak), focus_failed=focus_failed, complete=True)
+    if focus_failed:
+        return
+    for name, box in (("center", _center_crop_box(h, w)), ("saliency", _saliency_box(h, w, saliency.peak_xy))):
+        x1, y1, x2, y2 = box
+        if y2 > y1 and x2 > x1:
+            raw[f"{name}_var"] = float(laplacian_integral.region_variance(x1, y1, x2, y2))
+        raw[f"{name}_bbox"] = [int(v * preview_scale) for v in box]
+
+
+def _image_phash(gray: np.ndarray, saliency: SaliencyResult | None, timer: StageTimer) -> str:
+    """
+    Perceptual hash of the full frame's 256x256 preview: the one saliency was computed
+    from, or a fresh one when saliency did not run on `gray` (cascade rejection, deadline),
+    so a frame gets the same hash whichever stages ran.
+    """
+    with timer.stage("phash"):
+        preview = saliency.preview if saliency is not None and saliency.image_shape == gray.shape[:2] else None
+        if preview is None:
+            preview = cv2.resize(gray, (256, 256), interpolation=cv2.INTER_AREA)
+        return perceptual_hash(preview)
+
+
+def _finish_result(result: dict, raw: dict | None, deadline: Deadline, phash: str | None) -> dict:
+    """Attaches the optional "phash", "raw_features" and "deadline" entries to a result."""
+    if phash is not None:
+        result["phash"] = phash
+        if raw is not None:
+            raw["phash"] = phash
+    if raw is not None:
+        result["raw_features"] = {"complete": False, **raw}
+    if deadline.limited:
+        result["deadline"] = deadline.report()
+    return result
+
+
+def _evaluate_image(img: np.ndarray, focus_map: bool = False, preview_scale: int = 1,
+                    timer: StageTimer | None = None, gray: np.ndarray | None = None,
+                    stats: ImageStats | None = None, saliency: SaliencyResult | None = None,
+                    cascade: bool = False, raw_features: bool = False,
+                    deadline: Deadline | None = None, bands: int = 1, low_memory: bool = False,
+                    phash: bool = False) -> dict:
+    """
+    Scores an already-decoded BGR image. Shared by the path and in-memory entry points.
+
+    `preview_scale` tells how much the image was reduced at decode time; it selects the
+    calibrated normalization factors and scales bboxes back to full resolution.
+    Each stage is measured with `timer`, if given. A precomputed `gray`, `stats` or
+    `saliency` (see evaluate_batch) is used instead of computing it here.
+
+    Metrics run from cheapest to most expensive: the shared statistics (exposure, noise,
+    color balance, dynamic range), then the Laplacian (sharpness), then saliency and focus.
+    With `cascade=True`, the highest reachable overall confidence is computed after each
+    stage, with every missing metric at its upper bound (1.0, or _focus_area_upper_bound).
+    If it is below the Fair level, the rest is skipped and a "rejected early" result is
+    returned (see _rejected_result). Images that pass get exactly the result they would get
+    without the cascade.
+
+    With `raw_features=True` the result gets a "raw_features" entry (see _raw_features);
+    for rejected images it holds only the stages that ran and "complete" is False, as it
+    is (with "degraded" True) for results degraded to meet the deadline.
+
+    With a limited `deadline`, the statistics-based metrics always run and the optional
+    work is given up in reverse priority order when it is not predicted to fit the
+    remaining budget (see Deadline.allows): the Laplacian runs on a half-size frame with
+    the next preview scale's normalization (Sharpness and Focus Area approximated), then
+    saliency is skipped and focus is scored on the center crop only, then the focus search
+    is replaced by overall sharpness, then the focus map is skipped. The result's
+    "deadline" entry lists what was skipped or approximated; skipped metrics have a None
+    confidence. Nothing is degraded when the budget suffices. The budget is best effort:
+    stages are chosen from predicted costs and none is interrupted, so a result can arrive
+    late (budgets of 30-40 ms have taken 38-96 ms).
+
+    With `bands` > 1, the grayscale conversion, the statistics pass and the Laplacian
+    tables are computed band by band in threads and merged exactly (see bands.py).
+    With `low_memory=True` the Laplacian is never held for the whole frame: region
+    variances are streamed over row bands in CV_16S (see StreamingLaplacian), which
+    gives the same scores with less peak memory and more time spent in focus lookups.
+    With `phash=True` the result gets the frame's "phash" (see _image_phash).
+    """
+    timer = timer or StageTimer(enabled=False)
+    deadline = deadline or Deadline()
+    preview_normalization = get_config().preview_normalization
+    sharpness_norm, focus_norm, noise_norm = preview_normalization[preview_scale]
+    if gray is None:
+        with timer.stage("grayscale"):
+            if bands > 1:
+                gray = banded_grayscale(img, bands)
+            else:
+                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) # Convert image to grayscale
+
+    # Shared histogram / channel / noise statistics for metrics 3-6
+    noise_roi_size = max(1, 50 // preview_scale)
+    if stats is None:
+        with timer.stage("image_stats"):
+            if bands > 1:
+                stats = banded_image_stats(gray, img, noise_roi_size, bands)
+            else:
+                stats = _compute_image_stats(gray, img, noise_roi_size)
+
+    # 3. Exposure
+    with timer.stage("exposure"):
+        exposure_score, exposure_explanation = _calculate_exposure(gray, stats)
+
+    # 4. Noise
+    with timer.stage("noise"):
+        noise_score, noise_explanation = _calculate_noise(gray, noise_norm, noise_roi_size, stats)
+
+    # 5. Color Balance
+    with timer.stage("color_balance"):
+        color_balance_score, color_balance_explanation = _calculate_color_balance(
+            img, stats)
+
+    # 6. Dynamic Range
+    with timer.stage("dynamic_range"):
+        dynamic_range_score, dynamic_range_explanation = _calculate_dynamic_range(
+            gray, stats)
+
+    raw = _raw_features(stats, preview_scale) if raw_features else None
+
+    if cascade:
+        max_overall = _overall_confidence(1.0, 1.0, exposure_score, noise_score,
+                                          color_balance_score, dynamic_range_score)
+        if max_overall < get_config().judgement_fair:
+            return _finish_result(_rejected_result("image_stats", max_overall, {
+                "Exposure": (exposure_score, exposure_explanation),
+                "Noise": (noise_score, noise_explanation),
+                "Color Balance": (color_balance_score, color_balance_explanation),
+                "Dynamic Range": (dynamic_range_score, dynamic_range_explanation),
+            }, preview_scale), raw, deadline, _image_phash(gray, saliency, timer) if phash else None)
+
+    # Under a tight deadline, the Laplacian-based metrics run on a half-size frame
+    lap_gray, lap_scale = gray, preview_scale
+    if not deadline.allows("laplacian", gray.size) and preview_scale * 2 in preview_normalization:
+        with timer.stage("deadline_resize"):
+            lap_gray = cv2.resize(gray, (max(1, gray.shape[1] // 2), max(1, gray.shape[0] // 2)),
+                                  interpolation=cv2.INTER_AREA)
+        lap_scale = preview_scale * 2
+        sharpness_norm, focus_norm, _ = preview_normalization[lap_scale]
+        saliency = None  # A precomputed map would be in full-size coordinates
+        deadline.approximate("Sharpness")
+
+    # Single Laplacian pass shared by every region sharpness metric
+    with timer.stage("laplacian"), deadline.measure("laplacian", lap_gray.size):
+        if low_memory:
+            laplacian_integral = StreamingLaplacian(lap_gray)
+        elif bands > 1:
+            laplacian_integral = banded_laplacian_integral(lap_gray, bands)
+        else:
+            laplacian_integral = LaplacianIntegral(lap_gray)
+
+    # 1. Sharpness (overall)
+    with timer.stage("sharpness"):
+        sharpness_score, sharpness_explanation = _calculate_sharpness(lap_gray, laplacian_integral, sharpness_norm)
+    if raw is not None:
+        raw["laplacian_var"] = float(laplacian_integral.region_variance())
+
+    if cascade:
+        focus_bound = _focus_area_upper_bound(laplacian_integral, sharpness_score, focus_norm)
+        max_overall = _overall_confidence(sharpness_score, focus_bound, exposure_score, noise_score,
+                                          color_balance_score, dynamic_range_score)
+        if max_overall < get_config().judgement_fair:
+            return _finish_result(_rejected_result("sharpness", max_overall, {
+                "Sharpness": (sharpness_score, sharpness_explanation),
+                "Exposure": (exposure_score, exposure_explanation),
+                "Noise": (noise_score, noise_explanation),
+                "Color Balance": (color_balance_score, color_balance_explanation),
+                "Dynamic Range": (dynamic_range_score, dynamic_range_explanation),
+            }, preview_scale), raw, deadline, _image_phash(gray, saliency, timer) if phash else None)
+
+    # 1.5 Saliency map (fast)
+    if saliency is None and deadline.allows("saliency", lap_gray.size):
+        with timer.stage("saliency"), deadline.measure("saliency", lap_gray.size):
+            saliency = _calculate_saliency_result(lap_gray)
+    if saliency is None:
+        deadline.skip("Saliency")
+        saliency_peak = None
+        saliency_explanation = "Skipped to meet the deadline."
+    else:
+        if lap_scale != preview_scale:
+            deadline.approximate("Saliency")
+        saliency_peak = saliency.peak
+        saliency_explanation = "Prominent salient region detected." if saliency_peak > 0.2 else "No prominent salient region detected."
+
+    # 2. Focus Area (central-crop + saliency heuristic)
+    focus_proxy = deadline.remaining_ms() <= 0
+    if not focus_proxy:
+        with timer.stage("focus_area"):
+            focus_area_score, focus_area_explanation, detected_object_names, main_subject_name, focus_bbox = \
+                _calculate_focus_area(img, lap_gray, sharpness_score, saliency, laplacian_integral, focus_norm,
+                                      center_only=saliency is None)
+    else:
+        focus_area_score, focus_area_explanation = sharpness_score, "Using overall sharpness as focus proxy."
+        detected_object_names, main_subject_name, focus_bbox = set(), None, None
+    if lap_scale != preview_scale or saliency is None or focus_proxy:
+        deadline.approximate("Focus Area")
+    if raw is not None and saliency is not None:
+        # In the coordinates of the (possibly half-size) frame the Laplacian and saliency ran on
+        _add_focus_measurements(raw, lap_gray.shape, laplacian_integral, saliency, focus_bbox is None, lap_scale)
+    if focus_bbox is not None and lap_scale > 1:
+        focus_bbox = tuple(v * lap_scale for v in focus_bbox)
+
+    # Calculate overall confidence
+    overall_confidence = _overall_confidence(sharpness_score, focus_area_score, exposure_score,
+                                             noise_score, color_balance_score, dynamic_range_score)
+
+    # Generate assessment summary
+    with timer.stage("summary"):
+        judgement, judgement_description, image_description = _generate_assessment_summary(
+            overall_confidence, focus_area_explanation, main_subject_name,
+            sharpness_score, exposure_score, noise_score, color_balance_score,
+            dynamic_range_score, detected_object_names
+        )
+
+    result = {
+        "Sharpness": {"confidence": float(sharpness_score), "explanation": sharpness_explanation},
+        "Focus Area": {"confidence": float(focus_area_score), "explanation": focus_area_explanation, "bbox": [int(x) for x in focus_bbox] if focus_bbox is not None else None},
+        "Exposure": {"confidence": float(exposure_score), "explanation": exposure_explanation},
+        "Noise": {"confidence": float(noise_score), "explanation": noise_explanation},
+        "Color Balance": {"confidence": float(color_balance_score), "explanation": color_balance_explanation},
+        "Dynamic Range": {"confidence": float(dynamic_range_score), "explanation": dynamic_range_explanation},
+    "Saliency": {"confidence": float(saliency_peak) if saliency_peak is not None else None, "explanation": saliency_explanation},
+        "description": image_description,
+        "overall_confidence": float(overall_confidence),
+        "judgement_description": judgement_description,
+        "judgement": judgement
+    }
+    if preview_scale > 1:
+        result["preview_scale"] = preview_scale
+    if focus_map and deadline.allows("focus_map", lap_gray.size):
+        with timer.stage("focus_map"), deadline.measure("focus_map", lap_gray.size):
+            result["Focus Map"] = _calculate_focus_map(
+                lap_gray, laplacian_integral, normalization_factor=focus_norm, scale=lap_scale)
+    elif focus_map:
+        deadline.skip("Focus Map")
+    if raw is not None and (deadline.skipped or deadline.approximated):
+        raw["complete"] = False  # Degraded measurements can't be re-judged like full ones
+        raw["degraded"] = True
+    return _finish_result(result, raw, deadline, _image_phash(gray, saliency, timer) if phash else None)
+
+
+def _load_frame(image: str | bytes | bytearray | memoryview | np.ndarray, preview_scale: int = 1) -> np.ndarray:
+    """Decoded BGR frame from a file path, encoded bytes, or an already decoded array."""
+    if isinstance(image, np.ndarray):
+        if image.ndim != 3 or image.shape[2] != 3 or image.dtype != np.uint8:
+            raise ValueError(f"Expected a BGR uint8 image, got shape {image.shape} and dtype {image.dtype}.")
+        return image
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        img = _decode(np.frombuffer(memoryview(image).cast("B"), dtype=np.uint8), preview_scale)
+        if img is None:
+            raise ValueError("Failed to decode image buffer.")
+        return img
+    img = _decode(os.fspath(image), preview_scale)
+    if img is None:
+        raise ValueError(f"Failed to load image: {image}")
+    return img
+
+
+def evaluate_batch(images: list, focus_map: bool = False, preview_scale: int = 1) -> list[dict]:
+    """
+    Evaluates many images at once and returns the same dicts as evaluate_photo_quality,
+    in input order.
+
+    `images` may mix file paths, encoded bytes and decoded BGR arrays (arrays are taken as
+    already decoded at `preview_scale`). Frames of identical size are stacked into one
+    (N, H, W, 3) array: the grayscale conversion, the exposure / noise / color balance /
+    dynamic range statistics and the spectral-residual saliency FFT each run once per
+    stack, and only the Laplacian-based metrics and the summary run per frame.
+    All frames are decoded up front, so callers should split very long bursts.
+    """
+    frames = [_load_frame(image, preview_scale) for image in images]
+    groups: dict[tuple[int, ...], list[int]] = {}
+    for index, frame in enumerate(frames):
+        groups.setdefault(frame.shape, []).append(index)
+
+    results: list[dict | None] = [None] * len(frames)
+    noise_roi_size = max(1, 50 // preview_scale)
+    for indices in groups.values():
+        stack = np.stack([frames[i] for i in indices])
+        for i in indices:
+            frames[i] = None  # The stack holds its own copy
+        count, h, w = stack.shape[:3]
+        gray_stack = cv2.cvtColor(stack.reshape(count * h, w, 3), cv2.COLOR_BGR2GRAY).reshape(count, h, w)
+        stats = _compute_batch_stats(gray_stack, stack, noise_roi_size)
+        saliency = _calculate_saliency_batch(gray_stack)
+        for j, i in enumerate(indices):
+            results[i] = _evaluate_image(stack[j], focus_map=focus_map, preview_scale=preview_scale,
+                                         gray=gray_stack[j], stats=stats[j], saliency=saliency[j])
+    return results
+
+
+def select_best_frames(frames: list, top_k: int | None = None, focus_map: bool = False,
+                       preview_scale: int = 1) -> dict:
+    """
+    Picks the best frames of a burst (file paths, encoded bytes or decoded BGR arrays).
+
+    1. Every frame is reduced to a 256x256 grayscale preview; the Laplacian variance of the
+       preview is a quick sharpness estimate. Frames below prune_ratio ([Burst] in config.ini) x
+       the sharpest preview are pruned without further work (the `top_k` sharpest always stay).
+    2. Surviving frames whose previews differ by at most `similarity` ([Burst]) gray levels
+       (mean absolute difference) from an already processed frame of the same size reuse
+       its saliency result, so a steady burst needs a single saliency pass. (Its peak is
+       in that frame's pixel coordinates, so frames of another size get their own pass.)
+    3. Survivors are fully scored and ranked by overall_confidence.
+
+    Returns {"ranking": [...], "pruned": [...], "saliency_passes": n}. Ranking entries have
+    "index", "overall_confidence" and "judgement"; the first `top_k` also carry the full
+    "result". Pruned entries have "index" and the quick "preview_sharpness".
+    Results of frames that reused a saliency pass can differ slightly from scoring them
+    on their own.
+    """
+    config = get_config()
+    top_k = max(1, config.burst_top_k if top_k is None else top_k)
+    images = [_load_frame(frame, preview_scale) for frame in frames]
+    if not images:
+        raise ValueError("A burst needs at least one frame.")
+    grays = [cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) for img in images]
+    previews = [cv2.resize(gray, (256, 256), interpolation=cv2.INTER_AREA) for gray in grays]
+    preview_sharpness = [float(cv2.Laplacian(preview, cv2.CV_64F).var()) for preview in previews]
+
+    by_sharpness = sorted(range(len(images)), key=lambda i: -preview_sharpness[i])
+    threshold = config.burst_prune_ratio * preview_sharpness[by_sharpness[0]]
+    survivors = [i for rank, i in enumerate(by_sharpness) if rank < top_k or preview_sharpness[i] >= threshold]
+    pruned = [{"index": i, "preview_sharpness": preview_sharpness[i]}
+              for i in sorted(set(by_sharpness) - set(survivors))]
+
+    # Saliency shared across near-identical previews, sharpest frame first
+    references: list[tuple[np.ndarray, SaliencyResult]] = []
+    scored = []
+    for i in survivors:
+        preview = previews[i].astype(np.float32)
+        saliency = next((result for reference, result in references
+                         if result.image_shape == grays[i].shape[:2]
+                         and cv2.norm(preview, reference, cv2.NORM_L1) / preview.size <= config.burst_similarity), None)
+        if saliency is None:
+            saliency = _calculate_saliency_result(grays[i], response=_spectral_residual(preview),
+                                                  preview=previews[i])
+            references.append((preview, saliency))
+        else:
+            saliency = replace(saliency, preview=previews[i])  # Shared map, but this frame's own hash
+        scored.append((i, _evaluate_image(images[i], focus_map=focus_map, preview_scale=preview_scale,
+                                          gray=grays[i], saliency=saliency)))
+
+    scored.sort(key=lambda item: -item[1]["overall_confidence"])
+    ranking = []
+    for rank, (i, result) in enumerate(scored):
+        entry = {"index": i, "overall_confidence": result["overall_confidence"], "judgement": result["judgement"]}
+        if rank < top_k:
+            entry["result"] = result
+        ranking.append(entry)
+    return {"ranking": ranking, "pruned": pruned, "saliency_passes": len(references)}
+
+
+def _scale_measurements(img: np.ndarray, scale: int = 1) -> tuple[float, float, float]:
+    """Raw (unnormalized) sharpness, center-crop focus and noise measurements of one image."""
+    roi_size = max(1, 50 // scale)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    laplacian_integral = LaplacianIntegral(gray)
+    return (laplacian_integral.region_variance(),
+            laplacian_integral.region_variance(*_center_crop_box(h, w)),
+            float(np.std(gray[:roi_size, :roi_size])))
+
+
+def calibrate_preview(folder_path: str) -> dict[int, tuple[float, float, float]]:
+    """
+    Derives per-scale normalization factors from a folder of representative full-size images.
+
+    For each preview scale, the factor is the full-resolution factor multiplied by the
+    median ratio between the reduced and full-resolution raw measurement, so that a
+    preview score approximates the full-resolution score of the same image.
+    """
+    image_paths = [os.path.join(folder_path, f) for f in sorted(os.listdir(folder_path))
+                   if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    ratios: dict[int, list[list[float]]] = {scale: [[], [], []] for scale in PREVIEW_SCALES}
+    for image_path in image_paths:
+        full = cv2.imread(image_path)
+        if full is None:
+            logger.warning(f"Skipping {image_path}: failed to load image")
+            continue
+        full_raw = _scale_measurements(full)
+        for scale in PREVIEW_SCALES:
+            reduced_raw = _scale_measurements(_decode(image_path, scale), scale)
+            for i, (f_val, r_val) in enumerate(zip(full_raw, reduced_raw)):
+                if f_val > 1e-6:
+                    ratios[scale][i].append(r_val / f_val)
+
+    base = get_config().preview_normalization[1]
+    factors = {}
+    for scale in PREVIEW_SCALES:
+        factors[scale] = tuple(
+            float(base[i] * np.median(ratios[scale][i])) if ratios[scale][i] else base[i]
+            for i in range(3))
+    return factors
+
+
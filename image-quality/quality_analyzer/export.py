@@ -0,0 +1,71 @@
+"""Bulk result export in a format PostgreSQL's COPY loads directly (standard library only)."""
+import csv
+import os
+
+from .evaluate import _RESULT_METRICS
+
+COPY_FORMATS = ("csv", "tsv")
+COPY_COLUMNS = ("file_path",) + tuple(name.lower().replace(" ", "_") for name in _RESULT_METRICS) + \
+               ("overall_confidence", "judgement")
+
+# Rows are gathered into writes of about this many bytes.
+COPY_BUFFER_BYTES = 1 << 20
+
+_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class CopyWriter:
+    """
+    Writes one row per scored image for `COPY ... FROM`: the image path, every metric
+    confidence, overall_confidence and judgement (columns in COPY_COLUMNS).
+
+    "csv" matches `WITH (FORMAT csv, HEADER true)` (NULL is an empty field); "tsv" matches
+    the default text format `WITH (FORMAT text, HEADER true)` (NULL is \\N, with backslash
+    escapes). Metrics skipped by cascade mode are written as NULL. Output goes through a
+    COPY_BUFFER_BYTES buffer, so the file is written in large chunks.
+
+    With `append=True` an existing file is continued without repeating the header, which
+    is how a run resumed from a journal keeps the rows of the interrupted run. The buffer
+    may reach the file at any time, so it can hold rows the journal never committed;
+    `append_at` (the size() noted at the journal's last commit) truncates those first, as
+    their images are scored and written again.
+    """
+
+    def __init__(self, path: str, fmt: str = "csv", append: bool = False, append_at: int | None = None):
+        if fmt not in COPY_FORMATS:
+            raise ValueError(f"Unsupported COPY format {fmt!r}; use one of {', '.join(COPY_FORMATS)}.")
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        append = append and os.path.exists(path) and os.path.getsize(path) > 0
+        if append and append_at is not None and os.path.getsize(path) > append_at:
+            os.truncate(path, append_at)
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8",
+                          buffering=COPY_BUFFER_BYTES)
+        self._csv = csv.writer(self._file, lineterminator="\n") if fmt == "csv" else None
+        if not append:
+            self._write(COPY_COLUMNS)
+
+    def _write(self, fields):
+        if self._csv is not None:
+            self._csv.writerow("" if value is None else value for value in fields)
+        else:
+            self._file.write("\t".join("\\N" if value is None else str(value).translate(_TEXT_ESCAPES)
+                                       for value in fields) + "\n")
+
+    def add(self, image_path: str, result: dict):
+        self._write((image_path,) + tuple(result[name]["confidence"] for name in _RESULT_METRICS) +
+                    (result["overall_confidence"], result["judgement"]))
+        self.rows += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def size(self) -> int:
+        """Bytes written to the file so far, after flushing the buffer."""
+        self._file.flush()
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,249 @@
+"""
+Raw-feature store: the unnormalized measurements behind each result, kept in a columnar
+.npz file so config.ini changes (normalization, weights, judgement levels) can be
+re-judged over a whole run without decoding a single image (NumPy only).
+"""
+import logging
+import os
+from functools import reduce
+
+import numpy as np
+
+from .config import AnalyzerConfig, get_config
+
+logger = logging.getLogger(__name__)
+
+# Bump when the meaning of a column changes; older stores are refused.
+FEATURE_STORE_VERSION = 1
+
+_FLOAT_COLUMNS = ("laplacian_var", "center_var", "saliency_var", "saliency_peak", "mean_intensity", "noise_std")
+_INT_COLUMNS = ("gray_min", "gray_max")
+_BOX_COLUMNS = ("center_bbox", "saliency_bbox")
+
+
+class FeatureStore:
+    """
+    Accumulates the "raw_features" of results (see evaluate._raw_features) and saves them
+    as one compressed .npz with a column per measurement: floats as float64 (NaN when
+    missing), gray levels as int16, boxes as (N, 4) int32 (-1 when missing) and the
+    perceptual hash as a hex string ("" when missing). Incomplete rows say why: "degraded"
+    is True where a deadline_ms cut stages short, False where cascade mode rejected early.
+
+    With `append=True` an existing store is extended. The file is rewritten atomically
+    by save(); checkpoint() saves only once the store has grown by a quarter since the
+    last save, which keeps periodic saving linear in the number of rows.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self._rows: dict[str, list] = {name: [] for name in ("path", "preview_scale", "complete", "degraded",
+                                                              "focus_failed",
+                                                              "channel_means", *_FLOAT_COLUMNS, *_INT_COLUMNS,
+                                                              *_BOX_COLUMNS, "phash")}
+        if append and os.path.exists(path):
+            for name, values in load_feature_store(path).items():
+                self._rows[name] = list(values)
+            if len(self._rows["phash"]) != len(self._rows["path"]):  # Store saved before hashes were kept
+                self._rows["phash"] = [""] * len(self._rows["path"])
+            if len(self._rows["degraded"]) != len(self._rows["path"]):  # Store saved before reasons were kept
+                self._rows["degraded"] = [False] * len(self._rows["path"])
+        self._index = {p: i for i, p in enumerate(self._rows["path"])}
+        self._saved_rows = len(self._index)
+
+    def __len__(self) -> int:
+        return len(self._rows["path"])
+
+    def __contains__(self, image_path: str) -> bool:
+        return image_path in self._index
+
+    def add(self, image_path: str, raw: dict):
+        """Adds (or replaces) the measurements of one image."""
+        def number(value, missing):
+            return missing if value is None else value
+
+        row = {
+            "path": image_path,
+            "preview_scale": raw.get("preview_scale", 1),
+            "complete": bool(raw.get("complete", False)),
+            "degraded": bool(raw.get("degraded", False)),
+            "focus_failed": bool(raw.get("focus_failed", False)),
+            "channel_means": raw.get("channel_means") or [np.nan] * 3,
+            "phash": raw.get("phash") or "",
+        }
+        row.update({name: number(raw.get(name), np.nan) for name in _FLOAT_COLUMNS})
+        row.update({name: number(raw.get(name), -1) for name in _INT_COLUMNS})
+        row.update({name: number(raw.get(name), [-1] * 4) for name in _BOX_COLUMNS})
+        index = self._index.get(image_path)
+        if index is None:
+            self._index[image_path] = len(self)
+            for name, value in row.items():
+                self._rows[name].append(value)
+        else:
+            for name, value in row.items():
+                self._rows[name][index] = value
+
+    def columns(self) -> dict[str, np.ndarray]:
+        rows = self._rows
+        columns = {
+            "path": np.array(rows["path"], dtype=np.str_),
+            "preview_scale": np.array(rows["preview_scale"], dtype=np.int8),
+            "complete": np.array(rows["complete"], dtype=bool),
+            "degraded": np.array(rows["degraded"], dtype=bool),
+            "focus_failed": np.array(rows["focus_failed"], dtype=bool),
+            "channel_means": np.array(rows["channel_means"], dtype=np.float64).reshape(-1, 3),
+            "phash": np.array(rows["phash"], dtype="<U16"),
+        }
+        columns.update({name: np.array(rows[name], dtype=np.float64) for name in _FLOAT_COLUMNS})
+        columns.update({name: np.array(rows[name], dtype=np.int16) for name in _INT_COLUMNS})
+        columns.update({name: np.array(rows[name], dtype=np.int32).reshape(-1, 4) for name in _BOX_COLUMNS})
+        return columns
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(tmp_path, version=np.array(FEATURE_STORE_VERSION), **self.columns())
+        os.replace(tmp_path, self.path)
+        self._saved_rows = len(self)
+
+    def checkpoint(self):
+        if len(self) - self._saved_rows >= max(1024, self._saved_rows // 4):
+            self.save()
+
+
+def load_feature_store(path: str) -> dict[str, np.ndarray]:
+    """Columns of a store written by FeatureStore.save()."""
+    with np.load(path, allow_pickle=False) as data:
+        version = int(data["version"]) if "version" in data else None
+        if version != FEATURE_STORE_VERSION:
+            raise ValueError(f"Feature store {path} has version {version}; expected {FEATURE_STORE_VERSION}. "
+                             f"Rescore the images with --feature_store.")
+        return {name: data[name] for name in data.files if name != "version"}
+
+
+def _join(parts: list[np.ndarray], separator: str) -> np.ndarray:
+    """Element-wise join of string arrays, skipping empty parts."""
+    def join_two(left, right):
+        both = np.char.add(np.char.add(left, separator), right)
+        return np.where(left == "", right, np.where(right == "", left, both))
+    return reduce(join_two, parts)
+
+
+def rejudge(columns: dict[str, np.ndarray], config: AnalyzerConfig | None = None) -> dict[str, np.ndarray]:
+    """
+    Recomputes every config-dependent part of the results from stored measurements, for
+    all rows at once: scores, explanations, overall_confidence, judgement and the
+    judgement description, as _evaluate_image and _generate_assessment_summary would.
+    Rows with "complete" False (rejected early by cascade mode, or "degraded" to meet a
+    deadline_ms) are computed from the measurements they have and should be rescored
+    instead.
+    """
+    config = config or get_config()
+    scale = columns["preview_scale"].astype(np.int64)
+    norms = np.array([config.preview_normalization.get(int(s), config.preview_normalization[1])
+                      for s in range(int(scale.max(initial=1)) + 1)], dtype=np.float64)
+    sharpness_norm, focus_norm, noise_norm = norms[scale, 0], norms[scale, 1], norms[scale, 2]
+
+    sharpness = np.minimum(columns["laplacian_var"] / sharpness_norm, 1.0)
+    sharpness_expl = np.where(sharpness > 0.8, "Edges are sharp with high variance.", "Edges are slightly blurry.")
+
+    center_var, saliency_var = columns["center_var"], columns["saliency_var"]
+    with np.errstate(invalid="ignore"):
+        center = np.where(np.isnan(center_var), sharpness, np.minimum(center_var / focus_norm, 1.0))
+        salient = np.where(np.isnan(saliency_var), sharpness, np.minimum(saliency_var / focus_norm, 1.0))
+    use_saliency = salient >= center
+    failed = columns["focus_failed"]
+    focus = np.where(failed, sharpness, np.where(use_saliency, salient, center))
+    focus_expl = np.where(
+        failed, "Error computing focus heuristic; using overall sharpness.",
+        np.where(use_saliency,
+                 np.where(salient > 0.8, "Focus estimated from salient region.", "Salient region shows some softness."),
+                 np.where(center > 0.8, "Center area is in sharp focus.", "Center area shows some softness.")))
+    focus_bbox = np.where(use_saliency[:, None], columns["saliency_bbox"], columns["center_bbox"])
+    focus_bbox[failed] = -1
+
+    ideal_mean = config.exposure_ideal_mean
+    exposure = np.maximum(0.0, 1.0 - np.abs(columns["mean_intensity"] - ideal_mean) / ideal_mean)
+    exposure_expl = np.where(exposure > 0.8, "Brightness is balanced with details in shadows and highlights.",
+                             "Image is slightly over/underexposed.")
+
+    noise_std = columns["noise_std"]
+    noise = np.where(np.isnan(noise_std), 0.0, np.maximum(1.0 - noise_std / noise_norm, 0.0))
+    noise_expl = np.where(np.isnan(noise_std), "Image too small to reliably estimate noise.",
+                          np.where(noise > 0.8, "Minimal noise detected.", "Noticeable graininess present."))
+
+    channel_means = columns["channel_means"]
+    channel_mean = channel_means.mean(axis=1)
+    color = np.where(channel_mean > 1e-6,
+                     np.maximum(0.0, 1.0 - channel_means.std(axis=1) / (channel_mean + 1e-6)), 0.0)
+    color_expl = np.where(color > 0.8, "Colors are natural and balanced.", "Slight color cast detected.")
+
+    gray_min, gray_max = columns["gray_min"].astype(np.float64), columns["gray_max"]
+    dynamic_range = np.where(gray_max >= 0, np.minimum((gray_max - gray_min) / config.dynamic_range_max, 1.0), 0.0)
+    dynamic_range_expl = np.where(dynamic_range > 0.8, "Wide dynamic range with details in all tones.",
+                                  "Limited dynamic range with some detail loss.")
+
+    saliency_peak = columns["saliency_peak"]
+    saliency_expl = np.where(saliency_peak > 0.2, "Prominent salient region detected.",
+                             "No prominent salient region detected.")
+
+    overall = ((sharpness + focus + exposure + noise) / 4) * config.overall_tech_weight + \
+              ((color + dynamic_range) / 2) * config.overall_other_weight
+    judgement = np.select(
+        [overall >= config.judgement_excellent, overall >= config.judgement_good,
+         overall >= config.judgement_fair, overall >= config.judgement_poor],
+        ["Excellent", "Good", "Fair", "Poor"], "Very Poor")
+
+    lowered = np.char.lower(focus_expl)
+    central = (np.char.find(lowered, "central") >= 0) | (np.char.find(lowered, "no clear main subject") >= 0)
+    issues = _join([np.where(noise < 0.6, "noticeable noise", ""),
+                    np.where(color < 0.7, "a potential color cast", ""),
+                    np.where(dynamic_range < 0.6, "limited dynamic range", "")], ", ")
+    strengths = _join([np.where(noise > 0.85, "minimal noise", ""),
+                       np.where(color > 0.85, "good color balance", ""),
+                       np.where(dynamic_range > 0.85, "a wide dynamic range", "")], ", ")
+    judgement_description = _join([
+        np.select([overall >= 0.9, overall >= 0.7, overall >= 0.5],
+                  ["Overall technical quality is excellent.", "Overall technical quality is good.",
+                   "Overall technical quality is fair."], "Overall technical quality is poor."),
+        np.where(central, "No distinct detected subject; focus assessed using a central crop heuristic.",
+                 "A main subject was identified for focus assessment."),
+        np.select([sharpness > 0.8, sharpness > 0.6, sharpness > 0.4],
+                  ["Sharpness is excellent.", "Sharpness is good.", "Sharpness is acceptable."],
+                  "The image appears blurry or lacks sharpness."),
+        np.select([exposure > 0.85, exposure > 0.7, exposure > 0.5],
+                  ["Exposure is well-balanced.", "Exposure is generally good.", "Exposure is somewhat uneven."],
+                  "The image suffers from poor exposure (likely over or underexposed)."),
+        np.where(issues != "", np.char.add(np.char.add("Key issues include: ", issues), "."),
+                 np.where(strengths != "",
+                          np.char.add(np.char.add("Additional strengths include: ", strengths), "."), "")),
+    ], " ")
+
+    return {
+        "Sharpness": (sharpness, sharpness_expl), "Focus Area": (focus, focus_expl),
+        "Exposure": (exposure, exposure_expl), "Noise": (noise, noise_expl),
+        "Color Balance": (color, color_expl), "Dynamic Range": (dynamic_range, dynamic_range_expl),
+        "Saliency": (saliency_peak, saliency_expl),
+        "focus_bbox": focus_bbox, "overall_confidence": overall, "judgement": judgement,
+        "judgement_description": judgement_description,
+    }
+
+
+def rejudged_result(columns: dict[str, np.ndarray], judged: dict[str, np.ndarray], i: int) -> dict:
+    """Row `i` of rejudge() output as a result dict shaped like evaluate_photo_quality's."""
+    result = {}
+    for name in ("Sharpness", "Focus Area", "Exposure", "Noise", "Color Balance", "Dynamic Range", "Saliency"):
+        scores, explanations = judged[name]
+        result[name] = {"confidence": float(scores[i]), "explanation": str(explanations[i])}
+        if name == "Focus Area":
+            bbox = judged["focus_bbox"][i]
+            result[name]["bbox"] = [int(v) for v in bbox] if bbox[0] >= 0 else None
+    result.update({
+        "description": "Image with no prominent objects detected.",
+        "overall_confidence": float(judged["overall_confidence"][i]),
+        "judgement_description": str(judged["judgement_description"][i]),
+        "judgement": str(judged["judgement"][i]),
+    })
+    if columns["preview_scale"][i] > 1:
+        result["preview_scale"] = int(columns["preview_scale"][i])
+    if "phash" in columns and columns["phash"][i]:
+        result["phash"] = str(columns["phash"][i])
+    return result
@@ -0,0 +1,135 @@
+"""Checkpoint journal of scored files, so an interrupted folder run can resume (standard library only)."""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+class ScanJournal:
+    """
+    SQLite journal of the files a folder run has already scored, keyed by path and
+    identified by size and modification time.
+
+    A rerun with the same journal skips files whose size and mtime still match and
+    rescores files that changed. The journal remembers the config.ini fingerprint and
+    evaluation options it was written with; opening it with different ones starts it
+    over, since the recorded work no longer applies.
+
+    Rows are committed in groups of `commit_every` (or every `commit_seconds`), so a
+    crash loses at most that much work, which is simply scored again on the next run.
+    Files pass through begin() (at scan time) and then record() (once scored), so a file
+    modified while it was being scored is not marked as finished. `before_commit` is
+    called before each commit, e.g. to flush output that the journal vouches for; it may
+    note() how far that output got, which is committed with the rows it belongs to.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, commit_every: int = 256, commit_seconds: float = 2.0,
+                 before_commit: Callable[[], None] | None = None, **options):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_seconds = commit_seconds
+        self.before_commit = before_commit
+        self.skipped = self.recorded = 0
+        self._pending: dict[str, tuple[int, int]] = {}
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        self._lock = threading.Lock()
+        options.pop("timings", None)
+        options.pop("bands", None)
+        options.pop("low_memory", None)
+        options.pop("phash", None)  # Follows the outputs, which begin(require=...) checks
+        run_key = json.dumps({"config": get_config().fingerprint, "options": options}, sort_keys=True)
+
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS scored (path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+            "mtime_ns INTEGER NOT NULL, judgement TEXT, overall_confidence REAL)")
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'run'").fetchone()
+        if row is not None and row[0] != run_key:
+            logger.warning(f"Journal {path} was written with a different config or options; starting it over.")
+            self._db.execute("DELETE FROM scored")
+            self._db.execute("DELETE FROM meta WHERE key LIKE 'note:%'")
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('run', ?)", (run_key,))
+        self._db.commit()
+        self.finished = self._db.execute("SELECT COUNT(*) FROM scored").fetchone()[0]
+
+    def begin(self, path: str, require: Callable[[str], bool] | None = None) -> bool:
+        """
+        Returns False (and counts a skip) if `path` was already scored in its current
+        state; otherwise remembers its size and mtime for record() and returns True.
+        With `require`, an already scored file is only skipped if require(path) is true
+        (e.g. its output survived the interruption).
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return True  # Let the evaluation report the error
+        signature = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime_ns FROM scored WHERE path = ?", (path,)).fetchone()
+            if row is not None and tuple(row) == signature and (require is None or require(path)):
+                self.skipped += 1
+                return False
+            self._pending[path] = signature
+            return True
+
+    def record(self, path: str, result: dict):
+        """Marks `path` as scored with the size and mtime it had when begin() saw it."""
+        with self._lock:
+            signature = self._pending.pop(path, None)
+            if signature is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO scored (path, size, mtime_ns, judgement, overall_confidence) VALUES (?, ?, ?, ?, ?)",
+                (path, *signature, result.get("judgement"), result.get("overall_confidence")))
+            self.recorded += 1
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every or time.monotonic() - self._last_commit >= self.commit_seconds:
+                self._commit()
+
+    def note(self, key: str, value: str):
+        """
+        Stores `value` under `key` with the next commit. Only call it from before_commit,
+        which runs while the journal is locked.
+        """
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"note:{key}", value))
+
+    def noted(self, key: str) -> str | None:
+        """The value last committed under `key` by note(), None if there is none."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (f"note:{key}",)).fetchone()
+        return row[0] if row is not None else None
+
+    def forget(self, path: str):
+        """Drops a file that failed to score, so the next run tries it again."""
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def commit(self):
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        if self.before_commit is not None:
+            self.before_commit()
+        self._db.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._commit()
+                self._db.close()
+                self._db = None
@@ -0,0 +1,761 @@
+"""Per-image metric calculations: sharpness, focus, saliency, exposure, noise, color and range."""
+import logging
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from .config import get_config
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Notes:
+#   The heuristic combines a central-crop Laplacian variance
+#   (good for centered subjects) with a lightweight spectral-residual saliency
+#   map (fast, helps find off-center salient regions). The stronger of the two
+#   region sharpness values is used as the "Focus Area" score.
+# ---------------------------------------------------------------------------
+
+
+class LaplacianIntegral:
+    """
+    Summed-area tables of the Laplacian response and of its square for one image.
+
+    The Laplacian is computed once over the full frame; afterwards the variance of the
+    response inside any rectangle is a constant-time lookup (four corners per table),
+    so overall, center-crop and saliency-ROI sharpness all share the same pass.
+    """
+
+    def __init__(self, gray_img: np.ndarray):
+        laplacian = cv2.Laplacian(gray_img, cv2.CV_64F)
+        self.sum, self.sqsum = cv2.integral2(laplacian, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        self.height, self.width = gray_img.shape[:2]
+
+    @classmethod
+    def from_tables(cls, sum_table: np.ndarray, sqsum_table: np.ndarray) -> "LaplacianIntegral":
+        """Wraps summed-area tables computed elsewhere (see bands.banded_laplacian_integral)."""
+        integral = cls.__new__(cls)
+        integral.sum, integral.sqsum = sum_table, sqsum_table
+        integral.height, integral.width = sum_table.shape[0] - 1, sum_table.shape[1] - 1
+        return integral
+
+    def region_variance(self, x1: int = 0, y1: int = 0, x2: int | None = None, y2: int | None = None) -> float:
+        """Variance of the Laplacian response over [y1:y2, x1:x2] (defaults to the full frame)."""
+        x2 = self.width if x2 is None else x2
+        y2 = self.height if y2 is None else y2
+        n = (x2 - x1) * (y2 - y1)
+        if n <= 0:
+            return 0.0
+        s = self.sum[y2, x2] - self.sum[y1, x2] - self.sum[y2, x1] + self.sum[y1, x1]
+        sq = self.sqsum[y2, x2] - self.sqsum[y1, x2] - self.sqsum[y2, x1] + self.sqsum[y1, x1]
+        mean = s / n
+        return max(float(sq / n - mean * mean), 0.0)
+
+    def corners(self, ys: np.ndarray, xs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Table values (sum, squared sum) at every row in `ys` and column in `xs`."""
+        return self.sum[np.ix_(ys, xs)], self.sqsum[np.ix_(ys, xs)]
+
+
+# Rows filtered at a time by StreamingLaplacian (a few MB of temporaries at 12 MP).
+_STREAM_BAND_ROWS = 256
+
+
+class StreamingLaplacian:
+    """
+    Low-memory stand-in for LaplacianIntegral: the same region_variance() and corners()
+    lookups, answered by filtering only the rows involved, one band at a time, instead of
+    keeping a float64 response and two float64 tables (24 bytes per pixel).
+
+    Each band is filtered in CV_16S (the 3x3 response of 8-bit pixels lies in
+    [-1020, 1020]) with one halo row and column around it, so its values match the
+    full-frame filter, and its sums and squared sums are accumulated in int64. The
+    full-frame tables hold the same integers in float64, so every lookup, and therefore
+    every score, is identical. The whole-frame sums are taken up front; every other
+    lookup filters its rows again.
+    """
+
+    def __init__(self, gray_img: np.ndarray):
+        self.gray = gray_img
+        self.height, self.width = gray_img.shape[:2]
+        self._frame_sums = self._sums(0, 0, self.width, self.height)
+
+    def _bands(self, x1: int, y1: int, x2: int, y2: int):
+        """Yields the Laplacian response over [y1:y2, x1:x2] as int32 bands of rows."""
+        h, w = self.height, self.width
+        left, right = max(0, x1 - 1), min(w, x2 + 1)
+        for top in range(y1, y2, _STREAM_BAND_ROWS):
+            bottom = min(y2, top + _STREAM_BAND_ROWS)
+            halo_top, halo_bottom = max(0, top - 1), min(h, bottom + 1)
+            laplacian = cv2.Laplacian(self.gray[halo_top:halo_bottom, left:right], cv2.CV_16S)
+            yield laplacian[top - halo_top:bottom - halo_top, x1 - left:x2 - left].astype(np.int32)
+
+    def _sums(self, x1: int, y1: int, x2: int, y2: int) -> tuple[int, int]:
+        s = sq = 0
+        for band in self._bands(x1, y1, x2, y2):
+            s += int(band.sum(dtype=np.int64))
+            sq += int(np.square(band, out=band).sum(dtype=np.int64))
+        return s, sq
+
+    def region_variance(self, x1: int = 0, y1: int = 0, x2: int | None = None, y2: int | None = None) -> float:
+        """Variance of the Laplacian response over [y1:y2, x1:x2] (defaults to the full frame)."""
+        x2 = self.width if x2 is None else x2
+        y2 = self.height if y2 is None else y2
+        n = (x2 - x1) * (y2 - y1)
+        if n <= 0:
+            return 0.0
+        if (x1, y1, x2, y2) == (0, 0, self.width, self.height):
+            s, sq = self._frame_sums
+        else:
+            s, sq = self._sums(x1, y1, x2, y2)
+        mean = s / n
+        return max(float(sq / n - mean * mean), 0.0)
+
+    def corners(self, ys: np.ndarray, xs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The values LaplacianIntegral.corners would return, from one pass down the frame
+        that keeps running per-column sums and reads them off at each row in `ys`.
+        """
+        xs = np.asarray(xs)
+        corner_sum = np.empty((len(ys), len(xs)), dtype=np.float64)
+        corner_sqsum = np.empty((len(ys), len(xs)), dtype=np.float64)
+        column_sum = np.zeros(self.width, dtype=np.int64)
+        column_sqsum = np.zeros(self.width, dtype=np.int64)
+        y = 0
+        for i in np.argsort(ys, kind="stable"):
+            target = int(ys[i])
+            if target > y:
+                for band in self._bands(0, y, self.width, target):
+                    column_sum += band.sum(axis=0, dtype=np.int64)
+                    column_sqsum += np.square(band, out=band).sum(axis=0, dtype=np.int64)
+                y = target
+            corner_sum[i] = np.concatenate(([0], np.cumsum(column_sum)))[xs]
+            corner_sqsum[i] = np.concatenate(([0], np.cumsum(column_sqsum)))[xs]
+        return corner_sum, corner_sqsum
+
+
+@dataclass
+class SaliencyResult:
+    """
+    Spectral-residual saliency kept at its computation resolution.
+
+    `peak_xy` and `peak` describe the maximum of the map as it would look upsampled to the
+    full image (bilinear), computed analytically from the small map, so the full-size map
+    is only materialized through `full_map()` when something actually needs it.
+    """
+    small_map: np.ndarray          # float32 (resize_to, resize_to) map in [0, 1]
+    image_shape: tuple[int, int]   # (h, w) of the full-resolution image
+    peak_xy: tuple[int, int]       # (x, y) of the peak in full-resolution coordinates
+    peak: float                    # value of the upsampled map at the peak
+    preview: np.ndarray | None = None  # uint8 (resize_to, resize_to) grayscale downscale it was computed from
+
+    def full_map(self) -> np.ndarray:
+        """Upsamples the saliency map to the full image size (float32, [0, 1])."""
+        h, w = self.image_shape
+        full = cv2.resize(self.small_map, (w, h), interpolation=cv2.INTER_LINEAR)
+        return np.clip(full, 0.0, 1.0)
+
+
+def _calculate_sharpness(
+    gray_img: np.ndarray, laplacian_integral: LaplacianIntegral | None = None,
+    normalization_factor: float | None = None
+) -> tuple[float, str]:
+    """Calculates overall image sharpness using Laplacian variance."""
+    if laplacian_integral is None:
+        laplacian_integral = LaplacianIntegral(gray_img)
+    laplacian_var = laplacian_integral.region_variance()
+    score = min(laplacian_var / (normalization_factor or get_config().sharpness_normalization), 1.0)
+    explanation = "Edges are sharp with high variance." if score > 0.8 else "Edges are slightly blurry."
+    return score, explanation
+
+
+def _center_crop_box(h: int, w: int, crop_frac: float = 0.4) -> tuple[int, int, int, int]:
+    """(x1, y1, x2, y2) of the centered crop used by the focus heuristic."""
+    ch = max(1, int(h * crop_frac))
+    cw = max(1, int(w * crop_frac))
+    y1 = (h - ch) // 2
+    x1 = (w - cw) // 2
+    return x1, y1, x1 + cw, y1 + ch
+
+
+def _saliency_roi_size(h: int, w: int) -> int:
+    """Side of the square region scored around the saliency peak."""
+    return max(3, int(min(h, w) * 0.25))
+
+
+def _saliency_box(h: int, w: int, peak_xy: tuple[int, int]) -> tuple[int, int, int, int]:
+    """Square region of _saliency_roi_size around the saliency peak, clipped to the image."""
+    px, py = peak_xy
+    roi_size = _saliency_roi_size(h, w)
+    sy1 = max(0, py - roi_size // 2)
+    sx1 = max(0, px - roi_size // 2)
+    sy2 = min(h, sy1 + roi_size)
+    sx2 = min(w, sx1 + roi_size)
+    return sx1, sy1, sx2, sy2
+
+
+def _calculate_focus_area(
+    img: np.ndarray, gray_img: np.ndarray, overall_sharpness_score: float, saliency: SaliencyResult | None = None,
+    laplacian_integral: LaplacianIntegral | None = None, normalization_factor: float | None = None,
+    center_only: bool = False
+) -> tuple[float, str, set[str], str | None, tuple[int, int, int, int] | None]:
+    """
+     Fast heuristic to estimate focus on the main subject without object detection.
+
+     Strategy overview:
+     1) Central crop sharpness (center 40% x 40%) - cheap and reliable for centered
+         subjects.
+     2) Spectral-residual saliency map (computed on a small resized version) to
+         detect the most salient region; compute Laplacian variance in that region.
+     3) Prefer the saliency-region score when it is higher (handles off-center
+         subjects), otherwise fall back to center-crop score.
+
+     Region variances are looked up in `laplacian_integral` (built here if not supplied),
+     so no crop is re-filtered. With `center_only=True` (no time for saliency) only the
+     central crop is scored.
+
+     Returns: (focus_score, explanation, detected_obj_names (empty set),
+                  main_subject_name (None), chosen_bbox (x1,y1,x2,y2) or None).
+    """
+    h, w = gray_img.shape
+    normalization_factor = normalization_factor or get_config().focus_area_normalization
+    # central crop (center 40% x 40%) - adjustable if needed
+    x1, y1, x2, y2 = _center_crop_box(h, w)
+
+    focus_score = overall_sharpness_score
+    focus_explanation = "Using overall sharpness as focus proxy."
+    detected_obj_names: set[str] = set()
+    main_subj_name: str | None = None
+
+    try:
+        if laplacian_integral is None:
+            laplacian_integral = LaplacianIntegral(gray_img)
+
+    # Center crop score (cheap)
+        center_score = overall_sharpness_score
+        if y2 > y1 and x2 > x1:
+            lap_var = laplacian_integral.region_variance(x1, y1, x2, y2)
+            center_score = min(lap_var / normalization_factor, 1.0)
+
+        if center_only:
+            focus_score = center_score
+            focus_explanation = "Center area is in sharp focus." if center_score > 0.8 else "Center area shows some softness."
+            return focus_score, focus_explanation, detected_obj_names, main_subj_name, (x1, y1, x2, y2)
+
+        # Saliency-based score (compute saliency if not provided)
+        if saliency is None:
+            saliency = _calculate_saliency_result(gray_img)
+
+    # Strongest saliency location (full-res coordinates); compute laplacian variance there
+        sx1, sy1, sx2, sy2 = _saliency_box(h, w, saliency.peak_xy)
+        sal_score = overall_sharpness_score
+        if sy2 > sy1 and sx2 > sx1:
+            lap_var_sal = laplacian_integral.region_variance(sx1, sy1, sx2, sy2)
+            sal_score = min(lap_var_sal / normalization_factor, 1.0)
+
+    # Combine: prefer saliency-based score if it is higher (handles off-center subjects)
+        if sal_score >= center_score:
+            focus_score = sal_score
+            focus_explanation = "Focus estimated from salient region." if sal_score > 0.8 else "Salient region shows some softness."
+            chosen_bbox = (sx1, sy1, sx2, sy2)
+        else:
+            focus_score = center_score
+            focus_explanation = "Center area is in sharp focus." if center_score > 0.8 else "Center area shows some softness."
+            chosen_bbox = (x1, y1, x2, y2)
+
+    except Exception as e:
+        # On any exception, fall back to overall sharpness and no bbox
+        logger.debug(f"Focus heuristic failed: {e}")
+        focus_explanation = "Error computing focus heuristic; using overall sharpness."
+        chosen_bbox = None
+
+    return focus_score, focus_explanation, detected_obj_names, main_subj_name, chosen_bbox
+
+
+def _focus_area_upper_bound(
+    laplacian_integral: LaplacianIntegral, overall_sharpness_score: float,
+    normalization_factor: float | None = None
+) -> float:
+    """
+    Upper bound of the _calculate_focus_area score before the saliency peak is known
+    (used by cascade mode).
+
+    The center-crop score is looked up exactly. Wherever the saliency ROI ends up, its
+    Laplacian variance is at most its mean squared response, and the ROI always lies in
+    some block of ceil(roi / tile) + 1 tiles, so the bound is the largest squared-response
+    sum over such blocks divided by the smallest area the (border-clipped) ROI can have.
+    The bound is loose and saturates for sharp images; blurry ones stay far below 1.0.
+    """
+    h, w = laplacian_integral.height, laplacian_integral.width
+    normalization_factor = normalization_factor or get_config().focus_area_normalization
+    x1, y1, x2, y2 = _center_crop_box(h, w)
+    center_score = min(laplacian_integral.region_variance(x1, y1, x2, y2) / normalization_factor, 1.0)
+
+    roi_size = _saliency_roi_size(h, w)
+    tile = max(1, roi_size // 4)
+    ys = np.append(np.arange(0, h, tile), h)
+    xs = np.append(np.arange(0, w, tile), w)
+    ky = min(-(-roi_size // tile) + 1, len(ys) - 1)
+    kx = min(-(-roi_size // tile) + 1, len(xs) - 1)
+    _, corners = laplacian_integral.corners(ys, xs)
+    block_sqsum = corners[ky:, kx:] - corners[:-ky, kx:] - corners[ky:, :-kx] + corners[:-ky, :-kx]
+    # The ROI starts at most roi//2 before the last row/column, so it keeps at least roi//2 + 1
+    min_area = min(roi_size // 2 + 1, h) * min(roi_size // 2 + 1, w)
+    # Relative margin so floating-point rounding can never make the bound too small
+    roi_variance_bound = float(block_sqsum.max()) / min_area * (1 + 1e-9)
+    roi_score = min(roi_variance_bound / normalization_factor, 1.0)
+    # On failure _calculate_focus_area falls back to the overall sharpness
+    return max(center_score, roi_score, overall_sharpness_score)
+
+
+def _calculate_focus_map(
+    gray_img: np.ndarray, laplacian_integral: LaplacianIntegral | None = None,
+    grid: int | None = None, window: int | None = None, top_k: int | None = None,
+    normalization_factor: float | None = None, scale: int = 1
+) -> dict:
+    """
+    Dense focus map: Laplacian variance over a grid of tiles covering the whole frame.
+
+    - The frame is split into a `grid` x `grid` tiling; every tile's variance is read from
+      the summed-area tables in one vectorized corner lookup (no loops over tiles), so the
+      cost after the shared Laplacian pass is independent of image resolution.
+    - Candidate regions are `window` x `window` tile blocks sliding by one tile. The top-k
+      sharpest non-overlapping blocks are returned with their bboxes.
+
+    Returns a JSON-ready dict with the coarse heatmap (normalized per tile), the top regions
+    (bboxes multiplied by `scale`, for maps computed on a reduced preview) and the time spent.
+    A warning is logged when that exceeds the configured `warn_ms`; the map is always
+    completed (under a deadline, evaluate skips it when it is not predicted to fit).
+    """
+    start = time.perf_counter()
+    if laplacian_integral is None:
+        laplacian_integral = LaplacianIntegral(gray_img)
+    h, w = gray_img.shape[:2]
+    config = get_config()
+    grid = max(1, min(grid or config.focus_map_grid, h, w))
+    window = max(1, min(window or config.focus_map_window, grid))
+    top_k = max(0, config.focus_map_top_k if top_k is None else top_k)
+    normalization_factor = normalization_factor or config.focus_area_normalization
+
+    ys = np.linspace(0, h, grid + 1).astype(np.intp)
+    xs = np.linspace(0, w, grid + 1).astype(np.intp)
+    corner_sum, corner_sqsum = laplacian_integral.corners(ys, xs)
+
+    def _block_variance(k: int) -> np.ndarray:
+        # Variance for every k x k block of tiles, sliding by one tile
+        s = corner_sum[k:, k:] - corner_sum[:-k, k:] - corner_sum[k:, :-k] + corner_sum[:-k, :-k]
+        sq = corner_sqsum[k:, k:] - corner_sqsum[:-k, k:] - corner_sqsum[k:, :-k] + corner_sqsum[:-k, :-k]
+        n = np.outer(ys[k:] - ys[:-k], xs[k:] - xs[:-k]).astype(np.float64)
+        mean = s / n
+        return np.maximum(sq / n - mean * mean, 0.0)
+
+    heatmap = np.minimum(_block_variance(1) / normalization_factor, 1.0)
+    window_variance = _block_variance(window)
+
+    # Greedy top-k on raw variance (normalized scores saturate at 1.0), suppressing
+    # every block that overlaps an already selected one
+    top_regions = []
+    remaining = window_variance.copy()
+    for _ in range(top_k):
+        idx = int(np.argmax(remaining))
+        r, c = np.unravel_index(idx, remaining.shape)
+        if remaining[r, c] < 0:
+            break
+        top_regions.append({
+            "bbox": [int(v) * scale for v in (xs[c], ys[r], xs[c + window], ys[r + window])],
+            "confidence": min(float(window_variance[r, c]) / normalization_factor, 1.0),
+        })
+        remaining[max(0, r - window + 1):r + window, max(0, c - window + 1):c + window] = -1.0
+
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    if elapsed_ms > config.focus_map_warn_ms:
+        logger.warning(f"Focus map took {elapsed_ms:.1f} ms (warn_ms {config.focus_map_warn_ms:.0f} ms)")
+
+    return {
+        "grid": [grid, grid],
+        "window": window,
+        "heatmap": np.round(heatmap, 3).tolist(),
+        "top_regions": top_regions,
+        "elapsed_ms": round(elapsed_ms, 2),
+    }
+
+
+def _spectral_residual(small: np.ndarray) -> np.ndarray:
+    """
+    Spectral-residual saliency (Hou & Zhang) of float32 images shaped (..., N, N).
+
+    Uses a real-input FFT: only the non-redundant half spectrum is transformed, blurred
+    and inverted. The 3x3 log-amplitude blur wraps around the (periodic) spectrum and
+    reads mirrored columns through Hermitian symmetry, so the residual spectrum stays
+    Hermitian and irfft2 returns the exact real-valued inverse. Leading axes are batched.
+    """
+    n = small.shape[-1]
+    spectrum = np.fft.rfft2(small)
+    amp = np.abs(spectrum)
+    log_amp = np.log(amp + 1e-8)
+    # exp(residual + i*phase) == exp(residual) * spectrum / |spectrum|
+    unit_phase = np.divide(spectrum, amp, out=np.ones_like(spectrum), where=amp > 0)
+
+    # 3x3 box blur of the log amplitude over the full (circular) spectrum. Columns just
+    # outside the stored half come from the conjugate-symmetric half: L[k, -j] = H[-k, j].
+    half_cols = log_amp.shape[-1]
+    neg_rows = (-np.arange(log_amp.shape[-2])) % log_amp.shape[-2]
+    ext = np.concatenate([log_amp[..., neg_rows, 1:2], log_amp,
+                          log_amp[..., neg_rows, n - half_cols:n - half_cols + 1]], axis=-1)
+    ext = np.concatenate([ext[..., -1:, :], ext, ext[..., :1, :]], axis=-2)
+    rows = ext[..., :-2, :] + ext[..., 1:-1, :] + ext[..., 2:, :]
+    avg_log = (rows[..., :-2] + rows[..., 1:-1] + rows[..., 2:]) / np.float32(9.0)
+
+    spectral_residual = log_amp - avg_log
+    saliency = np.fft.irfft2(np.exp(spectral_residual) * unit_phase, s=small.shape[-2:])
+    return (saliency * saliency).astype(np.float32, copy=False)
+
+
+def _normalize_saliency(saliency: np.ndarray) -> np.ndarray:
+    """Blurs a single (N, N) spectral-residual response and normalizes it to [0, 1]."""
+    saliency = cv2.GaussianBlur(saliency, (9, 9), 2.5)
+    saliency -= np.clip(saliency.min(), 0, None)
+    if saliency.max() > 0:
+        saliency = saliency / saliency.max()
+    return saliency
+
+
+def _upsampled_peak(small_map: np.ndarray, image_shape: tuple[int, int]) -> tuple[tuple[int, int], float]:
+    """
+    Location and value of the maximum of `small_map` after bilinear upsampling to
+    `image_shape`, without building the full-size map.
+
+    Mirrors cv2.resize(INTER_LINEAR) sampling: destination pixel d reads the source at
+    (d + 0.5) * src/dst - 0.5, clamped at the borders. A destination pixel can only beat
+    the best value found next to the small-map peak if one of its four source neighbours
+    is larger, so only destination pixels around such source pixels are evaluated. Ties
+    resolve to the first pixel in raster order, like np.argmax on the full map. Tiny
+    images and maps with many near-equal peaks fall back to the full-size map.
+    """
+    h, w = image_shape
+    sh, sw = small_map.shape
+
+    def _from_full_map() -> tuple[tuple[int, int], float]:
+        full = cv2.resize(small_map, (w, h), interpolation=cv2.INTER_LINEAR)
+        y, x = np.unravel_index(int(np.argmax(full)), full.shape)
+        return (int(x), int(y)), min(max(float(full[y, x]), 0.0), 1.0)
+
+    if h <= sh or w <= sw:
+        return _from_full_map()
+
+    def _axis(dst: int, src: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        pos = ((np.arange(dst, dtype=np.float64) + 0.5) * (src / dst) - 0.5).astype(np.float32)
+        i0 = np.floor(pos).astype(np.intp)
+        frac = pos - i0
+        low, high = i0 < 0, i0 >= src - 1
+        i0 = np.clip(i0, 0, src - 1)
+        frac[low | high] = 0.0
+        return i0, np.minimum(i0 + 1, src - 1), frac
+
+    y0, y1, fy = _axis(h, sh)
+    x0, x1, fx = _axis(w, sw)
+
+    def _evaluate(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        top = small_map[np.ix_(y0[rows], x0[cols])] * (1 - fx[cols]) + small_map[np.ix_(y0[rows], x1[cols])] * fx[cols]
+        bottom = small_map[np.ix_(y1[rows], x0[cols])] * (1 - fx[cols]) + small_map[np.ix_(y1[rows], x1[cols])] * fx[cols]
+        return top * (1 - fy[rows])[:, None] + bottom * fy[rows][:, None]
+
+    def _near(i0: np.ndarray, i1: np.ndarray, idx: int) -> np.ndarray:
+        return np.flatnonzero((i0 == idx) | (i1 == idx))
+
+    # Best value around the small-map peak gives a lower bound for the global maximum
+    py, px = np.unravel_index(int(np.argmax(small_map)), small_map.shape)
+    bound = float(_evaluate(_near(y0, y1, py), _near(x0, x1, px)).max())
+
+    candidates = np.nonzero(small_map >= bound)
+    if len(candidates[0]) > 64:
+        return _from_full_map()
+
+    best_value, best_index = -1.0, 0
+    for cy, cx in zip(*candidates):
+        rows, cols = _near(y0, y1, cy), _near(x0, x1, cx)
+        values = _evaluate(rows, cols)
+        r, c = np.unravel_index(int(np.argmax(values)), values.shape)
+        value, index = float(values[r, c]), int(rows[r]) * w + int(cols[c])
+        if value > best_value or (value == best_value and index < best_index):
+            best_value, best_index = value, index
+    return (best_index % w, best_index // w), min(max(best_value, 0.0), 1.0)
+
+
+def _calculate_saliency_result(gray_img: np.ndarray, resize_to: int = 256,
+                               response: np.ndarray | None = None,
+                               preview: np.ndarray | None = None) -> SaliencyResult:
+    """
+    Compute a fast spectral residual saliency map (Hou & Zhang) on the grayscale image.
+
+    Steps (fast approximate implementation):
+    - Resize to a small square to speed up FFT operations.
+    - Compute log amplitude and phase via a real-input FFT (float32 throughout).
+    - Smooth the log amplitude and compute the spectral residual.
+    - Inverse FFT to obtain a saliency map, blur and normalize.
+    - Locate the peak analytically in full-resolution coordinates (no full-size map).
+
+    `response` is this image's precomputed spectral residual (see _calculate_saliency_batch)
+    and `preview` the downscale it was computed from, kept for the perceptual hash.
+    """
+    h, w = gray_img.shape[:2]
+    try:
+        if response is None:
+            preview = cv2.resize(gray_img, (resize_to, resize_to), interpolation=cv2.INTER_AREA)
+            response = _spectral_residual(preview.astype(np.float32))
+        small_map = _normalize_saliency(response)
+        peak_xy, peak = _upsampled_peak(small_map, (h, w))
+        return SaliencyResult(small_map, (h, w), peak_xy, peak, preview)
+    except Exception as e:
+        logger.debug(f"Saliency computation failed: {e}")
+        # Fallback: uniform (no saliency)
+        return SaliencyResult(np.zeros((resize_to, resize_to), np.float32), (h, w), (0, 0), 0.0)
+
+
+# Frames per batched saliency FFT. Whole-stack FFTs measured slower than one frame at a
+# time because the complex intermediates fall out of cache; small batches keep them in.
+_SALIENCY_BATCH_FRAMES = 4
+
+
+def _calculate_saliency_batch(gray_frames: np.ndarray, resize_to: int = 256) -> list[SaliencyResult]:
+    """
+    Saliency for a stack of same-size grayscale frames shaped (N, H, W): the frames are
+    resized into one (N, resize_to, resize_to) array and the spectral residual runs as
+    batched FFTs over it. Per frame results are identical to _calculate_saliency_result.
+    """
+    try:
+        previews = np.stack([cv2.resize(gray, (resize_to, resize_to), interpolation=cv2.INTER_AREA)
+                             for gray in gray_frames])
+        small = previews.astype(np.float32)
+        responses = np.concatenate([_spectral_residual(small[i:i + _SALIENCY_BATCH_FRAMES])
+                                    for i in range(0, len(small), _SALIENCY_BATCH_FRAMES)])
+    except Exception as e:
+        logger.debug(f"Batched saliency computation failed: {e}")
+        previews = responses = [None] * len(gray_frames)  # Per-frame path reports its own failures
+    return [_calculate_saliency_result(gray, resize_to, response, preview)
+            for gray, response, preview in zip(gray_frames, responses, previews)]
+
+
+def _calculate_saliency(gray_img: np.ndarray, resize_to: int = 256) -> np.ndarray:
+    """
+    Full-resolution saliency map. Returns a float32 map in range [0, 1] with the same
+    shape as the input; prefer _calculate_saliency_result unless the map itself is needed.
+    """
+    return _calculate_saliency_result(gray_img, resize_to).full_map()
+
+
+@dataclass
+class ImageStats:
+    """
+    Per-image statistics shared by the exposure, noise, color balance and dynamic range
+    metrics, so each of them reads precomputed values instead of sweeping the image again.
+    """
+    gray_hist: np.ndarray | None        # 256-bin grayscale histogram (pixel counts), None from batches
+    mean_intensity: float
+    gray_min: int | None                # darkest / brightest gray level, None if the image is empty
+    gray_max: int | None
+    channel_means: np.ndarray | None    # per-channel (B, G, R) means, None without a color image
+    channel_stds: np.ndarray | None     # None from batches and bands (unused by the metrics)
+    noise_std: float | None             # std of the top-left noise sample, None if the image is empty
+
+
+def _channel_stats(img: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Per-channel means and standard deviations in one cv2.meanStdDev pass."""
+    means, stds = cv2.meanStdDev(img)
+    n = img.shape[0] * img.shape[1]
+    # meanStdDev multiplies by 1/n; channel sums are integers, so recover them exactly
+    # and divide, giving the same means as np.mean(img, axis=(0, 1)).
+    means = np.rint(means.ravel() * n) / n
+    return means, stds.ravel()
+
+
+def _compute_image_stats(gray_img: np.ndarray, img: np.ndarray | None = None, noise_roi_size: int = 50) -> ImageStats:
+    """
+    Fused statistics pass: one histogram over the grayscale image, one meanStdDev over the
+    color image and the noise sample. The mean intensity is derived from the histogram.
+    """
+    hist = cv2.calcHist([gray_img], [0], None, [256], [0, 256]).ravel().astype(np.float64)
+    n = gray_img.shape[0] * gray_img.shape[1]
+    mean_intensity = float(hist @ np.arange(256, dtype=np.float64)) / n if n else 0.0
+    active_bins = np.flatnonzero(hist)
+    gray_min, gray_max = (int(active_bins[0]), int(active_bins[-1])) if active_bins.size else (None, None)
+
+    channel_means = channel_stds = None
+    if img is not None:
+        channel_means, channel_stds = _channel_stats(img)
+
+    noise_region = gray_img[:noise_roi_size, :noise_roi_size]
+    noise_std = float(np.std(noise_region)) if noise_region.size else None
+    return ImageStats(hist, mean_intensity, gray_min, gray_max, channel_means, channel_stds, noise_std)
+
+
+def _compute_batch_stats(gray_frames: np.ndarray, frames: np.ndarray, noise_roi_size: int = 50) -> list[ImageStats]:
+    """
+    ImageStats for a stack of same-size frames, (N, H, W) grayscale and (N, H, W, 3) BGR,
+    from whole-stack reductions instead of one pass per image. Pixel sums are exact
+    integers (column sums in uint32, then per-frame totals in uint64), so the means match
+    the per-image path bit for bit. No histogram is built; gray min/max come directly.
+    """
+    count, h, w = gray_frames.shape
+    n = h * w
+    if n == 0:
+        return [_compute_image_stats(gray, frame, noise_roi_size) for gray, frame in zip(gray_frames, frames)]
+    gray_sums = gray_frames.sum(axis=1, dtype=np.uint32).sum(axis=1, dtype=np.uint64)
+    channel_sums = frames.reshape(count, h, w * 3).sum(axis=1, dtype=np.uint32) \
+        .reshape(count, w, 3).sum(axis=1, dtype=np.uint64)
+    flat = gray_frames.reshape(count, n)
+    gray_min, gray_max = flat.min(axis=1), flat.max(axis=1)
+    noise_std = np.std(gray_frames[:, :noise_roi_size, :noise_roi_size], axis=(1, 2))
+    return [ImageStats(None, float(gray_sums[i]) / n, int(gray_min[i]), int(gray_max[i]),
+                       channel_sums[i] / n, None, float(noise_std[i]))
+            for i in range(count)]
+
+
+def _calculate_exposure(gray_img: np.ndarray, stats: ImageStats | None = None) -> tuple[float, str]:
+    """Calculates image exposure based on mean intensity."""
+    if stats is None:
+        stats = _compute_image_stats(gray_img)
+    mean_intensity = stats.mean_intensity
+    ideal_mean = get_config().exposure_ideal_mean
+    score = max(0.0, 1.0 - abs(mean_intensity -
+                ideal_mean) / ideal_mean)
+    explanation = "Brightness is balanced with details in shadows and highlights." if score > 0.8 \
+                  else "Image is slightly over/underexposed."
+    return score, explanation
+
+
+def _calculate_noise(
+    gray_img: np.ndarray, normalization_factor: float | None = None, roi_size: int = 50,
+    stats: ImageStats | None = None
+) -> tuple[float, str]:
+    """Estimates image noise from a sample region."""
+    # Using a small top-left region; for more robustness, consider analyzing multiple patches
+    # or using more advanced noise estimation techniques if this proves insufficient.
+    if stats is None:
+        stats = _compute_image_stats(gray_img, noise_roi_size=roi_size)
+    if stats.noise_std is None:  # Handle very small images
+        return 0.0, "Image too small to reliably estimate noise."
+
+    noise_level = stats.noise_std
+    score = max(1.0 - noise_level / (normalization_factor or get_config().noise_normalization), 0.0)
+    explanation = "Minimal noise detected." if score > 0.8 else "Noticeable graininess present."
+    return score, explanation
+
+
+def _calculate_color_balance(img: np.ndarray, stats: ImageStats | None = None) -> tuple[float, str]:
+    """Assesses color balance by comparing mean values of color channels."""
+    if stats is not None and stats.channel_means is not None:
+        rgb_means = stats.channel_means  # Mean of B, G, R channels
+    else:
+        rgb_means, _ = _channel_stats(img)
+    # Score is higher if the standard deviation of channel means is low relative to their average
+    score = max(0.0, 1.0 - np.std(rgb_means) / (np.mean(rgb_means) +
+                1e-6)) if np.mean(rgb_means) > 1e-6 else 0.0
+    explanation = "Colors are natural and balanced." if score > 0.8 else "Slight color cast detected."
+    return score, explanation
+
+
+def _calculate_dynamic_range(gray_img: np.ndarray, stats: ImageStats | None = None) -> tuple[float, str]:
+    """Calculates dynamic range from the histogram of the grayscale image."""
+    if stats is None:
+        stats = _compute_image_stats(gray_img)
+    if stats.gray_max is not None:
+        # Difference between highest and lowest active histogram bin
+        dynamic_range_val = stats.gray_max - stats.gray_min
+        score = min(float(dynamic_range_val) / get_config().dynamic_range_max, 1.0)
+    else:  # Flat image (e.g., all black or all white)
+        score = 0.0
+    explanation = "Wide dynamic range with details in all tones." if score > 0.8 \
+                  else "Limited dynamic range with some detail loss."
+    return score, explanation
+
+
+def _generate_assessment_summary(
+    overall_confidence: float,
+    focus_area_explanation: str,
+    main_subject_name: str | None,
+    sharpness_score: float,
+    exposure_score: float,
+    noise_score: float,
+    color_balance_score: float,
+    dynamic_range_score: float,
+    detected_object_names: set[str]
+) -> tuple[str, str, str]:
+    """Generates judgement, judgement description, and image description based on scores."""
+    config = get_config()
+    judgement = (
+        "Excellent" if overall_confidence >= config.judgement_excellent else
+        "Good" if overall_confidence >= config.judgement_good else
+        "Fair" if overall_confidence >= config.judgement_fair else
+        "Poor" if overall_confidence >= config.judgement_poor else
+        "Very Poor"
+    )
+
+    jd_parts = []
+    # Overall quality statement
+    if overall_confidence >= 0.9:
+        jd_parts.append("Overall technical quality is excellent.")
+    elif overall_confidence >= 0.7:
+        jd_parts.append("Overall technical quality is good.")
+    elif overall_confidence >= 0.5:
+        jd_parts.append("Overall technical quality is fair.")
+    else:
+        jd_parts.append("Overall technical quality is poor.")
+
+    # Subject assessment
+    if "central" in focus_area_explanation.lower() or "no clear main subject" in focus_area_explanation.lower():
+        jd_parts.append("No distinct detected subject; focus assessed using a central crop heuristic.")
+    elif main_subject_name:
+        jd_parts.append(
+            f"A main subject ('{main_subject_name}') was identified for focus assessment.")
+    else:  # Fallback if main_subject_name is None but some detection happened
+        jd_parts.append("A main subject was identified for focus assessment.")
+
+    # Sharpness
+    if sharpness_score > 0.8:
+        jd_parts.append("Sharpness is excellent.")
+    elif sharpness_score > 0.6:
+        jd_parts.append("Sharpness is good.")
+    elif sharpness_score > 0.4:
+        jd_parts.append("Sharpness is acceptable.")
+    else:
+        jd_parts.append("The image appears blurry or lacks sharpness.")
+
+    # Exposure
+    if exposure_score > 0.85:
+        jd_parts.append("Exposure is well-balanced.")
+    elif exposure_score > 0.7:
+        jd_parts.append("Exposure is generally good.")
+    elif exposure_score > 0.5:
+        jd_parts.append("Exposure is somewhat uneven.")
+    else:
+        jd_parts.append(
+            "The image suffers from poor exposure (likely over or underexposed).")
+
+    # Other issues/strengths
+    issues, strengths = [], []
+    if noise_score < 0.6:
+        issues.append("noticeable noise")
+    elif noise_score > 0.85:
+        strengths.append("minimal noise")
+    if color_balance_score < 0.7:
+        issues.append("a potential color cast")
+    elif color_balance_score > 0.85:
+        strengths.append("good color balance")
+    if dynamic_range_score < 0.6:
+        issues.append("limited dynamic range")
+    elif dynamic_range_score > 0.85:
+        strengths.append("a wide dynamic range")
+
+    if issues:
+        jd_parts.append(f"Key issues include: {', '.join(issues)}.")
+    elif strengths and not issues:  # Only add strengths if no major issues were listed
+        jd_parts.append(
+            f"Additional strengths include: {', '.join(strengths)}.")
+
+    judgement_description = " ".join(jd_parts)
+    image_description = f"Image containing: {', '.join(sorted(list(detected_object_names)))}." \
+        if detected_object_names else "Image with no prominent objects detected."
+
+    return judgement, judgement_description, image_description
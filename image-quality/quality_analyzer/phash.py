@@ -0,0 +1,160 @@
+"""
+Perceptual hashes of the 256x256 saliency previews and a persistent near-duplicate index
+over them (SQLite, standard library only), to spot retakes and repeated captures.
+"""
+import logging
+import sqlite3
+import threading
+from itertools import combinations
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PHASH_BITS = 64
+# The index splits each hash into this many 16-bit chunks (multi-index hashing).
+_CHUNKS = 4
+_CHUNK_BITS = PHASH_BITS // _CHUNKS
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+# Bound parameters per SQL statement, below SQLite's oldest default limit.
+_MAX_SQL_VARIABLES = 900
+# Default --dup_distance: retakes and re-encodes of one scene typically land within it.
+DUP_DISTANCE = 8
+
+
+def perceptual_hash(preview: np.ndarray) -> str:
+    """
+    64-bit DCT perceptual hash (pHash) of a grayscale preview, as 16 hex digits: the
+    preview is reduced to 32x32, and each bit tells whether one of the 8x8 lowest
+    frequency DCT coefficients is above their median (the DC term is left out of the
+    median, as it only carries the mean brightness).
+    """
+    small = cv2.resize(preview, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return f"{int(np.packbits(bits).view('>u8')[0]):016x}"
+
+
+def hamming_distance(a: str | int, b: str | int) -> int:
+    """Number of differing bits between two hashes (hex strings or integers)."""
+    return (_as_int(a) ^ _as_int(b)).bit_count()
+
+
+def _as_int(phash: str | int) -> int:
+    return int(phash, 16) if isinstance(phash, str) else phash
+
+
+def _chunks(value: int) -> list[int]:
+    return [(value >> (_CHUNK_BITS * i)) & _CHUNK_MASK for i in range(_CHUNKS)]
+
+
+def _chunk_neighbours(chunk: int, radius: int) -> list[int]:
+    """Every chunk value within `radius` bits of `chunk`, `chunk` itself first."""
+    values = [chunk]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(_CHUNK_BITS), flips):
+            values.append(chunk ^ sum(1 << bit for bit in bits))
+    return values
+
+
+class PhashIndex:
+    """
+    SQLite index of perceptual hashes, keyed by an image identifier (e.g. its path), that
+    answers "which stored images lie within Hamming distance d" without a full scan.
+
+    Multi-index hashing: each 64-bit hash is split into four 16-bit chunks, each with its
+    own B-tree index. Two hashes within distance d agree to within d // 4 bits on at least
+    one chunk (pigeonhole), so a query only reads the rows whose chunks fall in those
+    small Hamming balls and checks their full distance. For d <= 11 that is at most 4 x 137
+    bucket lookups, independent of the number of stored hashes (a few ms over 200k
+    hashes). The balls grow quickly past that: from d = 16 a query costs about as much
+    as a scan, and such distances also match unrelated images.
+
+    Rows are committed in groups of `commit_every` (and on close), like ScanJournal.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, commit_every: int = 256):
+        self.path = path
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        chunk_columns = ", ".join(f"c{i} INTEGER NOT NULL" for i in range(_CHUNKS))
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS hashes (key TEXT PRIMARY KEY, hash INTEGER NOT NULL, "
+                         f"{chunk_columns})")
+        for i in range(_CHUNKS):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS hashes_c{i} ON hashes (c{i})")
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM hashes WHERE key = ?", (key,)).fetchone() is not None
+
+    def add(self, key: str, phash: str | int):
+        """Stores (or replaces) the hash of one image."""
+        value = _as_int(phash)
+        signed = value - (1 << PHASH_BITS) if value >> (PHASH_BITS - 1) else value  # SQLite integers are signed
+        with self._lock:
+            self._db.execute(f"INSERT OR REPLACE INTO hashes VALUES (?, ?{', ?' * _CHUNKS})",
+                             (key, signed, *_chunks(value)))
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._commit()
+
+    def query(self, phash: str | int, max_distance: int = DUP_DISTANCE, limit: int | None = None,
+              exclude: str | None = None) -> list[dict]:
+        """
+        Stored images within `max_distance` bits of `phash`, nearest first, as
+        [{"file": key, "distance": d}, ...] (at most `limit`; `exclude` is left out, e.g.
+        the image itself).
+        """
+        value = _as_int(phash)
+        radius = max_distance // _CHUNKS
+        candidates: dict[str, int] = {}
+        with self._lock:
+            for i, chunk in enumerate(_chunks(value)):
+                neighbours = _chunk_neighbours(chunk, radius)
+                for start in range(0, len(neighbours), _MAX_SQL_VARIABLES):
+                    batch = neighbours[start:start + _MAX_SQL_VARIABLES]
+                    candidates.update(self._db.execute(
+                        f"SELECT key, hash FROM hashes WHERE c{i} IN ({', '.join('?' * len(batch))})", batch))
+        matches = []
+        for key, stored in candidates.items():
+            distance = (value ^ (stored & ((1 << PHASH_BITS) - 1))).bit_count()
+            if distance <= max_distance and key != exclude:
+                matches.append({"file": key, "distance": distance})
+        matches.sort(key=lambda match: (match["distance"], match["file"]))
+        return matches[:limit] if limit is not None else matches
+
+    def _commit(self):
+        self._db.commit()
+        self._uncommitted = 0
+
+    def commit(self):
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        with self._lock:
+            self._commit()
+            self._db.close()
+
+
+def attach_near_duplicates(result: dict, index: PhashIndex, key: str | None = None,
+                           max_distance: int = DUP_DISTANCE) -> dict:
+    """
+    Adds "near_duplicates" (see PhashIndex.query) to a result, then indexes the result's
+    hash under `key`, if given, so later images can match it.
+    """
+    result["near_duplicates"] = index.query(result["phash"], max_distance, exclude=key)
+    if key is not None:
+        index.add(key, result["phash"])
+    return result
@@ -0,0 +1,253 @@
+"""
+Threaded decode-prefetch pipeline for batch runs: reader threads decode ahead into a
+bounded queue while compute threads score, and file moves run on their own I/O thread.
+"""
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from collections.abc import Iterable
+
+import numpy as np
+
+from .annotate import AnnotationWriter
+from .cache import ResultCache
+from .evaluate import _decode, _evaluate_image, _read_image_bytes
+from .timing import Deadline, StageTimer
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class QueueDepths:
+    """
+    Depth samples and blocked time of the pipeline queues. A queue is sampled every time
+    an item is taken from it; "wait" is the total time consumers spent blocked on an empty
+    queue and "full_wait" the time producers spent blocked on a full one.
+    Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: dict[str, dict] = {}
+
+    def register(self, name: str, capacity: int):
+        self._queues[name] = {"capacity": capacity, "samples": 0, "depth_sum": 0, "max_depth": 0,
+                              "wait_s": 0.0, "full_wait_s": 0.0}
+
+    def sample(self, name: str, depth: int, wait_s: float = 0.0):
+        with self._lock:
+            stats = self._queues[name]
+            stats["samples"] += 1
+            stats["depth_sum"] += depth
+            stats["max_depth"] = max(stats["max_depth"], depth)
+            stats["wait_s"] += wait_s
+
+    def full_wait(self, name: str, wait_s: float):
+        with self._lock:
+            self._queues[name]["full_wait_s"] += wait_s
+
+    def report(self) -> dict:
+        """{queue: {capacity, mean_depth, max_depth, wait_ms, full_wait_ms}}"""
+        with self._lock:
+            return {name: {"capacity": stats["capacity"],
+                           "mean_depth": round(stats["depth_sum"] / stats["samples"], 2) if stats["samples"] else 0.0,
+                           "max_depth": stats["max_depth"],
+                           "wait_ms": round(stats["wait_s"] * 1000.0, 1),
+                           "full_wait_ms": round(stats["full_wait_s"] * 1000.0, 1)}
+                    for name, stats in self._queues.items()}
+
+    def format(self) -> str:
+        lines = [f"{'queue':<10} {'capacity':>8} {'mean':>6} {'max':>5} {'empty wait ms':>14} {'full wait ms':>13}"]
+        for name, stats in self.report().items():
+            capacity = stats["capacity"] or "-"  # 0 = unbounded
+            lines.append(f"{name:<10} {capacity:>8} {stats['mean_depth']:>6.2f} {stats['max_depth']:>5} "
+                         f"{stats['wait_ms']:>14.1f} {stats['full_wait_ms']:>13.1f}")
+        return "\n".join(lines)
+
+
+def _timed_put(q: queue.Queue, item, depths: QueueDepths, name: str):
+    start = time.perf_counter()
+    q.put(item)
+    depths.full_wait(name, time.perf_counter() - start)
+
+
+def _timed_get(q: queue.Queue, depths: QueueDepths, name: str):
+    start = time.perf_counter()
+    item = q.get()
+    depths.sample(name, q.qsize(), time.perf_counter() - start)
+    return item
+
+
+def iter_pipelined_results(image_paths: Iterable[str], readers: int, workers: int,
+                           cache: ResultCache | None = None, queue_depth: int | None = None,
+                           depths: QueueDepths | None = None, annotator: AnnotationWriter | None = None,
+                           **options):
+    """
+    Yields (image_path, result, error) like _iter_batch_results, scoring in this process.
+
+    `readers` threads pull paths from `image_paths` and read/decode them (cv2 releases
+    the GIL while decoding) into a "decoded" queue of at most `queue_depth` frames
+    (default: 2 x workers), which bounds memory. `workers` compute threads score the
+    frames and pass results to a "results" queue drained by the caller. With a `cache`,
+    readers read the bytes and answer hits directly, so hits never wait behind scoring.
+    Depth and blocked-time samples of both queues are collected in `depths`. With an
+    `annotator`, compute threads hand each scored frame to its writer pool. A "deadline_ms"
+    option starts counting when a reader picks the image up, so time spent waiting in the
+    decoded queue counts against it. "low_memory" streams the Laplacian as usual, but
+    threads share one process peak, so results carry no per-image "memory" report.
+    """
+    timings = options.get("timings", False)
+    focus_map = options.get("focus_map", False)
+    preview_scale = options.get("preview_scale", 1)
+    cascade = options.get("cascade", False)
+    raw_features = options.get("raw_features", False)
+    deadline_ms = options.get("deadline_ms")
+    bands = options.get("bands", 1)
+    low_memory = options.get("low_memory", False)
+    phash = options.get("phash", False)
+    readers = max(1, readers)
+    workers = max(1, workers)
+    queue_depth = max(1, queue_depth or 2 * workers)
+    depths = depths if depths is not None else QueueDepths()
+    decoded: queue.Queue = queue.Queue(maxsize=queue_depth)
+    results: queue.Queue = queue.Queue()
+    depths.register("decoded", queue_depth)
+    depths.register("results", 0)
+    stop = threading.Event()
+    paths = iter(image_paths)
+    paths_lock = threading.Lock()
+
+    def read_loop():
+        nonlocal active_readers
+        try:
+            while not stop.is_set():
+                with paths_lock:
+                    image_path = next(paths, None)
+                if image_path is None:
+                    break
+                timer = StageTimer(timings)
+                deadline = Deadline(deadline_ms)
+                try:
+                    cache_key = None
+                    if cache is not None:
+                        with timer.stage("read"):
+                            buf = _read_image_bytes(image_path)
+                        with timer.stage("cache_lookup"):
+                            cache_key = cache.key(buf, focus_map=focus_map, preview_scale=preview_scale,
+                                                  cascade=cascade, raw_features=raw_features, phash=phash)
+                            cached = cache.get(cache_key)
+                        if cached is not None:
+                            if timer.enabled:
+                                cached["timings"] = timer.report()
+                            if annotator is not None:
+                                annotator.submit(image_path, cached, None)
+                            results.put((image_path, cached, None))
+                            continue
+                        with timer.stage("decode"):
+                            img = _decode(np.frombuffer(buf, dtype=np.uint8), preview_scale)
+                    else:
+                        with timer.stage("decode"):
+                            img = _decode(image_path, preview_scale)
+                    if img is None:
+                        raise ValueError(f"Failed to load image: {image_path}")
+                except Exception as e:
+                    results.put((image_path, None, e))
+                    continue
+                _timed_put(decoded, (image_path, img, timer, deadline, cache_key), depths, "decoded")
+        finally:
+            with readers_lock:
+                active_readers -= 1
+                last_reader = active_readers == 0
+            if last_reader:
+                # One end marker per compute thread, once every reader is done
+                for _ in range(workers):
+                    _timed_put(decoded, _DONE, depths, "decoded")
+
+    def compute_loop():
+        try:
+            while not stop.is_set():
+                item = _timed_get(decoded, depths, "decoded")
+                if item is _DONE:
+                    break
+                image_path, img, timer, deadline, cache_key = item
+                try:
+                    result = _evaluate_image(img, focus_map=focus_map, preview_scale=preview_scale,
+                                             timer=timer, cascade=cascade, raw_features=raw_features,
+                                             deadline=deadline, bands=bands, low_memory=low_memory,
+                                             phash=phash)
+                    if cache_key is not None:
+                        cache.put(cache_key, result)
+                    if timer.enabled:
+                        result["timings"] = timer.report()
+                    if annotator is not None:
+                        annotator.submit(image_path, result, img, preview_scale)
+                    results.put((image_path, result, None))
+                except Exception as e:
+                    results.put((image_path, None, e))
+        finally:
+            results.put(_DONE)
+
+    active_readers = readers
+    readers_lock = threading.Lock()
+    threads = [threading.Thread(target=read_loop, name=f"analyzer-reader-{i}", daemon=True) for i in range(readers)]
+    threads += [threading.Thread(target=compute_loop, name=f"analyzer-compute-{i}", daemon=True)
+                for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    running_workers = workers
+    try:
+        while running_workers:
+            item = _timed_get(results, depths, "results")
+            if item is _DONE:
+                running_workers -= 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        # Unblock readers waiting on a full queue so the threads can exit
+        while any(thread.is_alive() for thread in threads[:readers]):
+            try:
+                decoded.get_nowait()
+            except queue.Empty:
+                time.sleep(0.001)
+
+
+class FileMover:
+    """
+    Moves files on a background I/O thread so --move never blocks scoring. Failures
+    are logged like the synchronous path; close() waits for pending moves.
+    """
+
+    def __init__(self, depths: QueueDepths | None = None):
+        self._queue: queue.Queue = queue.Queue()
+        self._depths = depths
+        if depths is not None:
+            depths.register("moves", 0)
+        self._thread = threading.Thread(target=self._run, name="analyzer-mover", daemon=True)
+        self._thread.start()
+
+    def submit(self, src_path: str, destination_path: str):
+        self._queue.put((src_path, destination_path))
+
+    def _run(self):
+        while True:
+            item = (_timed_get(self._queue, self._depths, "moves") if self._depths is not None
+                    else self._queue.get())
+            if item is _DONE:
+                return
+            src_path, destination_path = item
+            try:
+                os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+                shutil.move(src_path, destination_path)
+                logger.debug(f"Moved {src_path} to {destination_path}")
+            except OSError as e:
+                logger.error(f"Failed to move {src_path}: {e}")
+
+    def close(self):
+        self._queue.put(_DONE)
+        self._thread.join()
@@ -0,0 +1,87 @@
+"""
+Raw pixel input: uncompressed RGBA/BGRA/RGB/BGR frames (e.g. canvas ImageData) given as
+a buffer, over a pipe or in a memory-mapped file, wrapped as NumPy arrays without copying.
+"""
+import mmap
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import cv2
+import numpy as np
+
+# pixel_format: (channels, cvtColor code to grayscale, indices of the B, G, R channels)
+PIXEL_FORMATS = {
+    "rgba": (4, cv2.COLOR_RGBA2GRAY, (2, 1, 0)),
+    "bgra": (4, cv2.COLOR_BGRA2GRAY, (0, 1, 2)),
+    "rgb": (3, cv2.COLOR_RGB2GRAY, (2, 1, 0)),
+    "bgr": (3, cv2.COLOR_BGR2GRAY, (0, 1, 2)),
+}
+
+
+@dataclass(frozen=True)
+class PixelLayout:
+    """
+    Geometry of a raw 8-bit frame: `stride` is the distance between rows in bytes
+    (default: tightly packed rows) and `offset` where the first row starts in the buffer.
+    """
+    width: int
+    height: int
+    pixel_format: str = "rgba"
+    stride: int | None = None
+    offset: int = 0
+
+    def __post_init__(self):
+        if self.pixel_format not in PIXEL_FORMATS:
+            raise ValueError(f"Unsupported pixel format {self.pixel_format!r}; use one of {', '.join(PIXEL_FORMATS)}.")
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError(f"Invalid frame size {self.width}x{self.height}.")
+        if self.stride is not None and self.stride < self.row_bytes:
+            raise ValueError(f"Stride {self.stride} is shorter than a row of {self.row_bytes} bytes.")
+        if self.offset < 0:
+            raise ValueError(f"Invalid offset {self.offset}.")
+
+    @property
+    def channels(self) -> int:
+        return PIXEL_FORMATS[self.pixel_format][0]
+
+    @property
+    def row_bytes(self) -> int:
+        return self.width * self.channels
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes the frame spans from `offset` (the last row needs no padding)."""
+        return (self.stride or self.row_bytes) * (self.height - 1) + self.row_bytes
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def wrap_pixels(buf, layout: PixelLayout) -> np.ndarray:
+    """
+    (height, width, channels) uint8 view of a raw frame inside `buf` (bytes, bytearray,
+    memoryview, mmap or array), honouring the row stride. No pixel is copied; the view
+    keeps `buf` alive and must be dropped before an mmap is closed.
+    """
+    view = memoryview(buf).cast("B")
+    if view.nbytes < layout.offset + layout.nbytes:
+        raise ValueError(f"Pixel buffer holds {view.nbytes} bytes; a {layout.width}x{layout.height} "
+                         f"{layout.pixel_format} frame needs {layout.offset + layout.nbytes}.")
+    return np.ndarray((layout.height, layout.width, layout.channels), dtype=np.uint8, buffer=view,
+                      offset=layout.offset, strides=(layout.stride or layout.row_bytes, layout.channels, 1))
+
+
+def frame_bytes(buf, layout: PixelLayout) -> memoryview:
+    """The bytes of `buf` the frame spans (what the result cache hashes)."""
+    return memoryview(buf).cast("B")[layout.offset:layout.offset + layout.nbytes]
+
+
+@contextmanager
+def mapped_file(path: str):
+    """Read-only memory map of a whole file, e.g. a frame written to /dev/shm."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped
+    finally:
+        mapped.close()
@@ -0,0 +1,276 @@
+"""Persistent worker mode: newline-delimited JSON requests on stdin, responses on stdout."""
+import base64
+import json
+import logging
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from . import timing
+from .batch import _init_pool_worker
+from .cache import ResultCache
+from .config import get_config
+from .evaluate import _pixels_cache_key, _read_image_bytes, evaluate_photo_bytes, evaluate_photo_pixels, select_best_frames
+from .phash import DUP_DISTANCE, PhashIndex, attach_near_duplicates
+from .pixels import PixelLayout, mapped_file
+from .timing import StageTimer, TimingStats
+
+logger = logging.getLogger(__name__)
+
+
+# --- Persistent Worker (Server) Mode ---
+
+def _request_options(request: dict, timings: bool = False) -> dict:
+    """Evaluation options carried by a server request; `timings` is the server-wide default."""
+    return {"focus_map": bool(request.get("focus_map", False)),
+            "preview_scale": int(request.get("preview_scale", 1)),
+            "cascade": bool(request.get("cascade", False)),
+            "raw_features": bool(request.get("raw_features", False)),
+            "phash": bool(request.get("phash", False)),
+            "deadline_ms": float(request["deadline_ms"]) if request.get("deadline_ms") is not None else None,
+            "bands": int(request.get("bands", 1)),
+            "low_memory": bool(request.get("low_memory", False)),
+            "timings": bool(request.get("timings", timings))}
+
+
+def _request_image_bytes(request: dict) -> bytes:
+    """Encoded image bytes of a server request (inline base64, a file path, or pre-read bytes)."""
+    if "image_bytes" in request:  # Internal: already read by the serving process
+        return request["image_bytes"]
+    if "image_b64" in request:
+        return base64.b64decode(request["image_b64"], validate=True)
+    if "path" in request:
+        return _read_image_bytes(request["path"])
+    raise ValueError("Request needs either 'path' or 'image_b64'.")
+
+
+def _request_pixel_layout(request: dict) -> PixelLayout | None:
+    """Layout of a raw-pixel request ("pixels_path" or "pixels_length"), None for encoded images."""
+    if "pixels_path" not in request and "pixels_bytes" not in request:
+        return None
+    if int(request.get("preview_scale", 1)) != 1:
+        raise ValueError("preview_scale is not supported for raw pixels.")
+    return PixelLayout(int(request["width"]), int(request["height"]), request.get("pixel_format", "rgba"),
+                       int(request["stride"]) if request.get("stride") is not None else None,
+                       int(request.get("offset", 0)))
+
+
+def _request_pixels(request: dict):
+    """Context yielding the pixel buffer of a raw-pixel request (memory-mapped for "pixels_path")."""
+    if "pixels_bytes" in request:  # Read from stdin (after a "pixels_length" line) by the serving process
+        return nullcontext(request["pixels_bytes"])
+    return mapped_file(request["pixels_path"])
+
+
+def _handle_request(request: dict, cache: ResultCache | None = None, timings: bool = False) -> dict:
+    """Evaluates a single server request and wraps the outcome in a response envelope."""
+    request_id = request.get("id")
+    try:
+        options = _request_options(request, timings)
+        layout = _request_pixel_layout(request)
+        if layout is not None:
+            options.pop("preview_scale")
+            with _request_pixels(request) as pixels:
+                result = evaluate_photo_pixels(pixels, layout.width, layout.height, layout.pixel_format,
+                                               layout.stride, layout.offset, cache=cache, **options)
+        else:
+            result = evaluate_photo_bytes(_request_image_bytes(request), cache=cache, **options)
+        return {"id": request_id, "ok": True, "result": result}
+    except Exception as e:
+        return {"id": request_id, "ok": False, "error": str(e)}
+
+
+def _handle_burst_request(request: dict) -> dict:
+    """Runs select_best_frames for a {"cmd": "burst"} request carrying "paths" or "images_b64"."""
+    request_id = request.get("id")
+    try:
+        if "images_b64" in request:
+            frames = [base64.b64decode(image, validate=True) for image in request["images_b64"]]
+        elif "paths" in request:
+            frames = [_read_image_bytes(path) for path in request["paths"]]
+        else:
+            raise ValueError("Burst request needs either 'paths' or 'images_b64'.")
+        options = _request_options(request)
+        top_k = request.get("top_k")
+        result = select_best_frames(frames, top_k=int(top_k) if top_k is not None else None,
+                                    focus_map=options["focus_map"], preview_scale=options["preview_scale"])
+        return {"id": request_id, "ok": True, "result": result}
+    except Exception as e:
+        return {"id": request_id, "ok": False, "error": str(e)}
+
+
+def _with_near_duplicates(response: dict, index: PhashIndex | None, request: dict) -> dict:
+    """
+    Adds "near_duplicates" from `index` to a successful response and indexes the image
+    under the request's "key" (default: its "path"), unless it sets "dedup": false.
+    """
+    if index is None or not response.get("ok") or not request.get("dedup", True):
+        return response
+    attach_near_duplicates(response["result"], index, request.get("key", request.get("path")),
+                           int(request.get("dup_distance", DUP_DISTANCE)))
+    return response
+
+
+def serve(workers: int | None = 1, max_in_flight: int | None = None, cache: ResultCache | None = None,
+          timings: bool = False, phash_index: PhashIndex | None = None):
+    """
+    Runs as a long-lived analyzer that keeps cv2/numpy and the configuration warm.
+
+    Requests are newline-delimited JSON objects on stdin, e.g. {"id": 1, "path": "/tmp/x.png"}
+    or {"id": 2, "image_b64": "<base64 PNG/JPEG bytes>"}, and each produces exactly one JSON
+    line on stdout: {"id": 1, "ok": true, "result": {...}} or {"id": 1, "ok": false, "error": "..."}. With more than one worker, requests are scored
+    by a process pool and responses may arrive out of order, so callers should match on "id".
+    Requests may also set "focus_map": true to get the dense focus map, "preview_scale"
+    (2, 4 or 8) for a fast reduced-resolution verdict and "cascade": true to stop as soon
+    as an image can no longer reach a Fair judgement. "deadline_ms" asks for a verdict
+    within that budget, counted from when a worker picks the request up; stages that do
+    not fit are skipped or approximated and listed in the result's "deadline" entry.
+    "bands": N scores a large frame over N threads with identical results (see bands.py).
+    "low_memory": true streams the Laplacian instead of holding full-frame tables (same
+    scores) and reports the worker's peak RSS for the image under "memory".
+    "phash": true adds the image's perceptual hash to the result.
+
+    Raw frames skip image encoding altogether (see evaluate_photo_pixels). A request with
+    "width", "height" and optional "pixel_format" (default "rgba"), "stride" and "offset"
+    names either a "pixels_path" to memory-map (e.g. a file in /dev/shm; pool workers
+    map it themselves) or a "pixels_length": the request line is then followed on stdin
+    by exactly that many raw bytes.
+    At most `max_in_flight` requests are queued or running at any time; reading from stdin
+    pauses until a slot frees up. The server exits once stdin is closed and all work is done.
+
+    With a `cache`, lookups happen in this process before any work is dispatched, and
+    {"id": ..., "cmd": "cache_stats"} returns its hit/miss counters.
+
+    Requests may set "timings": true (the default when `timings` is on) to get per-stage
+    timings in the result; {"id": ..., "cmd": "timings"} returns percentiles and
+    histograms aggregated over every timed request so far (see TimingStats).
+    {"id": ..., "cmd": "burst", "paths": [...]} (or "images_b64": [...], optional "top_k")
+    ranks the frames of a burst with select_best_frames.
+
+    With a `phash_index`, results also carry "near_duplicates": previously indexed images
+    within "dup_distance" bits (default DUP_DISTANCE) of the image's perceptual hash. The
+    image is then indexed under the request's "key", or its "path"; images with neither
+    are only looked up, and such requests are scored with "phash": true. "dedup": false
+    skips both. Lookups happen in this process.
+    """
+    workers = max(1, workers or 1)
+    max_in_flight = max(1, max_in_flight or 2 * workers)
+    logger.info(f"Analyzer server ready (workers={workers}, max_in_flight={max_in_flight})")
+
+    write_lock = threading.Lock()
+    timing_stats = TimingStats()
+
+    def _respond(response: dict):
+        result = response.get("result")
+        if response.get("ok") and isinstance(result, dict) and "timings" in result:
+            timing_stats.add(result["timings"])
+        with write_lock:
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                                   initargs=(get_config().path, timing.RESET_PEAK_RSS)) if workers > 1 else None
+    slots = threading.BoundedSemaphore(max_in_flight)
+
+    def _on_done(future, request_id, cache_key, dedup):
+        try:
+            response = future.result()
+            if cache_key is not None and response["ok"]:
+                cache.put(cache_key, response["result"])
+            _respond(_with_near_duplicates(response, phash_index, dedup))
+        except Exception as e:  # Worker crashed or was killed
+            _respond({"id": request_id, "ok": False, "error": f"Worker failed: {e}"})
+        finally:
+            slots.release()
+
+    stdin = sys.stdin.buffer
+    try:
+        for line in iter(stdin.readline, b""):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object.")
+            except ValueError as e:
+                _respond({"id": None, "ok": False, "error": f"Malformed request: {e}"})
+                continue
+            if "pixels_length" in request:
+                # Raw frame bytes follow the request line
+                length = int(request.pop("pixels_length"))
+                request["pixels_bytes"] = stdin.read(length)
+                if len(request["pixels_bytes"]) < length:
+                    _respond({"id": request.get("id"), "ok": False, "error": "stdin closed inside raw pixel data."})
+                    break
+
+            request_id = request.get("id")
+            if request.get("cmd") == "cache_stats":
+                _respond({"id": request_id, "ok": True, "result": cache.stats() if cache is not None else None})
+                continue
+            if request.get("cmd") == "timings":
+                _respond({"id": request_id, "ok": True, "result": timing_stats.report()})
+                continue
+
+            if request.get("cmd") == "burst":
+                if executor is None:
+                    _respond(_handle_burst_request(request))
+                    continue
+                slots.acquire()
+                future = executor.submit(_handle_burst_request, request)
+                future.add_done_callback(lambda f, rid=request_id: _on_done(f, rid, None, {"dedup": False}))
+                continue
+
+            if phash_index is not None and request.get("dedup", True):
+                request["phash"] = True  # The index lookup needs the image's hash
+            if executor is None:
+                _respond(_with_near_duplicates(_handle_request(request, cache, timings), phash_index, request))
+                continue
+
+            # The request sent to the pool may be rewritten below; keep what the lookup needs
+            dedup = {name: request[name] for name in ("dedup", "dup_distance", "key", "path") if name in request}
+            cache_key = None
+            if cache is not None:
+                try:
+                    options = _request_options(request, timings)
+                    timer = StageTimer(options["timings"])
+                    layout = _request_pixel_layout(request)
+                    if layout is not None:
+                        with timer.stage("cache_lookup"), _request_pixels(request) as pixels:
+                            cache_key = _pixels_cache_key(cache, pixels, layout, focus_map=options["focus_map"],
+                                                          cascade=options["cascade"],
+                                                          raw_features=options["raw_features"],
+                                                          phash=options["phash"])
+                            cached = cache.get(cache_key)
+                    else:
+                        with timer.stage("read"):
+                            buf = _request_image_bytes(request)
+                        with timer.stage("cache_lookup"):
+                            cache_key = cache.key(buf, **options)
+                            cached = cache.get(cache_key)
+                except Exception as e:
+                    _respond({"id": request_id, "ok": False, "error": str(e)})
+                    continue
+                if cached is not None:
+                    if timer.enabled:
+                        cached["timings"] = timer.report()
+                    _respond(_with_near_duplicates({"id": request_id, "ok": True, "result": cached},
+                                                   phash_index, request))
+                    continue
+                if layout is None:
+                    request = {"id": request_id, "image_bytes": buf, **options}
+
+            slots.acquire()
+            future = executor.submit(_handle_request, request, None, timings)
+            future.add_done_callback(lambda f, rid=request_id, key=cache_key, dedup=dedup: _on_done(f, rid, key, dedup))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if phash_index is not None:
+            phash_index.commit()
+    if timing_stats.report():
+        logger.info(f"Stage timings:\n{timing_stats.format()}")
+    logger.info("Analyzer server stopped (stdin closed).")
+
+
@@ -0,0 +1,254 @@
+"""Per-stage timing of evaluations, aggregated timing reports and per-image peak memory (standard library only)."""
+import bisect
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_NO_TIMING = nullcontext()
+
+
+class StageTimer:
+    """
+    Wall-clock time of each evaluation stage, in milliseconds.
+
+    Stages are measured with `with timer.stage("name"):`. A disabled timer hands out a
+    shared no-op context instead, so leaving the calls in the hot path costs next to
+    nothing when timings are not requested.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.timings: dict[str, float] = {}
+        self._start = time.perf_counter() if enabled else 0.0
+
+    def stage(self, name: str):
+        return self._measure(name) if self.enabled else _NO_TIMING
+
+    @contextmanager
+    def _measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - start) * 1000.0
+
+    def report(self) -> dict[str, float]:
+        """Per-stage milliseconds plus "total" since the timer was created."""
+        report = {name: round(ms, 3) for name, ms in self.timings.items()}
+        report["total"] = round((time.perf_counter() - self._start) * 1000.0, 3)
+        return report
+
+
+class TimingStats:
+    """
+    Aggregates the "timings" of many results into per-stage percentiles and histograms.
+
+    Samples are counted in fixed log-spaced buckets (20 per decade, 0.01 ms to 100 s), so
+    memory stays constant however long a server runs; percentiles are reported as bucket
+    upper edges and are accurate to about 12%. Safe to share between threads.
+    """
+
+    BUCKET_EDGES_MS = [round(0.01 * 10 ** (i / 20), 4) for i in range(141)]
+
+    def __init__(self):
+        self._stages: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, timings: dict[str, float]):
+        with self._lock:
+            for name, ms in timings.items():
+                entry = self._stages.get(name)
+                if entry is None:
+                    entry = self._stages[name] = {
+                        "count": 0, "sum": 0.0, "max": 0.0,
+                        "buckets": [0] * (len(self.BUCKET_EDGES_MS) + 1)}
+                entry["count"] += 1
+                entry["sum"] += ms
+                entry["max"] = max(entry["max"], ms)
+                entry["buckets"][bisect.bisect_left(self.BUCKET_EDGES_MS, ms)] += 1
+
+    def _percentile(self, entry: dict, q: float) -> float:
+        target = q * entry["count"]
+        seen = 0
+        for i, n in enumerate(entry["buckets"]):
+            seen += n
+            if n and seen >= target:
+                return min(self.BUCKET_EDGES_MS[i], entry["max"]) if i < len(self.BUCKET_EDGES_MS) else entry["max"]
+        return entry["max"]
+
+    def report(self) -> dict:
+        """
+        {stage: {"count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms", "histogram"}},
+        where "histogram" lists [upper_edge_ms, count] for every non-empty bucket.
+        """
+        with self._lock:
+            report = {}
+            for name, entry in self._stages.items():
+                edges = self.BUCKET_EDGES_MS + [None]  # Last bucket is unbounded
+                report[name] = {
+                    "count": entry["count"],
+                    "mean_ms": round(entry["sum"] / entry["count"], 3),
+                    "p50_ms": round(self._percentile(entry, 0.50), 3),
+                    "p90_ms": round(self._percentile(entry, 0.90), 3),
+                    "p99_ms": round(self._percentile(entry, 0.99), 3),
+                    "max_ms": round(entry["max"], 3),
+                    "histogram": [[edges[i], n] for i, n in enumerate(entry["buckets"]) if n],
+                }
+            return report
+
+    def format(self) -> str:
+        """Human-readable per-stage table of the report, slowest mean first."""
+        rows = sorted(self.report().items(), key=lambda item: -item[1]["mean_ms"])
+        lines = [f"{'stage':<16}{'count':>7}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)"]
+        for name, s in rows:
+            lines.append(f"{name:<16}{s['count']:>7}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}"
+                         f"{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+        return "\n".join(lines)
+
+
+class StageCosts:
+    """
+    Predicted cost of the optional evaluation stages, used to decide what fits a deadline.
+
+    Each stage starts from a fixed + per-megapixel prior (measured on a single 2020s
+    desktop core) that is scaled by a running average of observed / predicted time, so
+    predictions adapt to the machine after a few evaluations. Safe to share between threads.
+    """
+
+    PRIORS_MS = {  # stage: (fixed ms, ms per megapixel)
+        "laplacian": (0.2, 11.0),
+        "saliency": (3.0, 2.5),
+        "focus_map": (0.3, 0.0),
+    }
+    SMOOTHING = 0.3
+
+    def __init__(self):
+        self._speed = {name: 1.0 for name in self.PRIORS_MS}
+        self._lock = threading.Lock()
+
+    def _prior_ms(self, stage: str, pixels: int) -> float:
+        fixed, per_megapixel = self.PRIORS_MS[stage]
+        return fixed + per_megapixel * pixels / 1e6
+
+    def predict_ms(self, stage: str, pixels: int) -> float:
+        return self._prior_ms(stage, pixels) * self._speed[stage]
+
+    def observe(self, stage: str, pixels: int, ms: float):
+        ratio = ms / self._prior_ms(stage, pixels)
+        with self._lock:
+            self._speed[stage] += self.SMOOTHING * (ratio - self._speed[stage])
+
+
+STAGE_COSTS = StageCosts()
+
+
+class Deadline:
+    """
+    Time budget of one evaluation, started when the image is first read or decoded.
+
+    allows() tells whether an optional stage is predicted to finish within the remaining
+    budget (see StageCosts); measure() times such a stage and feeds the prediction. The
+    evaluation records what it had to skip or approximate with skip() / approximate().
+    Deadline(None) is unlimited: allows() is always true and nothing is measured.
+    """
+
+    def __init__(self, budget_ms: float | None = None, costs: StageCosts | None = None):
+        self.budget_ms = budget_ms
+        self.costs = costs or STAGE_COSTS
+        self.skipped: list[str] = []
+        self.approximated: list[str] = []
+        self._start = time.perf_counter()
+
+    @property
+    def limited(self) -> bool:
+        return self.budget_ms is not None
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000.0
+
+    def remaining_ms(self) -> float:
+        return float("inf") if self.budget_ms is None else self.budget_ms - self.elapsed_ms()
+
+    def allows(self, stage: str, pixels: int) -> bool:
+        return self.budget_ms is None or self.costs.predict_ms(stage, pixels) <= self.remaining_ms()
+
+    def measure(self, stage: str, pixels: int):
+        return self._measure(stage, pixels) if self.budget_ms is not None else _NO_TIMING
+
+    @contextmanager
+    def _measure(self, stage: str, pixels: int):
+        start = time.perf_counter()
+        yield
+        self.costs.observe(stage, pixels, (time.perf_counter() - start) * 1000.0)
+
+    def skip(self, name: str):
+        self.skipped.append(name)
+
+    def approximate(self, name: str):
+        self.approximated.append(name)
+
+    def report(self) -> dict:
+        """The "deadline" entry of a result."""
+        return {"budget_ms": self.budget_ms, "elapsed_ms": round(self.elapsed_ms(), 3),
+                "skipped": list(self.skipped), "approximated": list(self.approximated)}
+
+
+def _status_mb(field: str) -> float | None:
+    """A memory field of /proc/self/status (e.g. "VmHWM") in MB, None where unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _max_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# Whether PeakRss may reset the process's VmHWM before each image. The reset is
+# process-wide, so it is left to callers that own their process: the CLI and the benchmark.
+RESET_PEAK_RSS = False
+
+
+class PeakRss:
+    """
+    Peak resident set size of this process while one image is evaluated, started when
+    the image is first read or decoded.
+
+    With RESET_PEAK_RSS on Linux, writing 5 to /proc/self/clear_refs resets the kernel's
+    high-water mark (VmHWM) to the current RSS, so the peak read at the end belongs to
+    this image alone. That also clears the peak for everything else in the process (a
+    host's own VmHWM readings, other threads), which is why it is opt-in. Otherwise
+    ru_maxrss, the peak since the process started, is reported; "source" tells which one
+    a report holds. Threads share one process peak, so images scored concurrently in one
+    process see each other's memory.
+    """
+
+    def __init__(self):
+        self.source = "ru_maxrss"
+        if RESET_PEAK_RSS:
+            try:
+                with open("/proc/self/clear_refs", "w") as f:
+                    f.write("5")
+                self.source = "vmhwm"
+            except OSError:
+                pass
+        self.start_mb = _status_mb("VmRSS")
+
+    def report(self) -> dict:
+        """The "memory" entry of a result (MB)."""
+        peak_mb = _status_mb("VmHWM") if self.source == "vmhwm" else _max_rss_mb()
+        return {"peak_rss_mb": round(peak_mb, 1) if peak_mb is not None else None,
+                "start_rss_mb": round(self.start_mb, 1) if self.start_mb is not None else None,
+                "source": self.source}
@@ -0,0 +1,57 @@
+"""Shared fixtures: a small deterministic corpus from the benchmark's generator."""
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_analyzer import generate_corpus  # noqa: E402
+from quality_analyzer import timing  # noqa: E402
+from quality_analyzer.config import configure  # noqa: E402
+
+
+class _FixedCosts(timing.StageCosts):
+    """Predicts the given stages as far too slow and every other stage as free."""
+
+    def __init__(self, *slow: str):
+        super().__init__()
+        self.slow = slow
+
+    def predict_ms(self, stage: str, pixels: int) -> float:
+        return 1e9 if stage in self.slow else 0.0
+
+    def observe(self, stage: str, pixels: int, ms: float):
+        pass
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory) -> list[str]:
+    """The six VGA variants (clean, blur, noise, dark, bright, cast) as PNG files."""
+    return generate_corpus(str(tmp_path_factory.mktemp("corpus")), ["vga"])
+
+
+@pytest.fixture
+def corpus_folder(corpus, tmp_path) -> str:
+    """A private copy of the corpus that a test may modify."""
+    folder = tmp_path / "images"
+    folder.mkdir()
+    for path in corpus:
+        shutil.copy(path, folder)
+    return str(folder)
+
+
+@pytest.fixture
+def restore_config():
+    """Restores the default config.ini lookup after a test that calls configure()."""
+    yield
+    configure(None)
+
+
+@pytest.fixture
+def costs(monkeypatch):
+    """Installs _FixedCosts with the given slow stages, so deadlines degrade deterministically."""
+    def install(*slow: str):
+        monkeypatch.setattr(timing, "STAGE_COSTS", _FixedCosts(*slow))
+    return install
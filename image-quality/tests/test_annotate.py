@@ -0,0 +1,61 @@
+"""Annotated images are counted the same way whichever path drew them."""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.annotate import AnnotationTarget, AnnotationWriter, _save_annotated_image, annotate_frame
+from quality_analyzer.batch import _iter_batch_results
+from quality_analyzer.pipeline import iter_pipelined_results
+
+
+@pytest.fixture
+def folder(corpus_folder) -> str:
+    """The corpus plus a black frame that cascade mode rejects without a focus bbox."""
+    cv2.imwrite(os.path.join(corpus_folder, "black.png"), np.zeros((120, 160, 3), np.uint8))
+    return corpus_folder
+
+
+@pytest.mark.parametrize("mode", ["serial", "pool", "pipeline"])
+def test_unannotated_results_are_not_failures(folder, tmp_path, mode):
+    out_dir = str(tmp_path / "focus_bbox")
+    annotator = AnnotationWriter(AnnotationTarget(out_dir, folder))
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+    if mode == "pipeline":
+        results = iter_pipelined_results(paths, 1, 2, None, None, None, annotator, cascade=True)
+    else:
+        results = _iter_batch_results(paths, 1 if mode == "serial" else 2, None, None, annotator, cascade=True)
+    assert all(error is None for _, _, error in results)
+    annotator.close()
+    assert (annotator.written, annotator.failed) == (6, 0)
+    assert len(os.listdir(out_dir)) == 6
+
+
+def test_write_errors_count_as_failed(corpus, tmp_path, monkeypatch):
+    def broken_write(self, image_path, frame):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(AnnotationTarget, "write", broken_write)
+    annotator = AnnotationWriter(AnnotationTarget(str(tmp_path), os.path.dirname(corpus[0])))
+    assert all(error is None for _, _, error in _iter_batch_results(corpus[:2], 1, None, None, annotator))
+    annotator.close()
+    assert (annotator.written, annotator.failed) == (0, 2)
+
+
+def test_scored_frame_annotation_matches_a_reread(corpus, tmp_path):
+    result = evaluate_photo_quality(corpus[0])
+    bbox, score = tuple(result["Focus Area"]["bbox"]), result["Focus Area"]["confidence"]
+    out_path = _save_annotated_image(corpus[0], bbox, score, str(tmp_path / "reread.png"))
+    assert np.array_equal(annotate_frame(cv2.imread(corpus[0]), bbox, score), cv2.imread(out_path))
+
+    thumbnail = annotate_frame(cv2.imread(corpus[0]), bbox, score, max_side=200)
+    assert max(thumbnail.shape[:2]) == 200
+
+
+def test_preview_frames_get_the_bbox_scaled_down(corpus):
+    img = cv2.imread(corpus[0], cv2.IMREAD_REDUCED_COLOR_2)
+    bbox = (100, 80, 300, 240)
+    expected = annotate_frame(img.copy(), tuple(v // 2 for v in bbox), 0.5)
+    assert np.array_equal(annotate_frame(img, bbox, 0.5, preview_scale=2), expected)
@@ -0,0 +1,63 @@
+"""Folder runs stream one JSON line per image, whatever the number of workers."""
+import json
+import os
+import shutil
+
+import pytest
+
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.batch import _iter_batch_results, _scan_image_files, process_folder
+
+
+def _lines(capsys) -> dict[str, dict]:
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    files = [line["file"] for line in lines]
+    assert len(files) == len(set(files))
+    return {line["file"]: line for line in lines}
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_every_image_scored_once(corpus_folder, capsys, workers):
+    with open(os.path.join(corpus_folder, "broken.png"), "wb") as f:
+        f.write(b"not an image")
+    assert process_folder(corpus_folder, False, False, False, workers=workers) == 6
+    lines = _lines(capsys)
+    assert lines.pop("broken.png")["ok"] is False
+    assert sorted(lines) == sorted(name for name in os.listdir(corpus_folder) if name != "broken.png")
+    for name, line in lines.items():
+        assert line["ok"] and line["result"] == evaluate_photo_quality(os.path.join(corpus_folder, name))
+
+
+def test_missing_or_empty_folders_raise(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        process_folder(str(tmp_path / "missing"), False, False, False)
+    with pytest.raises(ValueError):
+        process_folder(str(tmp_path), False, False, False)
+
+
+def test_recursive_scan_skips_output_folders(corpus, tmp_path):
+    for folder in ("b", "a/deeper", "good_photos", "a/good_photos"):
+        os.makedirs(tmp_path / folder)
+    for i, folder in enumerate(("", "b", "a/deeper", "good_photos", "a/good_photos")):
+        shutil.copy(corpus[i], tmp_path / folder / f"{i}.png")
+    (tmp_path / "notes.txt").write_text("not an image")
+
+    assert [os.path.relpath(p, tmp_path) for p in _scan_image_files(str(tmp_path))] == ["0.png"]
+    scanned = sorted(os.path.relpath(p, tmp_path) for p in _scan_image_files(str(tmp_path), recursive=True))
+    assert scanned == ["0.png", "a/deeper/2.png", "a/good_photos/4.png", "b/1.png"]
+
+
+def test_paths_are_consumed_lazily(corpus):
+    consumed = []
+
+    def paths():
+        for path in corpus * 2:
+            consumed.append(path)
+            yield path
+
+    yielded = 0
+    for _, result, error in _iter_batch_results(paths(), workers=2, max_in_flight=2):
+        assert error is None
+        assert len(consumed) - yielded <= 3  # In the pool, plus the path waiting for a free slot
+        yielded += 1
+    assert yielded == len(corpus) * 2
@@ -0,0 +1,37 @@
+"""The benchmark corpus is deterministic and its score check catches changed results."""
+import copy
+import json
+import os
+
+from benchmark_analyzer import compare_scores, generate_corpus, run_benchmark
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark_baseline.json")
+
+
+def test_corpus_is_deterministic(tmp_path):
+    first = generate_corpus(str(tmp_path / "a"), ["vga"])
+    second = generate_corpus(str(tmp_path / "b"), ["vga"])
+    for a, b in zip(first, second):
+        with open(a, "rb") as fa, open(b, "rb") as fb:
+            assert fa.read() == fb.read()
+
+
+def test_scores_match_the_recorded_baseline(corpus):
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    report = run_benchmark(corpus, repeat=1, warmup=0)
+    assert report["images"] == len(corpus)
+    assert set(report["end_to_end"]) == {"vga"}
+    assert compare_scores(baseline["scores"], report["scores"], 1e-6) == []
+
+
+def test_check_reports_moved_scores_and_flipped_judgements(corpus):
+    scores = run_benchmark(corpus[:1], repeat=1, warmup=0)["scores"]
+    name = next(iter(scores))
+    changed = copy.deepcopy(scores)
+    changed[name]["Sharpness"] += 0.01
+    changed[name]["judgement"] = "Changed"
+    problems = compare_scores(scores, changed, 1e-6)
+    assert len(problems) == 2
+    assert all(p.startswith(name) for p in problems)
+    assert compare_scores(scores, changed, 0.1) == [problems[0]]
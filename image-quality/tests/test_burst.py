@@ -0,0 +1,27 @@
+"""Burst selection: pruning, shared saliency passes and a ranking of full results."""
+import cv2
+
+from quality_analyzer import evaluate_photo_quality, select_best_frames
+
+
+def test_steady_burst(corpus):
+    clean, blur = cv2.imread(corpus[0]), cv2.imread(corpus[1])
+    small = cv2.resize(clean, (320, 240), interpolation=cv2.INTER_AREA)
+    selection = select_best_frames([clean, clean.copy(), blur, small], top_k=2)
+
+    assert [entry["index"] for entry in selection["pruned"]] == [2]
+    assert selection["saliency_passes"] == 2  # Shared by the identical frames; the small one gets its own
+    ranking = selection["ranking"]
+    assert sorted(entry["index"] for entry in ranking) == [0, 1, 3]
+    confidences = [entry["overall_confidence"] for entry in ranking]
+    assert confidences == sorted(confidences, reverse=True)
+    assert ["result" in entry for entry in ranking] == [True, True, False]
+    for entry in ranking[:2]:
+        assert entry["result"]["overall_confidence"] == entry["overall_confidence"]
+
+
+def test_unshared_frames_match_single_evaluation(corpus):
+    selection = select_best_frames(corpus[:3], top_k=3)
+    assert selection["pruned"] == [] and selection["saliency_passes"] == 3
+    for entry in selection["ranking"]:
+        assert entry["result"] == evaluate_photo_quality(corpus[entry["index"]])
@@ -0,0 +1,108 @@
+"""Cache keys ignore options that cannot change scores, and per-run reports are not stored."""
+import configparser
+
+import pytest
+
+from quality_analyzer import evaluate_photo_bytes
+from quality_analyzer.cache import ResultCache
+from quality_analyzer.config import configure, resolve_config_path
+
+BASE = {"focus_map": False, "preview_scale": 1, "cascade": False}
+
+
+@pytest.fixture
+def cache() -> ResultCache:
+    return ResultCache(memory_entries=16)
+
+
+@pytest.mark.parametrize("option", [
+    {"timings": True}, {"bands": 4}, {"low_memory": True}, {"deadline_ms": 5.0}, {"raw_features": False},
+    {"phash": False},
+])
+def test_options_left_out_of_the_key(cache, option):
+    assert cache.key(b"image", **BASE, **option) == cache.key(b"image", **BASE)
+
+
+@pytest.mark.parametrize("option", [
+    {"focus_map": True}, {"preview_scale": 2}, {"cascade": True}, {"raw_features": True},
+    {"phash": True},
+])
+def test_options_in_the_key(cache, option):
+    assert cache.key(b"image", **{**BASE, **option}) != cache.key(b"image", **BASE)
+
+
+def test_key_covers_the_bytes(cache):
+    assert cache.key(b"image", **BASE) != cache.key(b"other", **BASE)
+
+
+def test_reports_are_not_stored(cache):
+    key = cache.key(b"image", **BASE)
+    cache.put(key, {"overall_confidence": 0.5, "timings": {"total": 1.0}, "memory": {"peak_rss_mb": 1.0},
+                    "deadline": {"budget_ms": 50, "skipped": [], "approximated": []}})
+    assert cache.get(key) == {"overall_confidence": 0.5}
+
+
+def test_degraded_results_are_not_stored(cache):
+    key = cache.key(b"image", **BASE)
+    cache.put(key, {"overall_confidence": 0.5, "deadline": {"budget_ms": 5, "skipped": ["Saliency"],
+                                                            "approximated": []}})
+    assert cache.get(key) is None
+
+
+def test_hit_returns_the_scored_result(corpus, cache):
+    with open(corpus[0], "rb") as f:
+        buf = f.read()
+    first = evaluate_photo_bytes(buf, cache=cache, timings=True, bands=2)
+    second = evaluate_photo_bytes(buf, cache=cache)
+    assert cache.stats()["memory_hits"] == 1
+    first.pop("timings")
+    assert second == first
+
+
+def test_config_change_misses(cache, tmp_path, restore_config):
+    parser = configparser.ConfigParser()
+    parser.read(resolve_config_path())
+    parser["NormalizationFactors"]["sharpness"] = "400.0"
+    changed = tmp_path / "changed.ini"
+    with open(changed, "w") as f:
+        parser.write(f)
+    configure(str(changed))
+    assert ResultCache(memory_entries=16).key(b"image", **BASE) != cache.key(b"image", **BASE)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(memory_entries=2)
+    for name in ("a", "b"):
+        cache.put(name, {"name": name})
+    assert cache.get("a") == {"name": "a"}
+    cache.put("c", {"name": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"name": "a"} and cache.get("c") == {"name": "c"}
+
+
+def test_disk_tier_survives_the_process(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResultCache(memory_entries=0, disk_path=path)
+    first.put("key", {"overall_confidence": 0.5})
+    first.close()
+    second = ResultCache(memory_entries=16, disk_path=path)
+    assert second.get("key") == {"overall_confidence": 0.5}
+    assert second.get("key") == {"overall_confidence": 0.5}
+    assert (second.stats()["disk_hits"], second.stats()["memory_hits"]) == (1, 1)
+    second.close()
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = ResultCache(memory_entries=0, disk_path=str(tmp_path / "cache.db"), disk_max_entries=20)
+    for i in range(50):
+        cache.put(str(i), {"i": i})
+    assert cache.stats()["disk_entries"] <= 20
+    assert cache.get("49") == {"i": 49}
+    assert cache.get("0") is None
+    cache.close()
+
+
+def test_hits_are_fresh_copies(cache):
+    cache.put("key", {"Sharpness": {"confidence": 0.5}})
+    cache.get("key")["Sharpness"]["confidence"] = 1.0
+    assert cache.get("key") == {"Sharpness": {"confidence": 0.5}}
@@ -0,0 +1,24 @@
+"""Cascade rejections keep the result shape and never reject an image that could reach Fair."""
+import cv2
+import numpy as np
+
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.config import get_config
+from quality_analyzer.evaluate import _RESULT_METRICS
+
+
+def test_rejected_result_bounds_the_full_score(tmp_path):
+    path = str(tmp_path / "black.png")
+    cv2.imwrite(path, np.zeros((120, 160, 3), np.uint8))
+    full = evaluate_photo_quality(path)
+    rejected = evaluate_photo_quality(path, cascade=True)
+
+    report = rejected.pop("rejected_early")
+    assert set(rejected) == set(full)
+    assert report["max_overall_confidence"] == rejected["overall_confidence"]
+    assert full["overall_confidence"] <= report["max_overall_confidence"] < get_config().judgement_fair
+    assert rejected["Focus Area"]["bbox"] is None
+    computed = [name for name in _RESULT_METRICS if rejected[name]["confidence"] is not None]
+    assert 0 < len(computed) < len(_RESULT_METRICS)
+    for name in computed:
+        assert rejected[name]["confidence"] == full[name]["confidence"]
@@ -0,0 +1,40 @@
+"""Deadline-limited evaluation, including the degraded paths combined with raw_features."""
+import cv2
+import pytest
+
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.metrics import _center_crop_box
+
+
+def test_generous_deadline_changes_nothing(corpus, costs):
+    costs()
+    for path in corpus:
+        result = evaluate_photo_quality(path, deadline_ms=60_000, raw_features=True)
+        report = result.pop("deadline")
+        assert report["skipped"] == [] and report["approximated"] == []
+        assert result == evaluate_photo_quality(path, raw_features=True)
+        assert result["raw_features"]["complete"]
+
+
+@pytest.mark.parametrize("focus_map", [False, True])
+def test_half_size_laplacian_with_raw_features(corpus, costs, focus_map):
+    costs("laplacian")
+    for path in corpus:
+        h, w = cv2.imread(path).shape[:2]
+        result = evaluate_photo_quality(path, deadline_ms=60_000, raw_features=True, focus_map=focus_map)
+        assert "Sharpness" in result["deadline"]["approximated"]
+        raw = result["raw_features"]
+        assert raw["complete"] is False
+        # Boxes are reported in full-resolution pixels, like Focus Area's bbox
+        assert raw["center_bbox"] == pytest.approx(list(_center_crop_box(h, w)), abs=2)
+        x1, y1, x2, y2 = raw["saliency_bbox"]
+        assert 0 <= x1 < x2 <= w and 0 <= y1 < y2 <= h
+        assert result["Focus Area"]["bbox"] in (raw["center_bbox"], raw["saliency_bbox"])
+
+
+def test_everything_skipped_with_raw_features(corpus, costs):
+    costs("laplacian", "saliency", "focus_map")
+    result = evaluate_photo_quality(corpus[0], deadline_ms=60_000, raw_features=True, focus_map=True)
+    assert result["deadline"]["skipped"] == ["Saliency", "Focus Map"]
+    assert result["Saliency"]["confidence"] is None
+    assert result["raw_features"]["complete"] is False
@@ -0,0 +1,62 @@
+"""COPY export: header, quoting and escapes of awkward paths, and NULL for skipped metrics."""
+import csv
+
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.export import COPY_COLUMNS, CopyWriter
+
+AWKWARD = 'dir\\with "quotes", tabs\tand\nnewlines.png'
+
+
+@pytest.fixture(scope="module")
+def results(corpus, tmp_path_factory) -> list[dict]:
+    black = str(tmp_path_factory.mktemp("black") / "black.png")
+    cv2.imwrite(black, np.zeros((120, 160, 3), np.uint8))
+    rejected = evaluate_photo_quality(black, cascade=True)
+    assert "rejected_early" in rejected
+    return [evaluate_photo_quality(corpus[0]), rejected]
+
+
+def _write(path, fmt, results, **kwargs) -> str:
+    writer = CopyWriter(str(path), fmt, **kwargs)
+    for result in results:
+        writer.add(AWKWARD, result)
+    writer.close()
+    with open(path, newline="", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_csv_round_trips(tmp_path, results):
+    rows = list(csv.reader(_write(tmp_path / "out.csv", "csv", results).splitlines(keepends=True)))
+    assert rows[0] == list(COPY_COLUMNS)
+    full, rejected = (dict(zip(COPY_COLUMNS, row)) for row in rows[1:])
+    assert full["file_path"] == rejected["file_path"] == AWKWARD
+    assert float(full["overall_confidence"]) == results[0]["overall_confidence"]
+    assert float(full["sharpness"]) == results[0]["Sharpness"]["confidence"]
+    assert "" in rejected.values() and "" not in full.values()
+
+
+def test_tsv_escapes_text_format(tmp_path, results):
+    lines = _write(tmp_path / "out.tsv", "tsv", results).split("\n")
+    assert lines[0] == "\t".join(COPY_COLUMNS)
+    full, rejected = (line.split("\t") for line in lines[1:3])
+    assert lines[3:] == [""]
+    assert len(full) == len(rejected) == len(COPY_COLUMNS)
+    assert full[0] == 'dir\\\\with "quotes", tabs\\tand\\nnewlines.png'
+    assert "\\N" in rejected and "\\N" not in full
+
+
+def test_append_continues_without_a_header(tmp_path, results):
+    path = tmp_path / "out.csv"
+    first = _write(path, "csv", results[:1])
+    appended = _write(path, "csv", results[1:], append=True)
+    assert appended.startswith(first) and len(appended) > len(first)
+    assert appended.count(COPY_COLUMNS[0]) == 1
+
+
+def test_unknown_format_raises(tmp_path):
+    with pytest.raises(ValueError):
+        CopyWriter(str(tmp_path / "out.txt"), "xlsx")
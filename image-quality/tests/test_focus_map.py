@@ -0,0 +1,55 @@
+"""Dense focus map: per-tile variances and the top-k sharpest non-overlapping regions."""
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.metrics import _calculate_focus_map
+
+NORM = 100.0
+
+
+@pytest.fixture(scope="module")
+def frame() -> np.ndarray:
+    """Flat 240x320 frame with two textured 2x2-tile patches (8x8 grid), the sharper one at the right."""
+    rng = np.random.default_rng(0)
+    gray = np.full((240, 320), 128, np.uint8)
+    gray[150:210, 240:320] = rng.integers(0, 256, (60, 80), dtype=np.uint8)
+    gray[30:90, 0:80] = rng.integers(96, 160, (60, 80), dtype=np.uint8)
+    return gray
+
+
+def _overlap(a, b) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def test_heatmap_tiles_match_direct_variance(frame):
+    focus_map = _calculate_focus_map(frame, grid=8, window=2, top_k=3, normalization_factor=NORM)
+    laplacian = cv2.Laplacian(frame, cv2.CV_64F)
+    ys, xs = np.linspace(0, 240, 9).astype(int), np.linspace(0, 320, 9).astype(int)
+    for r in range(8):
+        for c in range(8):
+            expected = min(laplacian[ys[r]:ys[r + 1], xs[c]:xs[c + 1]].var() / NORM, 1.0)
+            assert focus_map["heatmap"][r][c] == pytest.approx(expected, abs=5e-4)
+
+
+def test_top_regions_are_sharpest_first_and_disjoint(frame):
+    regions = _calculate_focus_map(frame, grid=8, window=2, top_k=3, normalization_factor=1e6)["top_regions"]
+    assert len(regions) == 3
+    assert regions[0]["bbox"] == [240, 150, 320, 210]
+    assert regions[1]["bbox"] == [0, 30, 80, 90]
+    confidences = [region["confidence"] for region in regions]
+    assert confidences == sorted(confidences, reverse=True)
+    for i, a in enumerate(regions):
+        assert all(not _overlap(a["bbox"], b["bbox"]) for b in regions[i + 1:])
+
+
+def test_preview_regions_are_in_full_resolution(corpus):
+    full = evaluate_photo_quality(corpus[0], focus_map=True)["Focus Map"]
+    preview = evaluate_photo_quality(corpus[0], focus_map=True, preview_scale=2)["Focus Map"]
+    h, w = cv2.imread(corpus[0]).shape[:2]
+    for focus_map in (full, preview):
+        for region in focus_map["top_regions"]:
+            x1, y1, x2, y2 = region["bbox"]
+            assert 0 <= x1 < x2 <= w and 0 <= y1 < y2 <= h
+    assert max(region["bbox"][2] for region in preview["top_regions"]) > w // 2
@@ -0,0 +1,109 @@
+"""Alternative scoring paths that are documented to give exactly the serial result."""
+import os
+
+import cv2
+import pytest
+
+from quality_analyzer import evaluate_batch, evaluate_photo_bytes, evaluate_photo_pixels, evaluate_photo_quality, timing
+from quality_analyzer.config import get_config
+
+
+def _scores(result: dict) -> dict:
+    """A result without its per-run reports."""
+    return {k: v for k, v in result.items() if k not in ("timings", "memory", "deadline")}
+
+
+@pytest.fixture(scope="module")
+def serial(corpus) -> dict[str, dict]:
+    return {path: evaluate_photo_quality(path) for path in corpus}
+
+
+@pytest.mark.parametrize("ext", [".png", ".jpg"])
+def test_bytes_match_path(corpus, tmp_path, ext):
+    for path in corpus:
+        encoded = str(tmp_path / f"image{ext}")
+        cv2.imwrite(encoded, cv2.imread(path))
+        with open(encoded, "rb") as f:
+            buf = f.read()
+        expected = evaluate_photo_quality(encoded)
+        assert evaluate_photo_bytes(buf) == expected
+        assert evaluate_photo_bytes(memoryview(bytearray(buf))) == expected
+
+
+def test_undecodable_bytes_raise_value_error():
+    for buf in (b"", b"not an image"):
+        with pytest.raises(ValueError):
+            evaluate_photo_bytes(buf)
+
+
+def test_bands_match_serial(corpus, serial):
+    for path in corpus:
+        assert evaluate_photo_quality(path, bands=3) == serial[path]
+
+
+def test_low_memory_matches_serial(corpus, serial):
+    for path in corpus:
+        result = evaluate_photo_quality(path, low_memory=True)
+        assert "memory" in result
+        assert _scores(result) == serial[path]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs"), reason="needs Linux /proc")
+def test_peak_rss_reset_is_opt_in(corpus, monkeypatch):
+    held = b"\x01" * (256 * 2**20)  # Raise the process peak well above what one VGA image needs
+    del held
+    before = timing._status_mb("VmHWM")
+    assert evaluate_photo_quality(corpus[0], low_memory=True)["memory"]["source"] == "ru_maxrss"
+    assert timing._status_mb("VmHWM") >= before
+
+    monkeypatch.setattr(timing, "RESET_PEAK_RSS", True)
+    assert evaluate_photo_quality(corpus[0], low_memory=True)["memory"]["source"] == "vmhwm"
+
+
+@pytest.mark.parametrize("pixel_format", ["bgr", "rgba"])
+def test_raw_pixels_match_png(corpus, serial, pixel_format):
+    for path in corpus:
+        img = cv2.imread(path)
+        if pixel_format == "rgba":
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGBA)
+        h, w = img.shape[:2]
+        assert evaluate_photo_pixels(img.tobytes(), w, h, pixel_format) == serial[path]
+
+
+def test_padded_stride_matches_png(corpus, serial):
+    img = cv2.imread(corpus[0])
+    h, w = img.shape[:2]
+    stride = w * 3 + 16
+    buf = bytearray(8 + stride * h)
+    for y in range(h):
+        buf[8 + y * stride:8 + y * stride + w * 3] = img[y].tobytes()
+    assert evaluate_photo_pixels(buf, w, h, "bgr", stride=stride, offset=8) == serial[corpus[0]]
+
+
+def test_evaluate_batch_matches_serial(corpus, serial):
+    assert evaluate_batch(corpus) == [serial[path] for path in corpus]
+
+
+def test_evaluate_batch_mixes_inputs_and_sizes(corpus, serial, tmp_path):
+    small = str(tmp_path / "small.png")
+    cv2.imwrite(small, cv2.resize(cv2.imread(corpus[1]), (160, 120), interpolation=cv2.INTER_AREA))
+    with open(corpus[2], "rb") as f:
+        encoded = f.read()
+    images = [corpus[0], small, encoded, cv2.imread(corpus[3]), corpus[4]]
+    expected = [serial[corpus[0]], evaluate_photo_quality(small), serial[corpus[2]], serial[corpus[3]],
+                serial[corpus[4]]]
+    assert evaluate_batch(images) == expected
+
+
+def test_cascade_passes_match_serial(corpus, serial):
+    passed = 0
+    for path in corpus:
+        result = evaluate_photo_quality(path, cascade=True)
+        if "rejected_early" in result:
+            # Only images that can no longer reach Fair may be rejected
+            assert result["rejected_early"]["max_overall_confidence"] < get_config().judgement_fair
+            assert serial[path]["overall_confidence"] < get_config().judgement_fair
+        else:
+            assert result == serial[path]
+            passed += 1
+    assert passed
@@ -0,0 +1,90 @@
+"""Resumed folder runs skip files the journal has already scored in their current state."""
+import csv
+import json
+import os
+
+import cv2
+import pytest
+
+from quality_analyzer import batch
+from quality_analyzer.batch import process_folder
+from quality_analyzer.export import CopyWriter
+from quality_analyzer.journal import ScanJournal
+
+
+def _run(folder: str, journal: str, capsys) -> dict[str, dict]:
+    process_folder(folder, False, False, False, workers=1, journal_path=journal)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    return {line["file"]: line for line in lines}
+
+
+def test_resume_skips_unchanged_files(corpus_folder, tmp_path, capsys):
+    journal = str(tmp_path / "scan.db")
+    first = _run(corpus_folder, journal, capsys)
+    assert len(first) == 6 and all(line["ok"] for line in first.values())
+
+    assert _run(corpus_folder, journal, capsys) == {}
+
+
+def test_resume_rescores_changed_files(corpus_folder, tmp_path, capsys):
+    journal = str(tmp_path / "scan.db")
+    _run(corpus_folder, journal, capsys)
+
+    changed = os.path.join(corpus_folder, "vga_clean.png")
+    img = cv2.imread(changed)
+    cv2.imwrite(changed, cv2.GaussianBlur(img, (0, 0), 3))
+    st = os.stat(changed)
+    os.utime(changed, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert list(_run(corpus_folder, journal, capsys)) == ["vga_clean.png"]
+
+
+def test_changed_options_start_the_journal_over(corpus_folder, tmp_path, capsys):
+    journal = str(tmp_path / "scan.db")
+    _run(corpus_folder, journal, capsys)
+    process_folder(corpus_folder, False, False, False, workers=1, journal_path=journal, focus_map=True)
+    assert len([line for line in capsys.readouterr().out.splitlines() if line.startswith("{")]) == 6
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _CrashingJournal(ScanJournal):
+    """Commits every two files and dies, without committing, after the third."""
+
+    def __init__(self, path: str, **options):
+        super().__init__(path, commit_every=2, **options)
+
+    def record(self, path: str, result: dict):
+        super().record(path, result)
+        if self.recorded == 3:
+            self._db.close()
+            raise _Interrupted
+
+
+class _UnbufferedCopyWriter(CopyWriter):
+    """Writes every row through at once, as a full buffer would."""
+
+    def add(self, image_path: str, result: dict):
+        super().add(image_path, result)
+        self.flush()
+
+
+def test_resumed_copy_out_has_no_duplicate_rows(corpus_folder, tmp_path, monkeypatch, capsys):
+    journal, copy_out = str(tmp_path / "scan.db"), str(tmp_path / "rescore.csv")
+    monkeypatch.setattr(batch, "CopyWriter", _UnbufferedCopyWriter)
+    monkeypatch.setattr(batch, "ScanJournal", _CrashingJournal)
+    with pytest.raises(_Interrupted):
+        process_folder(corpus_folder, False, False, False, workers=1, journal_path=journal, copy_out=copy_out)
+    with open(copy_out) as f:
+        assert len(f.readlines()) > 1 + 2
+
+    monkeypatch.setattr(batch, "ScanJournal", ScanJournal)
+    process_folder(corpus_folder, False, False, False, workers=1, journal_path=journal, copy_out=copy_out)
+    capsys.readouterr()
+    with open(copy_out) as f:
+        rows = list(csv.reader(f))
+    assert rows[0][0] == "file_path"
+    assert sorted(row[0] for row in rows[1:]) == sorted(os.path.join(corpus_folder, name)
+                                                        for name in os.listdir(corpus_folder))
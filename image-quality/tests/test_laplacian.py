@@ -0,0 +1,51 @@
+"""Region sharpness lookups against the direct Laplacian variance, and streamed lookups against the tables."""
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer import metrics
+from quality_analyzer.metrics import LaplacianIntegral, StreamingLaplacian
+
+
+@pytest.fixture(scope="module")
+def gray() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    smooth = cv2.GaussianBlur(rng.integers(0, 256, (203, 311), dtype=np.uint8), (0, 0), 2)
+    return cv2.addWeighted(smooth, 0.8, rng.integers(0, 256, smooth.shape, dtype=np.uint8), 0.2, 0)
+
+
+def _boxes(gray: np.ndarray, count: int = 200) -> list[tuple[int, int, int, int]]:
+    rng = np.random.default_rng(1)
+    h, w = gray.shape
+    boxes = [(0, 0, w, h), (0, 0, 1, 1), (w - 1, h - 1, w, h)]
+    for _ in range(count):
+        x1, x2 = sorted(rng.choice(w + 1, 2, replace=False))
+        y1, y2 = sorted(rng.choice(h + 1, 2, replace=False))
+        boxes.append((int(x1), int(y1), int(x2), int(y2)))
+    return boxes
+
+
+def test_integral_matches_direct_variance(gray):
+    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
+    integral = LaplacianIntegral(gray)
+    assert integral.region_variance() == pytest.approx(laplacian.var(), rel=1e-9)
+    for x1, y1, x2, y2 in _boxes(gray):
+        expected = laplacian[y1:y2, x1:x2].var()
+        assert integral.region_variance(x1, y1, x2, y2) == pytest.approx(expected, rel=1e-9, abs=1e-6)
+
+
+def test_empty_region_has_no_variance(gray):
+    integral = LaplacianIntegral(gray)
+    assert integral.region_variance(10, 10, 10, 50) == 0.0
+    assert integral.region_variance(10, 10, 5, 50) == 0.0
+
+
+def test_streaming_matches_integral_exactly(gray, monkeypatch):
+    monkeypatch.setattr(metrics, "_STREAM_BAND_ROWS", 16)  # Many band boundaries in a small frame
+    integral, streaming = LaplacianIntegral(gray), StreamingLaplacian(gray)
+    assert streaming.region_variance() == integral.region_variance()
+    for box in _boxes(gray, 50):
+        assert streaming.region_variance(*box) == integral.region_variance(*box)
+    ys, xs = np.array([150, 0, 37, 203, 37]), np.array([0, 5, 311, 160])
+    for actual, expected in zip(streaming.corners(ys, xs), integral.corners(ys, xs)):
+        assert np.array_equal(actual, expected)
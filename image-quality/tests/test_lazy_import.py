@@ -0,0 +1,32 @@
+"""`import quality_analyzer` loads neither OpenCV/NumPy nor config.ini until they are used."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import quality_analyzer
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_is_cheap(tmp_path):
+    # The config path does not exist, so reading config.ini at import time would fail
+    script = ("import sys, quality_analyzer; "
+              "print(sorted(m for m in sys.modules if m in ('cv2', 'numpy') or m.startswith('quality_analyzer.'))); "
+              "quality_analyzer.get_config")
+    env = dict(os.environ, ANALYZER_CONFIG=str(tmp_path / "missing.ini"))
+    completed = subprocess.run([sys.executable, "-c", script], cwd=PACKAGE_DIR, env=env,
+                               capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("name", quality_analyzer.__all__)
+def test_every_export_resolves(name):
+    assert getattr(quality_analyzer, name) is not None
+    assert name in dir(quality_analyzer)
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(AttributeError):
+        quality_analyzer.no_such_name
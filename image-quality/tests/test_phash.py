@@ -0,0 +1,66 @@
+"""Perceptual hashes are opt-in, independent of which stages ran, and index lookups are exact."""
+import random
+
+import cv2
+import pytest
+
+from quality_analyzer import evaluate_photo_pixels, evaluate_photo_quality
+from quality_analyzer.phash import PHASH_BITS, PhashIndex, hamming_distance
+
+
+@pytest.fixture(scope="module")
+def hashes(corpus) -> dict[str, str]:
+    return {path: evaluate_photo_quality(path, phash=True)["phash"] for path in corpus}
+
+
+def test_not_computed_by_default(corpus):
+    result = evaluate_photo_quality(corpus[0], timings=True)
+    assert "phash" not in result
+    assert "phash" not in result["timings"]
+
+
+@pytest.mark.parametrize("options", [{"bands": 3}, {"low_memory": True}, {"cascade": True}, {"raw_features": True}])
+def test_same_hash_on_every_path(corpus, hashes, options):
+    for path in corpus:
+        result = evaluate_photo_quality(path, phash=True, **options)
+        assert result["phash"] == hashes[path]
+        if "raw_features" in result:
+            assert result["raw_features"]["phash"] == hashes[path]
+
+
+def test_raw_pixels_hash_like_png(corpus, hashes):
+    for path in corpus:
+        img = cv2.imread(path)
+        h, w = img.shape[:2]
+        assert evaluate_photo_pixels(img.tobytes(), w, h, "bgr", phash=True)["phash"] == hashes[path]
+
+
+@pytest.mark.parametrize("slow", [("laplacian",), ("laplacian", "saliency", "focus_map")])
+def test_degraded_deadline_keeps_the_hash(corpus, hashes, costs, slow):
+    costs(*slow)
+    for path in corpus:
+        result = evaluate_photo_quality(path, deadline_ms=60_000, phash=True)
+        assert result["deadline"]["approximated"] or result["deadline"]["skipped"]
+        assert result["phash"] == hashes[path]
+
+
+def test_index_query_matches_a_scan(tmp_path):
+    rng = random.Random(0)
+    base = rng.getrandbits(PHASH_BITS)
+    stored = {}
+    for i in range(500):
+        value = base
+        for _ in range(rng.randrange(0, 24)):
+            value ^= 1 << rng.randrange(PHASH_BITS)
+        stored[f"img{i}"] = f"{value:016x}"
+    index = PhashIndex(str(tmp_path / "dups.db"))
+    for key, phash in stored.items():
+        index.add(key, phash)
+
+    query = f"{base:016x}"
+    for max_distance in (0, 4, 8, 13):
+        expected = sorted(({"file": key, "distance": hamming_distance(query, phash)} for key, phash in stored.items()
+                           if hamming_distance(query, phash) <= max_distance),
+                          key=lambda match: (match["distance"], match["file"]))
+        assert index.query(query, max_distance) == expected
+    index.close()
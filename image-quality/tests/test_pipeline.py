@@ -0,0 +1,33 @@
+"""Threaded reader/compute pipeline: serial results, cache hits and bounded queues."""
+import pytest
+
+from quality_analyzer import ResultCache, evaluate_photo_quality
+from quality_analyzer.pipeline import QueueDepths, iter_pipelined_results
+
+
+@pytest.fixture(scope="module")
+def serial(corpus) -> dict[str, dict]:
+    return {path: evaluate_photo_quality(path) for path in corpus}
+
+
+def test_matches_serial(corpus, serial, tmp_path):
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    depths = QueueDepths()
+    seen = {}
+    for path, result, error in iter_pipelined_results(iter(corpus + [str(broken)]), 2, 3, queue_depth=2,
+                                                      depths=depths):
+        seen[path] = error if result is None else result
+    assert isinstance(seen.pop(str(broken)), Exception)
+    assert seen == serial
+    decoded = depths.report()["decoded"]
+    assert decoded["capacity"] == 2 and decoded["max_depth"] <= 2
+
+
+def test_cache_hits_skip_scoring(corpus, serial):
+    cache = ResultCache(memory_entries=16)
+    for _ in range(2):
+        results = {path: result for path, result, _ in iter_pipelined_results(corpus, 2, 2, cache)}
+        assert results == serial
+    stats = cache.stats()
+    assert (stats["misses"], stats["memory_hits"]) == (len(corpus), len(corpus))
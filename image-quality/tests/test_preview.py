@@ -0,0 +1,44 @@
+"""Reduced-resolution preview scoring."""
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer import calibrate_preview, evaluate_batch, evaluate_photo_bytes, evaluate_photo_quality
+from quality_analyzer.config import PREVIEW_SCALES, get_config
+
+
+@pytest.mark.parametrize("size", [1, 3, 7])
+@pytest.mark.parametrize("ext", [".png", ".jpg"])
+def test_images_smaller_than_the_reduction(tmp_path, size, ext):
+    path = str(tmp_path / f"tiny{ext}")
+    cv2.imwrite(path, np.full((size, size, 3), 100, np.uint8))
+    with open(path, "rb") as f:
+        buf = f.read()
+    for scale in (2, 4, 8):
+        result = evaluate_photo_quality(path, preview_scale=scale)
+        assert result["preview_scale"] == scale
+        assert evaluate_photo_bytes(buf, preview_scale=scale) == result
+        assert evaluate_batch([path], preview_scale=scale) == [result]
+
+
+def test_preview_result_is_marked_and_boxed_in_full_resolution(corpus):
+    for path in corpus:
+        h, w = cv2.imread(path).shape[:2]
+        for scale in (2, 4, 8):
+            result = evaluate_photo_quality(path, preview_scale=scale)
+            assert result["preview_scale"] == scale
+            x1, y1, x2, y2 = result["Focus Area"]["bbox"]
+            assert 0 <= x1 < x2 <= w and 0 <= y1 < y2 <= h
+            assert x2 > w // scale or y2 > h // scale
+
+
+def test_calibration_uses_the_median_preview_ratio(corpus, corpus_folder):
+    factors = calibrate_preview(corpus_folder)
+    assert sorted(factors) == list(PREVIEW_SCALES)
+    base = get_config().preview_normalization[1]
+    full = [evaluate_photo_quality(path, raw_features=True)["raw_features"]["laplacian_var"] for path in corpus]
+    for scale, (sharpness, focus_area, noise) in factors.items():
+        reduced = [evaluate_photo_quality(path, preview_scale=scale, raw_features=True)["raw_features"]["laplacian_var"]
+                   for path in corpus]
+        assert sharpness == pytest.approx(base[0] * np.median(np.divide(reduced, full)), rel=1e-9)
+        assert focus_area > 0 and noise > 0
@@ -0,0 +1,80 @@
+"""Re-judging stored raw measurements must equal rescoring the images."""
+import configparser
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.batch import rejudge_store
+from quality_analyzer.config import configure, get_config, resolve_config_path
+from quality_analyzer.features import FeatureStore, load_feature_store, rejudge, rejudged_result
+
+JUDGED_KEYS = ("Sharpness", "Focus Area", "Exposure", "Noise", "Color Balance", "Dynamic Range", "Saliency",
+               "overall_confidence", "judgement", "judgement_description")
+
+
+def _judged(result: dict) -> dict:
+    """The config-dependent parts of a result, flattened so pytest.approx can compare them."""
+    flat = {}
+    for key in JUDGED_KEYS:
+        if isinstance(result[key], dict):
+            flat.update({f"{key}.{field}": value for field, value in result[key].items()})
+        else:
+            flat[key] = result[key]
+    return flat
+
+
+@pytest.fixture
+def changed_config(tmp_path) -> str:
+    """config.ini with other normalization factors, weights and judgement levels."""
+    parser = configparser.ConfigParser()
+    parser.read(resolve_config_path())
+    parser["NormalizationFactors"]["sharpness"] = "400.0"
+    parser["NormalizationFactors"]["focus_area"] = "300.0"
+    parser["NormalizationFactors"]["noise"] = "20.0"
+    parser["Weights"]["overall_tech"] = "0.8"
+    parser["Weights"]["overall_other"] = "0.2"
+    parser["JudgementLevels"]["fair"] = "0.45"
+    path = tmp_path / "changed.ini"
+    with open(path, "w") as f:
+        parser.write(f)
+    return str(path)
+
+
+@pytest.mark.parametrize("preview_scale", [1, 2])
+def test_rejudge_equals_rescore(corpus, tmp_path, changed_config, restore_config, preview_scale):
+    store = FeatureStore(str(tmp_path / "features.npz"))
+    for path in corpus:
+        store.add(path, evaluate_photo_quality(path, preview_scale=preview_scale, raw_features=True)["raw_features"])
+    store.save()
+    columns = load_feature_store(store.path)
+
+    for config_path in (None, changed_config):
+        configure(config_path)
+        judged = rejudge(columns, get_config())
+        for i, path in enumerate(columns["path"]):
+            rescored = evaluate_photo_quality(str(path), preview_scale=preview_scale)
+            expected = _judged(rescored)
+            actual = _judged(rejudged_result(columns, judged, i))
+            assert actual.keys() == expected.keys()
+            for key, value in expected.items():
+                assert actual[key] == (pytest.approx(value, rel=1e-9) if isinstance(value, float) else value), key
+
+
+def test_incomplete_rows_say_why(corpus, tmp_path, costs, capsys):
+    store = FeatureStore(str(tmp_path / "features.npz"))
+    black = str(tmp_path / "black.png")
+    cv2.imwrite(black, np.zeros((120, 160, 3), np.uint8))  # Cannot reach Fair whatever its focus
+    result = evaluate_photo_quality(black, cascade=True, raw_features=True)
+    assert "rejected_early" in result
+    store.add("rejected.png", result["raw_features"])
+    costs("laplacian")
+    store.add("degraded.png", evaluate_photo_quality(corpus[0], deadline_ms=60_000, raw_features=True)["raw_features"])
+    store.save()
+
+    assert rejudge_store(store.path) == 0
+    errors = {line["file"]: line["error"] for line in map(json.loads, capsys.readouterr().out.splitlines())}
+    assert errors == {"rejected.png": "Rejected early by cascade mode; rescore to re-judge.",
+                      "degraded.png": "Deadline exceeded; rescore to re-judge."}
@@ -0,0 +1,61 @@
+"""Real-FFT spectral residual and the analytic saliency peak against their direct forms."""
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer.metrics import (_calculate_saliency_batch, _calculate_saliency_result, _spectral_residual,
+                                      _upsampled_peak)
+
+
+def _reference_residual(small: np.ndarray) -> np.ndarray:
+    """Full complex-FFT spectral residual in float64 with a circular 3x3 log-amplitude blur."""
+    spectrum = np.fft.fft2(small.astype(np.float64))
+    log_amp = np.log(np.abs(spectrum) + 1e-8)
+    avg_log = sum(np.roll(log_amp, (dy, dx), axis=(0, 1)) for dy in (-1, 0, 1) for dx in (-1, 0, 1)) / 9.0
+    return np.abs(np.fft.ifft2(np.exp(log_amp - avg_log + 1j * np.angle(spectrum)))) ** 2
+
+
+@pytest.fixture(scope="module")
+def previews() -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    textured = cv2.GaussianBlur(rng.integers(0, 256, (256, 256), dtype=np.uint8), (0, 0), 1.5)
+    blob = np.zeros((256, 256), np.uint8)
+    cv2.circle(blob, (180, 70), 25, 255, -1)
+    return [textured, blob]
+
+
+def test_real_fft_matches_complex_fft(previews):
+    for preview in previews:
+        response = _spectral_residual(preview.astype(np.float32))
+        assert response.dtype == np.float32
+        reference = _reference_residual(preview)
+        assert np.abs(response - reference).max() <= 1e-3 * reference.max()
+
+
+@pytest.mark.parametrize("shape", [(480, 640), (37, 1000), (1000, 37), (257, 300), (100, 100)])
+def test_peak_matches_full_size_map(shape):
+    rng = np.random.default_rng(shape[0] * shape[1])
+    small_map = cv2.GaussianBlur(rng.random((256, 256), dtype=np.float32), (9, 9), 2.5)
+    small_map /= small_map.max()
+    full = cv2.resize(small_map, (shape[1], shape[0]), interpolation=cv2.INTER_LINEAR)
+    y, x = np.unravel_index(int(np.argmax(full)), full.shape)
+    peak_xy, peak = _upsampled_peak(small_map, shape)
+    assert peak_xy == (int(x), int(y))
+    assert peak == pytest.approx(min(float(full[y, x]), 1.0), abs=1e-6)  # cv2 interpolates in float32
+
+
+def test_result_peak_lies_on_the_salient_blob():
+    gray = np.full((600, 800), 90, np.uint8)
+    cv2.circle(gray, (620, 150), 40, 250, -1)
+    x, y = _calculate_saliency_result(gray).peak_xy
+    assert abs(x - 620) <= 60 and abs(y - 150) <= 60
+
+
+def test_batched_saliency_matches_per_frame():
+    rng = np.random.default_rng(1)
+    grays = np.stack([cv2.GaussianBlur(rng.integers(0, 256, (120, 160), dtype=np.uint8), (0, 0), 2)
+                      for _ in range(6)])  # More than one FFT chunk
+    for gray, batched in zip(grays, _calculate_saliency_batch(grays)):
+        single = _calculate_saliency_result(gray)
+        assert np.array_equal(batched.small_map, single.small_map)
+        assert (batched.peak_xy, batched.peak) == (single.peak_xy, single.peak)
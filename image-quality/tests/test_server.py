@@ -0,0 +1,41 @@
+"""The --serve loop answers every request line exactly once, matched by "id"."""
+import base64
+import io
+import json
+import sys
+
+import pytest
+
+from quality_analyzer import evaluate_photo_quality, serve
+
+
+def _serve(monkeypatch, capsys, lines: list, **kwargs) -> list[dict]:
+    stdin = "".join((line if isinstance(line, str) else json.dumps(line)) + "\n" for line in lines)
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(stdin.encode())))
+    serve(**kwargs)
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_one_response_per_request(corpus, monkeypatch, capsys, workers):
+    requests = [{"id": i, "path": path} for i, path in enumerate(corpus)]
+    responses = _serve(monkeypatch, capsys, requests, workers=workers)
+    assert sorted(response["id"] for response in responses) == list(range(len(corpus)))
+    for response in responses:
+        assert response["ok"]
+        assert response["result"] == evaluate_photo_quality(corpus[response["id"]])
+
+
+def test_bad_requests_get_errors_and_the_server_keeps_going(corpus, tmp_path, monkeypatch, capsys):
+    with open(corpus[0], "rb") as f:
+        image_b64 = base64.b64encode(f.read()).decode()
+    responses = _serve(monkeypatch, capsys, [
+        "not json",
+        "[1, 2]",
+        {"id": "missing", "path": str(tmp_path / "missing.png")},
+        {"id": "empty"},
+        {"id": "b64", "image_b64": image_b64},
+    ])
+    assert [(response["id"], response["ok"]) for response in responses] == [
+        (None, False), (None, False), ("missing", False), ("empty", False), ("b64", True)]
+    assert responses[-1]["result"] == evaluate_photo_quality(corpus[0])
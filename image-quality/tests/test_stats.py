@@ -0,0 +1,41 @@
+"""The fused statistics pass against per-metric sweeps over the image."""
+import cv2
+import numpy as np
+import pytest
+
+from quality_analyzer.metrics import _compute_batch_stats, _compute_image_stats
+
+
+@pytest.fixture(scope="module")
+def frames() -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (97, 131, 3), dtype=np.uint8),
+            cv2.GaussianBlur(rng.integers(40, 200, (97, 131, 3), dtype=np.uint8), (0, 0), 3),
+            np.full((97, 131, 3), (10, 20, 30), np.uint8)]
+
+
+def test_image_stats_match_direct_sweeps(frames):
+    for img in frames:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        stats = _compute_image_stats(gray, img)
+        assert stats.mean_intensity == int(gray.sum(dtype=np.int64)) / gray.size
+        assert (stats.gray_min, stats.gray_max) == (int(gray.min()), int(gray.max()))
+        assert stats.channel_means.tolist() == (img.sum(axis=(0, 1), dtype=np.int64) / gray.size).tolist()
+        assert stats.channel_stds == pytest.approx(img.reshape(-1, 3).std(axis=0), rel=1e-9)
+        assert stats.noise_std == float(np.std(gray[:50, :50]))
+        assert stats.gray_hist.tolist() == np.bincount(gray.ravel(), minlength=256).tolist()
+
+
+def test_empty_image_has_no_range_or_noise_sample():
+    stats = _compute_image_stats(np.zeros((0, 0), np.uint8))
+    assert (stats.gray_min, stats.gray_max, stats.noise_std, stats.mean_intensity) == (None, None, None, 0.0)
+
+
+def test_batch_stats_match_image_stats(frames):
+    grays = np.stack([cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) for img in frames])
+    for gray, img, batched in zip(grays, frames, _compute_batch_stats(grays, np.stack(frames))):
+        single = _compute_image_stats(gray, img)
+        assert batched.mean_intensity == single.mean_intensity
+        assert (batched.gray_min, batched.gray_max) == (single.gray_min, single.gray_max)
+        assert batched.channel_means.tolist() == single.channel_means.tolist()
+        assert batched.noise_std == single.noise_std
@@ -0,0 +1,44 @@
+"""Per-stage timings are opt-in, do not change scores, and aggregate into percentile reports."""
+from quality_analyzer import evaluate_photo_quality
+from quality_analyzer.timing import StageTimer, TimingStats
+
+
+def test_timings_are_opt_in(corpus):
+    path = corpus[0]
+    plain = evaluate_photo_quality(path)
+    timed = evaluate_photo_quality(path, timings=True)
+    assert "timings" not in plain
+    report = timed.pop("timings")
+    assert timed == plain
+    assert {"decode", "total"} <= set(report)
+    assert all(ms >= 0 for ms in report.values())
+    assert report["total"] >= max(ms for name, ms in report.items() if name != "total")
+
+
+def test_disabled_timer_records_nothing():
+    timer = StageTimer(enabled=False)
+    with timer.stage("decode"):
+        pass
+    assert timer.timings == {}
+
+
+def test_repeated_stages_accumulate():
+    timer = StageTimer()
+    for _ in range(3):
+        with timer.stage("saliency"):
+            pass
+    assert list(timer.timings) == ["saliency"]
+    assert set(timer.report()) == {"saliency", "total"}
+
+
+def test_percentiles_fall_in_the_right_buckets():
+    stats = TimingStats()
+    for ms in range(1, 101):
+        stats.add({"total": float(ms)})
+    report = stats.report()["total"]
+    assert report["count"] == 100
+    assert report["mean_ms"] == 50.5
+    assert report["max_ms"] == 100.0
+    for key, exact in (("p50_ms", 50), ("p90_ms", 90), ("p99_ms", 99)):
+        assert exact <= report[key] <= exact * 1.13
+    assert sum(n for _, n in report["histogram"]) == 100